@@ -0,0 +1,335 @@
+"""
+Shared building blocks of the PyPSA-Eur scenario config generators.
+
+Both the interactive generators and the batch generator fill the H2/noH2
+templates through ``build_config``, so a scenario produced either way is
+identical for the same inputs.
+"""
+import copy
+import functools
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+import pandas as pd
+import yaml
+from src.h2impact.constants import PREDEFINED_AREAS, COUNTRY_CODES
+from src.h2impact.data.cutout_io import union_area
+
+CONFIG_DIR = Path(__file__).resolve().parent
+TEMPLATES = {
+    "H2": CONFIG_DIR / "config_H2_template.yaml",
+    "noH2": CONFIG_DIR / "config_no_H2_template.yaml",
+}
+VARIANTS = tuple(TEMPLATES)
+YAML_DIR = Path("src/h2impact/configs/yaml_files")
+CUTOUT_VARIABLES = ["u10", "v10", "t2m", "si"]
+
+# Config entries that determine the upstream PyPSA-Eur build products shared between scenarios
+SHARED_KEYS = (("countries",), ("snapshots",), ("atlite",), ("enable", "drop_leap_day"))
+# Shared-resource file prefixes that also depend on variant options (carriers, clustering, lines),
+# so every run keeps its own copy
+VARIANT_RESOURCES = ["networks/", "profile_", "availability_matrix_", "busmap_", "linemap_", "regions_"]
+
+# HiGHS profiles by estimated LP size (variables): simplex for small problems, interior point without
+# crossover and more threads for larger ones, with looser tolerances for the largest
+SOLVER_PROFILES = (
+    ("h2impact-small", 2e5, {"solver": "simplex", "threads": 1, "parallel": "off",
+                             "primal_feasibility_tolerance": 1e-7, "dual_feasibility_tolerance": 1e-7}),
+    ("h2impact-medium", 2e6, {"solver": "ipm", "threads": 4, "parallel": "on", "run_crossover": "off",
+                              "primal_feasibility_tolerance": 1e-6, "dual_feasibility_tolerance": 1e-6,
+                              "ipm_optimality_tolerance": 1e-6}),
+    ("h2impact-large", float("inf"), {"solver": "ipm", "threads": 8, "parallel": "on", "run_crossover": "off",
+                                      "primal_feasibility_tolerance": 1e-5, "dual_feasibility_tolerance": 1e-5,
+                                      "ipm_optimality_tolerance": 1e-4}),
+)
+# Rough memory model: solver overhead per LP variable, plus the cutout slice held while building profiles
+BASE_MEM_MB = 2000
+KB_PER_VARIABLE = 1.5
+CUTOUT_VARIABLES_IN_MEMORY = 4
+# PyPSA-Eur's default snapshots, used when an overlay config does not set them
+DEFAULT_SNAPSHOTS = {"start": "2013-01-01", "end": "2014-01-01"}
+SOLVER_LOG = Path("logs/solver_profiles.jsonl")
+
+# The C dumper is several times faster when PyYAML was built with libyaml
+Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+@functools.lru_cache(maxsize=None)
+def _template(variant):
+    with open(TEMPLATES[variant], "r") as f:
+        return yaml.safe_load(f)
+
+
+def load_template(variant):
+    """Fresh copy of the template for ``variant`` (``H2`` or ``noH2``); files are read once."""
+    if variant not in TEMPLATES:
+        raise ValueError(f"Unknown scenario variant '{variant}', expected one of {VARIANTS}.")
+    return copy.deepcopy(_template(variant))
+
+
+def resolve_countries(names):
+    """Country names, lower-cased and checked; ``all`` expands to every country in COUNTRY_CODES."""
+    if isinstance(names, str):
+        names = [names]
+    countries = []
+    for name in names:
+        name = name.strip().lower()
+        if name == "all":
+            countries.extend(COUNTRY_CODES)
+        elif name not in PREDEFINED_AREAS or name not in COUNTRY_CODES:
+            raise ValueError(f"Country '{name}' not recognized.")
+        else:
+            countries.append(name)
+    return countries
+
+
+def countries_area(countries):
+    """ISO codes of ``countries`` and the ``(N, W, S, E)`` box covering all of them."""
+    return [COUNTRY_CODES[c] for c in countries], union_area(PREDEFINED_AREAS[c] for c in countries)
+
+
+def config_filename(variant, name):
+    """Deterministic file name of a scenario config, e.g. ``config_no_H2_de-2020.yaml``."""
+    return f"config_no_H2_{name}.yaml" if variant == "noH2" else f"config_H2_{name}.yaml"
+
+
+def resource_fingerprint(config, length=10):
+    """Short hash of the ``SHARED_KEYS`` entries of ``config``; equal for scenarios that can share resources."""
+    shared = {}
+    for keys in SHARED_KEYS:
+        value = config
+        for key in keys:
+            value = value.get(key) if isinstance(value, dict) else None
+        shared[".".join(keys)] = value
+    text = json.dumps(shared, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+
+def shared_resources_policy(config):
+    """
+    ``run.shared_resources`` naming the resource folder of every scenario with the same fingerprint.
+
+    The folder is ``<countries>-<fingerprint>``, e.g. ``de-3f9a1c07b2``.
+    """
+    countries = [c.lower() for c in config.get("countries", [])]
+    prefix = "_".join(countries) if 0 < len(countries) <= 3 else f"{len(countries)}countries"
+    return {"policy": f"{prefix}-{resource_fingerprint(config)}", "exclude": list(VARIANT_RESOURCES)}
+
+
+def build_config(variant, iso_codes, area, cutout_name, cutout_path, start, end, resolution=None,
+                 run_name=None, shared_resources=None):
+    """
+    Scenario config for ``variant`` with countries, snapshots and the atlite cutout filled in.
+
+    ``area`` is ``(N, W, S, E)``; ``resolution`` is ``(dlat, dlon)`` and only
+    needed for cutouts that are not on the native 0.25° grid.
+    ``run.shared_resources`` defaults to ``shared_resources_policy``, so the
+    H2 and noH2 variants of the same countries and period share their
+    upstream build products.
+    """
+    config = load_template(variant)
+    y_max, x_min, y_min, x_max = area
+
+    if iso_codes:
+        config["countries"] = list(iso_codes)
+    config["snapshots"] = {"start": start, "end": end}
+    if run_name is not None:
+        config["run"]["name"] = run_name
+
+    cutout = {
+        "module": "era5",
+        "path": str(cutout_path),
+        "x": [x_min, x_max],
+        "y": [y_min, y_max],
+        "time": [start, end],
+        "variables": list(CUTOUT_VARIABLES),
+    }
+    if resolution:
+        cutout["dx"], cutout["dy"] = resolution[1], resolution[0]
+    config["atlite"] = {"default_cutout": cutout_name, "cutouts": {cutout_name: cutout}}
+
+    # Shipdensity raster disabled
+    config["shipdensity"] = {"raster": {"activate": False}}
+
+    config["run"]["shared_resources"] = (
+        shared_resources if shared_resources is not None else shared_resources_policy(config)
+    )
+    return config
+
+
+def split_snapshots(start, end, window):
+    """
+    ``(label, start, end)`` windows covering ``start``..``end``.
+
+    ``window`` is ``month`` (calendar months) or ``<N>w`` (N-week blocks from
+    ``start``). Each window ends where the next one starts, matching
+    PyPSA-Eur's left-inclusive snapshots, so the windows tile the range.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    weeks = re.fullmatch(r"(\d+)w", str(window).strip().lower())
+    if window == "month":
+        inner = pd.date_range(start, end, freq="MS")
+    elif weeks and int(weeks.group(1)) > 0:
+        inner = pd.date_range(start, end, freq=f"{7 * int(weeks.group(1))}D")
+    else:
+        raise ValueError(f"Unknown snapshot window '{window}', expected 'month' or '<N>w' (e.g. '4w').")
+
+    bounds = sorted({start, end, *inner[(inner > start) & (inner < end)]})
+    return [
+        (lo.strftime("%Y-%m") if window == "month" else f"w{i:02d}", lo.strftime("%Y-%m-%d"), hi.strftime("%Y-%m-%d"))
+        for i, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:]), start=1)
+    ]
+
+
+def window_configs(config, window=None):
+    """
+    ``(label, config)`` per snapshot window of ``config``; one unlabelled entry without ``window``.
+
+    Every window gets its own ``run.name`` suffix and, for fingerprinted
+    configs, its own shared resources, since renewable profiles depend on
+    the snapshots. Windows are solved independently: storage levels are
+    cyclic within each window rather than carried over.
+    """
+    if not window:
+        return [("", config)]
+    fingerprinted = config["run"].get("shared_resources") == shared_resources_policy(config)
+    windows = []
+    for label, start, end in split_snapshots(config["snapshots"]["start"], config["snapshots"]["end"], window):
+        part = copy.deepcopy(config)
+        part["snapshots"].update(start=start, end=end)
+        if part["run"].get("name"):
+            part["run"]["name"] = f"{part['run']['name']}-{label}"
+        if fingerprinted:
+            part["run"]["shared_resources"] = shared_resources_policy(part)
+        windows.append((label, part))
+    return windows
+
+
+def snapshot_hours(config):
+    """Hours between the snapshot start and end of ``config``, with PyPSA-Eur's defaults for missing keys."""
+    snapshots = {**DEFAULT_SNAPSHOTS, **(config.get("snapshots") or {})}
+    return (pd.Timestamp(snapshots["end"]) - pd.Timestamp(snapshots["start"])) / pd.Timedelta("1h")
+
+
+def time_steps(config):
+    """Number of solved time steps of ``config`` after temporal clustering (segments or resolution)."""
+    hours = snapshot_hours(config)
+    resolution = str(((config.get("clustering") or {}).get("temporal") or {}).get("resolution_elec") or "1h")
+    if resolution.endswith("seg"):
+        return int(resolution[:-3])
+    return max(1, round(hours / (pd.Timedelta(resolution) / pd.Timedelta("1h"))))
+
+
+def apply_segments(config, segments):
+    """
+    Solve ``config`` on ``segments`` time segments (``resolution_elec: <N>seg``).
+
+    PyPSA-Eur aggregates the snapshots into that many segments of variable
+    length with tsam; this is a quick, coarse alternative to the template's
+    fixed resolution. Raises ValueError unless it reduces the time steps.
+    """
+    steps = time_steps(config)
+    if not 0 < segments < steps:
+        raise ValueError(f"{segments} segments do not reduce the {steps} time steps of the current resolution.")
+    config.setdefault("clustering", {}).setdefault("temporal", {})["resolution_elec"] = f"{segments}seg"
+    return config
+
+
+def estimate_problem_size(config):
+    """
+    Rough LP size and memory need of ``config`` from its countries, time steps and cutout grid.
+
+    Variables are time steps × nodes × (extendable carriers + dispatch and
+    storage-level variables); nodes are the clusters, at least one per country.
+    Works on partial overlay configs: missing snapshots take PyPSA-Eur's
+    defaults, and cutouts without an ``x``/``y`` extent add no grid term.
+    """
+    clusters = (config.get("scenario") or {}).get("clusters") or [1]
+    nodes = max(int(c) for c in (clusters if isinstance(clusters, list) else [clusters]))
+    nodes = max(nodes, len(config.get("countries") or []))
+    extendable = (config.get("electricity") or {}).get("extendable_carriers") or {}
+    carriers = sum(len(v or []) for v in extendable.values()) or 1
+    steps = time_steps(config)
+    variables = steps * nodes * (carriers + 2)
+
+    cells = 0
+    for cutout in ((config.get("atlite") or {}).get("cutouts") or {}).values():
+        cutout = cutout or {}
+        if not (cutout.get("x") and cutout.get("y")):
+            continue
+        dx, dy = cutout.get("dx", 0.25), cutout.get("dy", 0.25)
+        cells += (int(abs(cutout["x"][1] - cutout["x"][0]) / dx) + 1) * (int(abs(cutout["y"][1] - cutout["y"][0]) / dy) + 1)
+    hours = snapshot_hours(config)
+    profile_mb = cells * hours * CUTOUT_VARIABLES_IN_MEMORY * 4 / 1024 ** 2
+    solve_mb = BASE_MEM_MB + variables * KB_PER_VARIABLE / 1024
+    return {
+        "countries": len(config.get("countries") or []),
+        "nodes": nodes,
+        "time_steps": steps,
+        "grid_cells": cells,
+        "variables": int(variables),
+        "mem_mb": int(max(solve_mb, BASE_MEM_MB + profile_mb)),
+    }
+
+
+def apply_solver_profile(config):
+    """
+    Set the HiGHS profile and memory hint matching the estimated size of ``config``.
+
+    Writes ``solving.solver.options``, ``solving.solver_options.<profile>``
+    and ``solving.mem_mb``; returns the estimate with the chosen profile.
+    """
+    estimate = estimate_problem_size(config)
+    name, _, options = next(p for p in SOLVER_PROFILES if estimate["variables"] < p[1])
+    solving = config.setdefault("solving", {})
+    solving.setdefault("solver", {}).update(name="highs", options=name)
+    solving.setdefault("solver_options", {})[name] = dict(options)
+    solving["mem_mb"] = estimate["mem_mb"]
+    return {**estimate, "profile": name, "threads": options["threads"], "method": options["solver"]}
+
+
+def log_solver_profile(path, estimate, log_path=SOLVER_LOG):
+    """Append the estimate and chosen profile of the config at ``path`` to the JSON-lines solver log."""
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, "a") as f:
+        f.write(json.dumps({"config": str(path), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), **estimate}) + "\n")
+
+
+def dump_config(config):
+    return yaml.dump(config, Dumper=Dumper, default_flow_style=False, sort_keys=False, allow_unicode=True)
+
+
+def write_config(config, path):
+    """
+    Write ``config`` to ``path`` unless the file already holds the same text.
+
+    Unchanged files keep their modification time, so Snakemake does not
+    rerun scenarios whose config did not change. Returns True if written.
+    """
+    path = Path(path)
+    text = dump_config(config)
+    if path.exists() and path.read_text() == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return True
+
+
+def write_scenario(config, path, log_path=SOLVER_LOG, verbose=True):
+    """
+    Apply the solver profile to ``config`` and write it to ``path``.
+
+    The estimate and profile are logged when the file changed (and printed
+    with ``verbose``). Returns True if written.
+    """
+    estimate = apply_solver_profile(config)
+    if verbose:
+        print(f"{Path(path).name}: ~{estimate['variables']:,} variables, {estimate['mem_mb']:,} MB → "
+              f"{estimate['profile']} ({estimate['method']}, {estimate['threads']} threads)")
+    written = write_config(config, path)
+    if written:
+        log_solver_profile(path, estimate, log_path)
+    return written
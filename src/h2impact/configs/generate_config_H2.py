@@ -1,60 +1,78 @@
-# src/h2impact/generate_config_H2.py
+# src/h2impact/configs/generate_config_H2.py
 
-import yaml
 import subprocess
-import os
+import sys
+from pathlib import Path
 
-TEMPLATE_PATH = "src/h2impact/config_H2.yaml"
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.configs.config_builder import (
+    YAML_DIR, apply_segments, build_config, config_filename, window_configs, write_scenario,
+)
+from src.h2impact.data.coarsen_cutout import exploratory_cutout
+from src.h2impact.data.cutout_catalog import catalog_entry
+from src.h2impact.data.time_segments import cutout_profiles, scenario_report
 
 def main():
     print("---- PyPSA-Eur H₂ Scenario Config Generator ----")
     cutout_name = input("Enter cutout name (e.g., de-2013-05): ").strip()
     cutout_path = input("Enter path to cutout NetCDF file: ").strip()
-    x_min = float(input("Longitude min (e.g., 4.0): "))
-    x_max = float(input("Longitude max (e.g., 15.0): "))
-    y_min = float(input("Latitude min (e.g., 46.0): "))
-    y_max = float(input("Latitude max (e.g., 56.0): "))
-    start_time = input("Start date (YYYY-MM-DD): ").strip()
-    end_time = input("End date (YYYY-MM-DD): ").strip()
-    country = input("Country code(s) (e.g., DE or 'DE,FR'): ").strip().split(",")
-    country = [c.strip() for c in country if c.strip()]
+    factor = input("Coarsening factor for a quick exploratory run (blank = native resolution): ").strip()
+    if factor:
+        # Point the scenario at a lighter, block-averaged copy of the cutout
+        cutout_path = str(exploratory_cutout(cutout_path, int(factor)))
+        cutout_name = f"{cutout_name}-coarse{factor}"
 
-    # Read the template YAML
-    with open(TEMPLATE_PATH, "r") as f:
-        config = yaml.safe_load(f)
+    # Defaults for extent and period come from the cutout catalog, if the file is readable
+    entry = catalog_entry(cutout_path) if Path(cutout_path).exists() else {"error": "missing"}
+    if "error" in entry:
+        north = west = south = east = start = end = None
+    else:
+        north, west, south, east = entry["bbox"]
+        start, end = entry["time"][0][:10], entry["time"][1][:10]
 
-    # Update countries and snapshots
-    if country:
-        config["countries"] = country
-    config["snapshots"] = {"start": start_time, "end": end_time}
+    def ask(prompt, default, cast=str):
+        value = input(f"{prompt} [{default}]: " if default is not None else f"{prompt}: ").strip()
+        return cast(value) if value or default is None else default
 
-    # Update the atlite section
-    config["atlite"] = {
-        "default_cutout": cutout_name,
-        "cutouts": {
-            cutout_name: {
-                "module": "era5",
-                "path": cutout_path,
-                "x": [x_min, x_max],
-                "y": [y_min, y_max],
-                "time": [start_time, end_time],
-                "variables": ["u10", "v10", "t2m", "si"],
-            }
-        }
-    }
-
-    # Always disable shipdensity raster
-    config["shipdensity"] = {"raster": {"activate": False}}
+    x_min = ask("Longitude min (e.g., 4.0)", west, float)
+    x_max = ask("Longitude max (e.g., 15.0)", east, float)
+    y_min = ask("Latitude min (e.g., 46.0)", south, float)
+    y_max = ask("Latitude max (e.g., 56.0)", north, float)
+    start_time = ask("Start date (YYYY-MM-DD)", start)
+    end_time = ask("End date (YYYY-MM-DD)", end)
+    country = input("Country code(s) (e.g., DE or 'DE,FR'): ").strip().split(",")
+    country = [c.strip() for c in country if c.strip()]
+    window = input("Split snapshots into parallel windows ('month', e.g. '4w', blank = no): ").strip()
+    segments = input("Time segments for a quick run (e.g., 100, blank = template resolution): ").strip()
 
-    # Ensure configs directory exists
-    configs_dir = "src/h2impact/configs"
-    os.makedirs(configs_dir, exist_ok=True)
+    # Fill the template: countries, snapshots, run name (e.g., de-2020-H2) and the atlite cutout
+    config = build_config("H2", country, (y_max, x_min, y_min, x_max), cutout_name, cutout_path,
+                          start_time, end_time, resolution=entry["resolution"] if factor else None,
+                          run_name=f"{cutout_name}-H2")
 
-    # Output file path
-    outfile = os.path.join(configs_dir, f"config_H2_{cutout_name}.yaml")
-    with open(outfile, "w") as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+    # Output file path(s), one per snapshot window
+    outfiles = []
+    profiles = cutout_profiles(cutout_path) if segments and "error" not in entry else None
+    if segments and profiles is None:
+        print(f"[WARN] {cutout_path}: {entry['error']}; no segmentation error report")
+    for label, part in window_configs(config, window):
+        if segments:
+            # Let PyPSA-Eur aggregate the (window's) snapshots into fewer variable-length segments
+            apply_segments(part, int(segments))
+        outfile = YAML_DIR / config_filename("H2", f"{cutout_name}-{label}" if label else cutout_name)
+        write_scenario(part, outfile)
+        if profiles is not None:
+            # Capacity-factor error of that segmentation, next to the config
+            scenario_report(profiles, part, outfile)
+        outfiles.append(outfile)
 
+    if window:
+        print(f"\nGenerated {len(outfiles)} window configs: {outfiles[0]} ... {outfiles[-1]}")
+        print("Run them in parallel with src/h2impact/configs/run_scenarios.py and stitch the results with "
+              "src/h2impact/postprocess/stitch_results.py")
+        return
     print(f"\nGenerated config file: {outfile}")
 
     run = input("Run Snakemake with this config now? [y/N]: ").strip().lower()
@@ -0,0 +1,195 @@
+"""
+Batch scenario generator: one config per country × year × variant from a matrix spec.
+
+Spec file (YAML):
+
+  countries: all                 # or a list; a nested list is one joint scenario
+  years: [2019, 2020]
+  variants: [H2, noH2]
+  cutout_dir: cutouts
+  cutout: "{code}-{year}-merged-year.nc"   # {code} is the lower-case ISO code
+  name: "{code}-{year}"                    # cutout and scenario name
+  output_dir: src/h2impact/configs/yaml_files
+  window: month                  # optional: one config per month or per N weeks ("4w")
+  segments: 100                  # optional: solve 100 time segments (PyPSA-Eur <N>seg) per config
+
+Time ranges come from the cutout catalog, so cutouts are only opened when
+they are new or changed; scenarios whose cutout does not exist yet get the
+full calendar year. File names are deterministic
+(``config_H2_<name>.yaml``/``config_no_H2_<name>.yaml``) and files whose
+content did not change are left untouched. With ``window``, each scenario
+is split into snapshot windows with one config each (``..._<name>-2020-01.yaml``),
+so the windows can be solved in parallel and stitched afterwards with
+``postprocess/stitch_results.py``. With ``segments``, every config (or
+window) is solved on that many variable-length time segments, which
+PyPSA-Eur aggregates from its snapshots (``resolution_elec: <N>seg``);
+the capacity-factor error of that segmentation on the scenario's cutout is
+written next to each config (``..._<name>.segments.json``).
+Every config gets a HiGHS profile and memory hint for its estimated size,
+logged to ``logs/solver_profiles.jsonl``.
+
+Usage:
+  python src/h2impact/configs/generate_config_batch.py matrix.yaml
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+import yaml
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.configs.config_builder import (
+    SOLVER_LOG, VARIANTS, YAML_DIR, apply_segments, build_config, config_filename, countries_area,
+    load_template, resolve_countries, split_snapshots, time_steps, window_configs, write_scenario,
+)
+from src.h2impact.data.cutout_catalog import CutoutCatalog
+from src.h2impact.data.time_segments import cutout_profiles, scenario_report
+
+DEFAULT_SPEC = {
+    "countries": "all",
+    "years": [],
+    "variants": list(VARIANTS),
+    "cutout_dir": "cutouts",
+    "cutout": "{code}-{year}-merged-year.nc",
+    "name": "{code}-{year}",
+    "output_dir": str(YAML_DIR),
+    "window": None,
+    "segments": None,
+}
+
+
+def load_spec(path):
+    with open(path, "r") as f:
+        spec = {**DEFAULT_SPEC, **(yaml.safe_load(f) or {})}
+    if not spec["years"]:
+        raise ValueError(f"{path}: 'years' must list at least one year.")
+    unknown = set(spec["variants"]) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"{path}: unknown variants {sorted(unknown)}, expected {VARIANTS}.")
+    return spec
+
+
+def check_segments(spec):
+    """
+    Raise ValueError unless ``segments`` reduces the time steps of every variant and window of the spec.
+
+    Checked once on the calendar years of the spec, before any config is
+    built, so a count that is too large fails with one message instead of
+    one warning per window.
+    """
+    segments = int(spec["segments"])
+    worst = None
+    for variant in spec["variants"]:
+        clustering = load_template(variant).get("clustering")
+        for year in spec["years"]:
+            start, end = f"{int(year)}-01-01", f"{int(year) + 1}-01-01"
+            windows = split_snapshots(start, end, spec["window"]) if spec["window"] else [("", start, end)]
+            for label, lo, hi in windows:
+                steps = time_steps({"snapshots": {"start": lo, "end": hi}, "clustering": clustering})
+                if worst is None or steps < worst[0]:
+                    worst = (steps, variant, label or str(year))
+    if worst and not 0 < segments < worst[0]:
+        steps, variant, label = worst
+        raise ValueError(f"segments: {segments} does not reduce the time steps of every config; the {variant} "
+                         f"template has only {steps} steps for {label}. Use fewer than {steps} segments.")
+
+
+def country_groups(countries):
+    """Scenario country groups: one per entry, nested lists stay together, ``all`` expands."""
+    if isinstance(countries, str):
+        countries = [countries]
+    groups = []
+    for entry in countries:
+        if isinstance(entry, (list, tuple)):
+            groups.append(resolve_countries(entry))
+        else:
+            groups.extend([c] for c in resolve_countries(entry))
+    return groups
+
+
+def expand_matrix(spec):
+    """Yield one ``(variant, countries, year)`` per scenario, in a stable order."""
+    for countries in country_groups(spec["countries"]):
+        for year in spec["years"]:
+            for variant in spec["variants"]:
+                yield variant, countries, int(year)
+
+
+def generate(spec):
+    """Write every config of the matrix; returns ``(written, unchanged)`` path lists."""
+    if spec["segments"]:
+        check_segments(spec)
+    catalog = CutoutCatalog(spec["cutout_dir"])
+    output_dir = Path(spec["output_dir"])
+    written, unchanged, periods, profiles = [], [], {}, {}
+
+    for variant, countries, year in expand_matrix(spec):
+        iso_codes, area = countries_area(countries)
+        code = "_".join(c.lower() for c in iso_codes)
+        cutout_path = Path(spec["cutout_dir"]) / spec["cutout"].format(code=code, year=year)
+        name = spec["name"].format(code=code, year=year)
+
+        if cutout_path not in periods:
+            entry = catalog.register(cutout_path, save=False) if cutout_path.exists() else {"error": "missing"}
+            if "error" in entry:
+                print(f"[WARN] {cutout_path}: {entry['error']}; using calendar year {year}")
+                periods[cutout_path] = (f"{year}-01-01", f"{year}-12-31")
+            else:
+                periods[cutout_path] = (entry["time"][0][:10], entry["time"][1][:10])
+            if spec["segments"]:
+                # Capacity-factor profiles for the segmentation error reports, read once per cutout
+                profiles[cutout_path] = cutout_profiles(cutout_path) if "error" not in entry else None
+        start, end = periods[cutout_path]
+
+        run_name = f"{name}-{variant}"
+        config = build_config(variant, iso_codes, area, name, cutout_path, start, end, run_name=run_name)
+        for label, part in window_configs(config, spec["window"]):
+            scenario = f"{name}-{label}" if label else name
+            if spec["segments"]:
+                try:
+                    apply_segments(part, int(spec["segments"]))
+                except ValueError as e:  # cutouts shorter than the calendar year checked up front
+                    raise ValueError(f"{scenario} {variant}: {e}") from e
+            outfile = output_dir / config_filename(variant, scenario)
+            (written if write_scenario(part, outfile, verbose=False) else unchanged).append(outfile)
+            if spec["segments"] and profiles[cutout_path] is not None:
+                scenario_report(profiles[cutout_path], part, outfile, verbose=False)
+
+    if catalog.directory.exists():
+        catalog.save()
+    return written, unchanged
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate every scenario config of a countries × years × variants matrix.")
+    parser.add_argument("spec", help="Matrix spec YAML (countries, years, variants, cutout naming)")
+    parser.add_argument("--output-dir", help="Override the spec's output_dir")
+    parser.add_argument("--window", help="Override the spec's snapshot window ('month' or e.g. '4w')")
+    parser.add_argument("--segments", type=int, help="Override the spec's number of time segments")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    spec = load_spec(args.spec)
+    if args.output_dir:
+        spec["output_dir"] = args.output_dir
+    if args.window:
+        spec["window"] = args.window
+    if args.segments:
+        spec["segments"] = args.segments
+
+    start = time.perf_counter()
+    try:
+        written, unchanged = generate(spec)
+    except ValueError as e:
+        sys.exit(f"❌ {args.spec}: {e}")
+    print(f"✅ {len(written) + len(unchanged)} configs in {spec['output_dir']} "
+          f"({len(written)} written, {len(unchanged)} unchanged) in {time.perf_counter() - start:.2f} s")
+    print(f"Size estimates and solver profiles of the written configs logged to {SOLVER_LOG}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
-import yaml
-import os
-import xarray as xr
 from pathlib import Path
 import sys
 
 # Ensure imports work when run from project root
-sys.path.append(str(Path(__file__).resolve().parents[2]))
+sys.path.append(str(Path(__file__).resolve().parents[3]))
 
-from src.h2impact.constants import PREDEFINED_AREAS, COUNTRY_CODES
-
-TEMPLATE_PATH = "src/h2impact/configs/config_no_H2_template.yaml"
+from src.h2impact.configs.config_builder import (
+    YAML_DIR, apply_segments, build_config, config_filename, countries_area, resolve_countries, window_configs,
+    write_scenario,
+)
+from src.h2impact.data.coarsen_cutout import exploratory_cutout
+from src.h2impact.data.cutout_catalog import catalog_entry
+from src.h2impact.data.time_segments import cutout_profiles, scenario_report
 
 def main():
     print("---- PyPSA-Eur Scenario Config Generator ----")
@@ -17,80 +18,43 @@ def main():
     # Step 1: Inputs
     cutout_name = input("Enter cutout name (e.g., de-2020): ").strip()
     cutout_path = input("Enter path to cutout NetCDF file (e.g., cutouts/de-2020-merged.nc): ").strip()
-    countries = input("Country name(s) (e.g., germany or 'germany,france'): ").strip().lower().split(",")
-    countries = [c.strip() for c in countries if c.strip()]
-
-    iso_codes = []
-    bounds = []
-
-    for country in countries:
-        if country not in PREDEFINED_AREAS or country not in COUNTRY_CODES:
-            raise ValueError(f"Country '{country}' not recognized.")
-        bounds.append(PREDEFINED_AREAS[country])
-        iso_codes.append(COUNTRY_CODES[country])
-
-    # Use bounding box from the first country
-    y_max, x_min, y_min, x_max = bounds[0]
-
-    # Step 2: Read time info from the NetCDF cutout
-    try:
-        ds = xr.open_dataset(cutout_path)
-        try:
-            time_coord = ds["time"]
-        except KeyError:
-            try:
-                time_coord = ds["valid_time"]
-            except KeyError:
-                raise RuntimeError("No 'time' or 'valid_time' coordinate found in NetCDF file.")
-
-        start_time = str(time_coord.values[0])[:10]
-        end_time   = str(time_coord.values[-1])[:10]
-
-        ds.close()
-    except Exception as e:
-        raise RuntimeError(f"Could not read time range from NetCDF: {e}")
-
-    # Step 3: Load template config
-    with open(TEMPLATE_PATH, "r") as f:
-        config = yaml.safe_load(f)
-
-    # Step 4: Update values
-    config["countries"] = iso_codes
-    config["snapshots"] = {"start": start_time, "end": end_time}
-    
-    # Build run.name and run.shared_resources dynamically (e.g., de-2020-noH2)
+    factor = input("Coarsening factor for a quick exploratory run (blank = native resolution): ").strip()
+    if factor:
+        # Point the scenario at a lighter, block-averaged copy of the cutout
+        cutout_path = str(exploratory_cutout(cutout_path, int(factor)))
+        cutout_name = f"{cutout_name}-coarse{factor}"
+    countries = input("Country name(s) (e.g., germany or 'germany,france'): ").strip().split(",")
+    countries = resolve_countries([c for c in countries if c.strip()])
+    window = input("Split snapshots into parallel windows ('month', e.g. '4w', blank = no): ").strip()
+    segments = input("Time segments for a quick run (e.g., 100, blank = template resolution): ").strip()
+
+    # Use the bounding box covering all selected countries
+    iso_codes, area = countries_area(countries)
+
+    # Step 2: Read time info from the cutout catalog (only reopens new or changed cutouts)
+    entry = catalog_entry(cutout_path)
+    if "error" in entry:
+        raise RuntimeError(f"Could not read time range from NetCDF: {entry['error']}")
+    start_time = entry["time"][0][:10]
+    end_time   = entry["time"][1][:10]
+
+    # Step 3: Fill the template; run.name e.g. de-2020-noH2, shared resources from the config fingerprint
     run_suffix = f"{iso_codes[0].lower()}-{start_time[:4]}-noH2"
-    config["run"]["name"] = run_suffix
-    config["run"]["shared_resources"] = run_suffix
-
-    # Atlite cutout definition
-    config["atlite"] = {
-        "default_cutout": cutout_name,
-        "cutouts": {
-            cutout_name: {
-                "module": "era5",
-                "path": cutout_path,
-                "x": [x_min, x_max],
-                "y": [y_min, y_max],
-                "time": [start_time, end_time],
-                "variables": ["u10", "v10", "t2m", "si"],
-            }
-        }
-    }
-
-    # Shipdensity disabled
-    config["shipdensity"] = {"raster": {"activate": False}}
-
-
-    # Step 5: Save to yaml_files folder
-    yaml_dir = Path("src/h2impact/configs/yaml_files")
-    yaml_dir.mkdir(parents=True, exist_ok=True)
-    outfile = yaml_dir / f"config_no_H2_{cutout_name}.yaml"
-
-    with open(outfile, "w") as f:
-        yaml.dump(config, f, default_flow_style=False, sort_keys=False)
-
-    print(f"\n Config file generated at: {outfile.resolve()}")
+    config = build_config("noH2", iso_codes, area, cutout_name, cutout_path, start_time, end_time,
+                          resolution=entry["resolution"] if factor else None, run_name=run_suffix)
+
+    # Step 4: Save to yaml_files folder, one file per snapshot window
+    profiles = cutout_profiles(cutout_path) if segments else None
+    for label, part in window_configs(config, window):
+        if segments:
+            # Let PyPSA-Eur aggregate the (window's) snapshots into fewer variable-length segments
+            apply_segments(part, int(segments))
+        outfile = YAML_DIR / config_filename("noH2", f"{cutout_name}-{label}" if label else cutout_name)
+        write_scenario(part, outfile)
+        if profiles is not None:
+            # Capacity-factor error of that segmentation, next to the config
+            scenario_report(profiles, part, outfile)
+        print(f"\n Config file generated at: {outfile.resolve()}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,211 @@
+"""
+Run many scenario configs concurrently under global CPU and memory budgets.
+
+Each scenario's cost is the LP size estimated from its config (see
+``config_builder.estimate_problem_size``); its memory is ``solving.mem_mb``
+as written by the generators, or the estimate. Each scenario gets as many
+cores as its HiGHS profile uses threads, unless ``--cores-per-run`` is
+given. Scenarios start
+cheapest first; whenever one finishes, the cheapest waiting scenario that
+fits the free CPUs and memory is started, so small runs are never stuck
+behind large ones. A scenario larger than the budgets runs alone.
+
+Wall time, exit status, log file and solver profile of every scenario are
+written to a JSON report after each change, so the chosen profiles can be
+checked against actual solve times. The command is a template, so a stub can
+stand in for Snakemake:
+
+  python src/h2impact/configs/run_scenarios.py src/h2impact/configs/yaml_files/*.yaml \
+    --cpus 16 --memory-gb 64 --cores-per-run 4
+  python src/h2impact/configs/run_scenarios.py configs/*.yaml --workdir . \
+    --command "python -c 'import time; time.sleep(2)' {config}"
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+import yaml
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.configs.config_builder import estimate_problem_size
+
+DEFAULT_COMMAND = "snakemake -j{cores} --resources mem_mb={mem_mb} --configfile {config}"
+WORKDIR = "external/pypsa-eur"
+LOG_DIR = "logs/scenarios"
+REPORT = "logs/scenarios/report.json"
+POLL_S = 0.5
+
+
+def _total_memory_mb():
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024 ** 2
+    except (ValueError, OSError, AttributeError):  # not available on Windows
+        return 16 * 1024
+
+
+def estimate_cost(config):
+    """
+    Relative cost, memory and cores of one scenario config.
+
+    Returns ``{"cost", "mem_mb", "threads", "profile"}``; cost is the estimated number of LP variables.
+    """
+    estimate = estimate_problem_size(config)
+    solver = config.get("solving", {}).get("solver", {})
+    options = config.get("solving", {}).get("solver_options", {}).get(solver.get("options"), {})
+    return {
+        "cost": estimate["variables"],
+        "mem_mb": int(config.get("solving", {}).get("mem_mb") or estimate["mem_mb"]),
+        "threads": int(options.get("threads", 1)),
+        "profile": solver.get("options"),
+    }
+
+
+def plan(configs, cores_per_run=None, memory_mb_per_run=None):
+    """One job dict per config, cheapest first."""
+    jobs = []
+    for path in configs:
+        with open(path, "r") as f:
+            config = yaml.safe_load(f) or {}
+        estimate = estimate_cost(config)
+        jobs.append({
+            "name": Path(path).stem,
+            "config": str(Path(path).resolve()),
+            "cpus": cores_per_run or estimate["threads"],
+            "mem_mb": int(memory_mb_per_run or estimate["mem_mb"]),
+            "cost": estimate["cost"],
+            "profile": estimate["profile"],
+            "status": "pending",
+        })
+    return sorted(jobs, key=lambda j: (j["cost"], j["name"]))
+
+
+def _save_report(jobs, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump([{k: v for k, v in job.items() if not k.startswith("_")} for job in jobs], f, indent=2)
+    os.replace(tmp, path)
+
+
+def run_all(jobs, cpus, memory_mb, command=DEFAULT_COMMAND, workdir=WORKDIR, log_dir=LOG_DIR, report=REPORT):
+    """
+    Run ``jobs`` under the CPU and memory budgets; returns the jobs with results.
+
+    Every job gets ``start``/``end`` timestamps, ``wall_s``, ``exit_code``,
+    ``status`` (``done`` or ``failed``) and its ``log`` file; a job whose
+    command cannot be started fails with an ``error`` message.
+    """
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    running = {}  # job index -> (Popen, log handle, start time)
+    free_cpus, free_mem = cpus, memory_mb
+    pending = list(range(len(jobs)))
+
+    def fits(job):
+        # Oversized jobs run alone instead of never
+        return (job["cpus"] <= free_cpus and job["mem_mb"] <= free_mem) or not running
+
+    try:
+        while pending or running:
+            for i in list(pending):
+                job = jobs[i]
+                if not fits(job):
+                    continue
+                cmd = command.format(config=shlex.quote(job["config"]), cores=job["cpus"],
+                                     mem_mb=job["mem_mb"], name=job["name"])
+                job["log"] = str(log_dir / f"{job['name']}.log")
+                job.update(command=cmd, start=time.strftime("%Y-%m-%dT%H:%M:%S"))
+                pending.remove(i)
+                log = open(job["log"], "w")
+                try:
+                    proc = subprocess.Popen(shlex.split(cmd), cwd=workdir, stdout=log, stderr=subprocess.STDOUT)
+                except (OSError, ValueError) as e:
+                    # e.g. command not found or unbalanced quotes: record the job as failed and go on
+                    log.write(f"Could not start {cmd}: {e}\n")
+                    log.close()
+                    job.update(status="failed", exit_code=None, error=str(e),
+                               end=time.strftime("%Y-%m-%dT%H:%M:%S"), wall_s=0.0)
+                    print(f"❌ {job['name']} could not be started: {e}")
+                    _save_report(jobs, report)
+                    continue
+                job["status"] = "running"
+                running[i] = (proc, log, time.perf_counter())
+                free_cpus -= job["cpus"]
+                free_mem -= job["mem_mb"]
+                print(f"▶ {job['name']} (cost {job['cost']:,}, {job['cpus']} CPUs, {job['mem_mb']:,} MB)")
+                _save_report(jobs, report)
+
+            time.sleep(POLL_S)
+            for i, (proc, log, t0) in list(running.items()):
+                code = proc.poll()
+                if code is None:
+                    continue
+                log.close()
+                job = jobs[i]
+                job.update(
+                    status="done" if code == 0 else "failed",
+                    exit_code=code,
+                    end=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    wall_s=round(time.perf_counter() - t0, 1),
+                )
+                del running[i]
+                free_cpus += job["cpus"]
+                free_mem += job["mem_mb"]
+                mark = "✅" if code == 0 else "❌"
+                print(f"{mark} {job['name']} exited with {code} after {job['wall_s']:,.1f} s")
+                _save_report(jobs, report)
+    except KeyboardInterrupt:
+        for i, (proc, log, t0) in running.items():
+            proc.terminate()
+            proc.wait()
+            log.close()
+            jobs[i].update(status="interrupted", exit_code=proc.returncode)
+        _save_report(jobs, report)
+        raise
+    return jobs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run scenario configs concurrently under CPU and memory budgets.")
+    parser.add_argument("configs", nargs="+", help="Scenario config YAML files")
+    parser.add_argument("--cpus", type=int, default=os.cpu_count(), help="Total CPUs to use (default: all)")
+    parser.add_argument("--memory-gb", type=float, default=_total_memory_mb() / 1024 * 0.8,
+                        help="Total memory budget in GB (default: 80%% of RAM)")
+    parser.add_argument("--cores-per-run", type=int,
+                        help="Snakemake cores per scenario (default: threads of its solver profile)")
+    parser.add_argument("--memory-mb-per-run", type=float,
+                        help="Memory per scenario in MB (default: estimated from each config)")
+    parser.add_argument("--command", default=DEFAULT_COMMAND,
+                        help="Command template with {config}, {cores}, {mem_mb} and {name} (default: snakemake)")
+    parser.add_argument("--workdir", default=WORKDIR, help=f"Working directory of the command (default: {WORKDIR})")
+    parser.add_argument("--log-dir", default=LOG_DIR, help=f"Per-scenario logs (default: {LOG_DIR})")
+    parser.add_argument("--report", default=REPORT, help=f"JSON report of all runs (default: {REPORT})")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    jobs = plan(args.configs, args.cores_per_run, args.memory_mb_per_run)
+    print(f"{len(jobs)} scenarios, {args.cpus} CPUs, {args.memory_gb:,.1f} GB")
+    if args.dry_run:
+        for job in jobs:
+            print(f"  {job['name']:<40} cost {job['cost']:>12,}  {job['mem_mb']:>8,} MB  "
+                  f"{job['cpus']} CPUs  {job['profile'] or 'default'}")
+        return
+
+    jobs = run_all(jobs, args.cpus, args.memory_gb * 1024, args.command, args.workdir, args.log_dir, args.report)
+    failed = [j["name"] for j in jobs if j["status"] != "done"]
+    print(f"{len(jobs) - len(failed)} of {len(jobs)} scenarios succeeded; report: {args.report}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
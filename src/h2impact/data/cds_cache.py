@@ -0,0 +1,206 @@
+"""
+Local content-addressed cache for CDS requests.
+
+Each download is stored under the SHA-256 of its canonical request
+(dataset, variables, area, year, month, days, times), so the same request
+issued from another directory, node or user is served from disk instead
+of the CDS queue. The cache has an LRU size cap, and its directory can be
+shared between users (files are group-writable, updates are serialised
+with a lock file). On a hit, the cached file is cloned into the target
+path (a copy-on-write reflink on filesystems that support it, a plain
+copy elsewhere). Targets are never hard-linked, because cutouts are
+written in place later (appends, ``write_time_slice``). That would
+silently change the cached object, so cached objects are also stored
+read-only.
+
+The cache plugs into the download queue as a cdsapi-style client:
+
+  cache = CDSCache("/shared/era5-cache", max_gb=200)
+  run_queue(jobs, client_factory=caching_client_factory(cache))
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = os.environ.get("H2IMPACT_CDS_CACHE", str(Path.home() / ".cache" / "h2impact" / "cds"))
+DEFAULT_MAX_GB = 50.0
+
+# Request fields whose order carries meaning and must not be sorted
+ORDERED_FIELDS = ("area", "grid")
+# Linux ioctl sharing a file's extents copy-on-write (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+def _canonical_time(value):
+    """'7', '07' and '07:00' all mean the same CDS hour."""
+    value = str(value).strip()
+    return value if ":" in value else f"{int(value):02d}:00"
+
+
+def canonical_request(request):
+    """Normalised copy of a CDS request dict with order-independent lists sorted."""
+    canonical = {}
+    for key, value in request.items():
+        if isinstance(value, (list, tuple)):
+            if key == "time":
+                value = [_canonical_time(v) for v in value]
+            elif key in ("day", "month"):
+                value = [f"{int(v):02d}" for v in value]
+            else:
+                value = [str(v) if key not in ORDERED_FIELDS else float(v) for v in value]
+            if key not in ORDERED_FIELDS:
+                value = sorted(set(value))
+        elif key in ("day", "month"):
+            value = f"{int(value):02d}"
+        else:
+            value = str(value)
+        canonical[key] = value
+    return canonical
+
+
+def request_key(dataset, request):
+    """SHA-256 hex digest identifying a CDS request."""
+    payload = json.dumps({"dataset": dataset, "request": canonical_request(request)},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _clone_or_copy(src, dst):
+    """Place a private, writable copy of ``src`` at ``dst``: a reflink where possible, else a full copy."""
+    dst = Path(dst)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        import fcntl
+        with open(src, "rb") as s, open(tmp, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, tmp)
+    except (ImportError, OSError):  # no reflinks on this platform or filesystem
+        shutil.copy2(src, tmp)
+    os.chmod(tmp, 0o664)
+    os.replace(tmp, dst)
+
+
+class CDSCache:
+    """Content-addressed store of CDS downloads with an LRU size cap."""
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_gb=DEFAULT_MAX_GB):
+        self.root = Path(root)
+        self.max_bytes = int(max_gb * 1024 ** 3)
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self._chmod(self.root, 0o2775)
+        self.index_path = self.root / "index.json"
+
+    @staticmethod
+    def _chmod(path, mode):
+        try:
+            os.chmod(path, mode)
+        except OSError:  # owned by another user of a shared cache
+            pass
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive lock on the cache index, shared across processes and users."""
+        lock_path = self.root / ".lock"
+        with open(lock_path, "a") as lock:
+            self._chmod(lock_path, 0o664)
+            try:
+                import fcntl
+            except ImportError:  # Windows: no cross-process locking
+                yield
+                return
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load_index(self):
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _save_index(self, index):
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        self._chmod(tmp, 0o664)
+        os.replace(tmp, self.index_path)
+
+    def object_path(self, key):
+        return self.root / "objects" / key[:2] / key
+
+    def get(self, key, target):
+        """Place the cached file for ``key`` at ``target``; False on a miss."""
+        with self._locked():
+            index = self._load_index()
+            obj = self.object_path(key)
+            if key not in index or not obj.exists():
+                return False
+            _clone_or_copy(obj, target)
+            index[key]["last_used"] = time.time()
+            self._save_index(index)
+        return True
+
+    def put(self, key, src, dataset=None, request=None):
+        """Store ``src`` under ``key`` and evict least recently used entries over the cap."""
+        obj = self.object_path(key)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        self._chmod(obj.parent, 0o2775)
+        tmp = obj.with_suffix(f".{os.getpid()}.tmp")
+        shutil.copy2(src, tmp)
+        self._chmod(tmp, 0o444)
+        with self._locked():
+            os.replace(tmp, obj)
+            index = self._load_index()
+            index[key] = {
+                "size": obj.stat().st_size,
+                "last_used": time.time(),
+                "dataset": dataset,
+                "request": request,
+            }
+            self._evict(index, keep=key)
+            self._save_index(index)
+
+    def _evict(self, index, keep=None):
+        total = sum(entry["size"] for entry in index.values())
+        for key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index.pop(key)["size"]
+            with contextlib.suppress(FileNotFoundError):
+                self.object_path(key).unlink()
+            print(f"Evicted cached CDS request {key[:12]} from {self.root}")
+
+
+class CachingClient:
+    """cdsapi-style client that serves repeated requests from a ``CDSCache``."""
+
+    def __init__(self, cache, inner_factory):
+        self.cache = cache
+        self._inner_factory = inner_factory
+        self._inner = None
+
+    def retrieve(self, name, request, target):
+        key = request_key(name, request)
+        if self.cache.get(key, target):
+            print(f"Cache hit ({key[:12]}): {target}")
+            return
+        if self._inner is None:
+            self._inner = self._inner_factory()
+        self._inner.retrieve(name, request, target)
+        self.cache.put(key, target, name, request)
+
+
+def caching_client_factory(cache, inner_factory=None):
+    """Client factory for ``run_queue`` that wraps each worker's client with ``cache``."""
+    if inner_factory is None:
+        from src.h2impact.data.download_queue import cdsapi_client_factory
+        inner_factory = cdsapi_client_factory
+    return lambda: CachingClient(cache, inner_factory)
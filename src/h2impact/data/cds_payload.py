@@ -0,0 +1,128 @@
+"""
+Extract and merge CDS download payloads without temporary files.
+
+New CDS downloads are zip archives holding an instant and an accum
+NetCDF file; older ones are a single NetCDF file. The zip members are read
+straight from the archive into memory (or, above ``max_memory_mb``, into
+a spooled buffer) and merged, renamed and tagged ``module='era5'`` in one
+step, so every month is written to disk exactly once.
+
+Usage:
+  python -m src.h2impact.data.cds_payload --code DE --year 2020 --dir cutouts
+"""
+import argparse
+import re
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import xarray as xr
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import FORMATS, merge_instant_accum, output_path, write_cutout
+from src.h2impact.data.encoding_profiles import PROFILES
+
+INSTANT_MEMBER = "data_stream-oper_stepType-instant.nc"
+ACCUM_MEMBER = "data_stream-oper_stepType-accum.nc"
+
+MAX_MEMORY_MB = 1024
+
+
+@contextmanager
+def _open_member(zf, name, max_memory_mb=MAX_MEMORY_MB):
+    """
+    Open one NetCDF member of an open zip archive without extracting it.
+
+    A spooled buffer is closed together with the dataset, so a member that
+    rolled over to a temporary file does not leave it on disk.
+    """
+    size_mb = zf.getinfo(name).file_size / 1024 ** 2
+    if size_mb > max_memory_mb:
+        try:
+            import h5netcdf, h5py  # noqa: F401  (file-like objects need the h5netcdf engine)
+        except ImportError:
+            print(f"[WARN] h5netcdf/h5py not installed, reading {name} ({size_mb:,.0f} MB) into memory")
+        else:
+            with tempfile.SpooledTemporaryFile(max_size=int(max_memory_mb * 1024 ** 2)) as buf:
+                with zf.open(name) as src:
+                    shutil.copyfileobj(src, buf)
+                buf.seek(0)
+                with xr.open_dataset(buf, engine="h5netcdf") as ds:
+                    yield ds
+            return
+
+    import netCDF4
+
+    nc = netCDF4.Dataset(name, memory=zf.read(name))
+    with xr.open_dataset(xr.backends.NetCDF4DataStore(nc)) as ds:
+        yield ds
+
+
+def open_payload(path, max_memory_mb=MAX_MEMORY_MB):
+    """Return the payload at ``path`` merged, renamed and loaded into memory."""
+    if not zipfile.is_zipfile(path):
+        with xr.open_dataset(path, engine="netcdf4") as ds:
+            return merge_instant_accum(ds, xr.Dataset()).load()
+
+    with zipfile.ZipFile(path) as zf, \
+         _open_member(zf, INSTANT_MEMBER, max_memory_mb) as ds_inst, \
+         _open_member(zf, ACCUM_MEMBER, max_memory_mb) as ds_accu:
+        return merge_instant_accum(ds_inst, ds_accu).load()
+
+
+def extract_month(payload, out, fmt="netcdf", profile="default", max_memory_mb=MAX_MEMORY_MB):
+    """Write one downloaded month as a merged cutout and return its path."""
+    ds = open_payload(payload, max_memory_mb)
+    out = write_cutout(ds, out, fmt, profile=profile)
+    print(f"✅ {Path(payload).name} → {out.name}")
+    return out
+
+
+def find_payloads(code, year, cutout_dir="cutouts"):
+    """Downloaded ``<CODE>_<YEAR>_<MM>.nc`` payloads, keyed by month."""
+    pattern = re.compile(rf"{re.escape(code)}_{year}_(\d{{2}})\.nc$")
+    payloads = {}
+    for f in sorted(Path(cutout_dir).glob(f"{code}_{year}_*.nc")):
+        match = pattern.match(f.name)
+        if match:
+            payloads[int(match.group(1))] = f
+    return payloads
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Extract CDS zip payloads in memory and write merged monthly cutouts."
+    )
+    parser.add_argument("--code", required=True, help="Country code used in the file names (e.g., DE)")
+    parser.add_argument("--year", type=int, required=True, help="Year (e.g., 2020)")
+    parser.add_argument("--dir", default="cutouts", help="Folder with the downloads (default: cutouts)")
+    parser.add_argument("--workers", type=int, default=4, help="Months processed in parallel (default: 4)")
+    parser.add_argument("--max-memory-mb", type=float, default=MAX_MEMORY_MB,
+                        help=f"Larger zip members are spooled instead of held in memory (default: {MAX_MEMORY_MB})")
+    parser.add_argument("--format", choices=FORMATS, default="netcdf", help="Output format (default: netcdf)")
+    parser.add_argument("--encoding", choices=PROFILES, default="default",
+                        help="Encoding profile, e.g. lossless-zlib or packed-int16 (default: default)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    payloads = find_payloads(args.code, args.year, args.dir)
+    if not payloads:
+        print(f"No {args.code}_{args.year}_<MM>.nc downloads found in {args.dir}.")
+        return
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [
+            pool.submit(extract_month, payload,
+                        output_path(Path(args.dir) / f"{args.code}_{args.year}_{m:02d}_merged.nc", args.format),
+                        args.format, args.encoding, args.max_memory_mb)
+            for m, payload in payloads.items()
+        ]
+        outputs = [f.result() for f in futures]
+    register_cutouts(outputs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Coarsen a merged cutout by an integer lat/lon factor for fast exploratory runs.
+
+Blocks of ``factor`` × ``factor`` grid cells are aggregated into one cell:
+instant fields (wind, temperature, ...) are averaged; accumulated per-area
+fields (``ssrd``/``si``, in J m**-2) are summed as energy over the block
+and divided by the block area, i.e. averaged with cos(latitude) weights,
+so the total energy over the region is preserved. Trailing rows/columns
+that do not fill a whole block are dropped.
+
+The cutout is processed lazily in time chunks sized to ``max_memory_mb``.
+
+Usage:
+  python -m src.h2impact.data.coarsen_cutout cutouts/de-2020-merged-year.nc --factor 4
+"""
+import argparse
+import numpy as np
+import xarray as xr
+from pathlib import Path
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import (
+    FORMATS, is_zarr, open_cutout, output_path, size_on_disk, spatial_dims, time_chunk_for_budget, time_dim,
+    write_cutout,
+)
+from src.h2impact.data.encoding_profiles import PROFILES
+
+ACCUMULATED_VARS = ("ssrd", "si", "ssr", "tp", "fdir")
+
+
+def coarse_path(path, factor):
+    """Default name of the coarsened cutout, e.g. ``de-2020-merged-year-coarse4.nc``."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}-coarse{factor}{path.suffix}")
+
+
+def coarsen(ds, factor, accumulated=ACCUMULATED_VARS):
+    """Lazily coarsen ``ds`` by ``factor`` in latitude and longitude."""
+    lat, lon = spatial_dims(ds)
+    if factor < 1 or factor > min(ds.sizes[lat], ds.sizes[lon]):
+        raise ValueError(f"Coarsening factor must be between 1 and the grid size, got {factor}.")
+    window = {lat: factor, lon: factor}
+
+    weights = np.cos(np.deg2rad(ds[lat])).astype("float32")
+    # Every column of a block carries the same latitude weights
+    n_rows = ds.sizes[lat] // factor * factor
+    block_area = weights.values[:n_rows].reshape(-1, factor).sum(axis=1) * factor
+    block_area = xr.DataArray(block_area, dims=[lat])
+
+    coarse = ds.coarsen(window, boundary="trim", coord_func="mean")
+    out = coarse.mean(keep_attrs=True)
+    for name in accumulated:
+        if name not in ds.data_vars:
+            continue
+        var = ds[name]
+        energy = (var * weights).coarsen(window, boundary="trim", coord_func="mean").sum()
+        out[name] = (energy / block_area).astype(var.dtype).assign_attrs(var.attrs)
+    for name in out.data_vars:
+        out[name].encoding = {}
+    out.attrs = {**ds.attrs, "coarsen_factor": factor}
+    return out
+
+
+def coarsen_cutout(path, factor, out=None, fmt=None, max_memory_mb=512, profile="default"):
+    """
+    Write a coarsened copy of the cutout at ``path`` and return a size report.
+
+    The report holds the input/output paths, grid shapes and sizes on disk.
+    """
+    fmt = fmt or ("zarr" if is_zarr(path) else "netcdf")
+    out = output_path(out or coarse_path(path, factor), fmt)
+    with open_cutout(path) as probe:
+        tdim = time_dim(probe)
+        chunk = time_chunk_for_budget(probe, max_memory_mb)
+
+    with open_cutout(path, chunks={} if is_zarr(path) else {tdim: chunk}) as ds:
+        lat, lon = spatial_dims(ds)
+        coarse = coarsen(ds, factor)
+        dropped = (ds.sizes[lat] % factor, ds.sizes[lon] % factor)
+        if any(dropped):
+            print(f"[WARN] Dropping {dropped[0]} trailing latitude and {dropped[1]} longitude rows "
+                  f"that do not fill a {factor}×{factor} block")
+        write_cutout(coarse, out, fmt, max_memory_mb, profile)
+        report = {
+            "input": str(path),
+            "output": str(out),
+            "factor": factor,
+            "grid_in": [ds.sizes[lat], ds.sizes[lon]],
+            "grid_out": [coarse.sizes[lat], coarse.sizes[lon]],
+        }
+
+    report["size_in_mb"] = round(size_on_disk(path) / 1024 ** 2, 2)
+    report["size_out_mb"] = round(size_on_disk(out) / 1024 ** 2, 2)
+    report["reduction"] = round(report["size_in_mb"] / max(report["size_out_mb"], 1e-9), 1)
+    return report
+
+
+def exploratory_cutout(path, factor, max_memory_mb=512):
+    """
+    Path of the ``factor``-coarsened copy of ``path``, created on first use.
+
+    The copy is rebuilt when the source changed after it was written.
+    """
+    path = Path(path)
+    out = output_path(coarse_path(path, factor), "zarr" if is_zarr(path) else "netcdf")
+    if not out.exists() or out.stat().st_mtime < path.stat().st_mtime:
+        report = coarsen_cutout(path, factor, out, max_memory_mb=max_memory_mb)
+        register_cutouts([out])
+        print(f"Coarsened {path} by {factor} ({report['reduction']:g}× smaller) → {out}")
+    return out
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Coarsen a cutout's lat/lon grid by an integer factor.")
+    parser.add_argument("cutout", help="Merged cutout (.nc or .zarr)")
+    parser.add_argument("--factor", type=int, required=True, help="Grid cells per block along lat and lon (e.g., 4)")
+    parser.add_argument("-o", "--output", help="Output cutout (default: <name>-coarse<factor>.nc)")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: same as the input)")
+    parser.add_argument("--encoding", choices=PROFILES, default="default", help="Encoding profile (default: default)")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling per time chunk (default: 512)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = coarsen_cutout(args.cutout, args.factor, args.output, args.format, args.max_memory_mb, args.encoding)
+    register_cutouts([report["output"]])
+    print(f"✅ {report['grid_in'][0]}×{report['grid_in'][1]} → {report['grid_out'][0]}×{report['grid_out'][1]} cells, "
+          f"{report['size_in_mb']:,.1f} MB → {report['size_out_mb']:,.1f} MB "
+          f"({report['reduction']:g}× smaller): {report['output']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Crop one large (e.g. European) cutout into per-country cutouts in a single pass.
+
+Each time block of the union of the requested bounding boxes is read from
+the source once; the per-country sub-blocks are then written in parallel,
+one process per output. This replaces repeated, heavily overlapping CDS
+downloads for neighbouring countries.
+
+Usage:
+  python -m src.h2impact.data.crop_cutout cutouts/europe-2020.nc \
+    --regions germany netherlands belgium denmark --out-dir cutouts
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from src.h2impact.constants import PREDEFINED_AREAS, COUNTRY_CODES
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import (
+    FORMATS, append_cutout, bbox_slice, open_cutout, output_path, time_chunk_for_budget, time_dim,
+    union_area,
+)
+
+NAME_FORMAT = "{code}_{stem}.nc"
+
+
+def crop_regions(source, regions, out_dir=".", fmt="netcdf", max_memory_mb=512, workers=None,
+                 name_format=NAME_FORMAT):
+    """
+    Write one sub-cutout per region from ``source`` and return their paths.
+
+    The source is read once, in time blocks of the union bounding box sized
+    to ``max_memory_mb``.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(source).stem
+    outputs = {
+        r: output_path(out_dir / name_format.format(code=COUNTRY_CODES[r], region=r, stem=stem), fmt)
+        for r in regions
+    }
+
+    with open_cutout(source) as ds:
+        ds = ds.sel(bbox_slice(ds, union_area(PREDEFINED_AREAS[r] for r in regions)))
+        for r in regions:
+            sub = ds.sel(bbox_slice(ds, PREDEFINED_AREAS[r]))
+            if 0 in sub.sizes.values():
+                raise ValueError(f"Region '{r}' is not covered by {source}.")
+
+        tdim = time_dim(ds)
+        n_times = ds.sizes[tdim]
+        block = time_chunk_for_budget(ds, max_memory_mb)
+        print(f"Cropping {len(regions)} regions from {source} in blocks of {block} time steps")
+
+        with ProcessPoolExecutor(max_workers=workers or len(regions)) as pool:
+            for start in range(0, n_times, block):
+                data = ds.isel({tdim: slice(start, start + block)}).load()
+                futures = [
+                    pool.submit(append_cutout, data.sel(bbox_slice(data, PREDEFINED_AREAS[r])),
+                                outputs[r], fmt, start == 0)
+                    for r in regions
+                ]
+                for f in futures:
+                    f.result()
+                print(f"  {min(start + block, n_times)}/{n_times} time steps written")
+
+    register_cutouts(outputs.values())
+    for r, out in outputs.items():
+        print(f"✅ {r}: {out}")
+    return outputs
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crop a large cutout into per-country cutouts in one pass.")
+    parser.add_argument("source", help="Source cutout (.nc or .zarr) covering all regions")
+    parser.add_argument("--regions", type=str.lower, nargs="+", choices=PREDEFINED_AREAS.keys(), required=True,
+                        help="Country/region names to crop (e.g., germany netherlands)")
+    parser.add_argument("--out-dir", default="cutouts", help="Output folder (default: cutouts)")
+    parser.add_argument("--format", choices=FORMATS, default="netcdf", help="Output format (default: netcdf)")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling for one time block of the union area (default: 512)")
+    parser.add_argument("--workers", type=int, help="Writer processes (default: one per region)")
+    parser.add_argument("--name-format", default=NAME_FORMAT,
+                        help=f"Output name pattern with code, region and stem (default: {NAME_FORMAT})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    crop_regions(args.source, args.regions, args.out_dir, args.format, args.max_memory_mb,
+                 args.workers, args.name_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Persistent catalog of the cutouts in a folder.
+
+For every NetCDF file or Zarr store the catalog records the bounding box,
+time range, variables, grid resolution, size and modification time in a
+small JSON index (``cutout_catalog.json`` in the same folder). Entries are
+refreshed incrementally: a cutout is only reopened when its size or
+modification time changed. Config generators and merge tools read time
+ranges and coverage from the catalog instead of reopening the files.
+
+SHA-256 checksums read the whole cutout, so they are opt-in (``--checksum``)
+or computed on demand with ``CutoutCatalog.checksum``; a stored checksum
+is kept as long as size and modification time are unchanged. Writes are
+serialised with a lock file and merged with the catalog on disk, so
+parallel download and merge tools do not lose each other's entries.
+
+Usage:
+  python -m src.h2impact.data.cutout_catalog cutouts
+  python -m src.h2impact.data.cutout_catalog cutouts --region germany --start 2020-01-01 --end 2020-12-31
+"""
+import argparse
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes stay atomic
+    fcntl = None
+from src.h2impact.constants import PREDEFINED_AREAS
+from src.h2impact.data.cutout_io import is_zarr, open_cutout, spatial_dims, time_dim
+
+CATALOG_NAME = "cutout_catalog.json"
+CUTOUT_PATTERNS = ("*.nc", "*.zarr")
+
+
+def _files(path):
+    path = Path(path)
+    return sorted(f for f in path.rglob("*") if f.is_file()) if path.is_dir() else [path]
+
+
+def _stat(path):
+    """Total size and latest modification time of a file or Zarr store."""
+    files = _files(path)
+    return sum(f.stat().st_size for f in files), max((f.stat().st_mtime for f in files), default=0.0)
+
+
+def checksum(path, block_mb=8):
+    """SHA-256 of a file, or of the relative names and contents of a Zarr store."""
+    path = Path(path)
+    digest = hashlib.sha256()
+    for f in _files(path):
+        if path.is_dir():
+            digest.update(f.relative_to(path).as_posix().encode())
+        with open(f, "rb") as fh:
+            for block in iter(lambda: fh.read(block_mb * 1024 ** 2), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _locked(path):
+    """Exclusive advisory lock on ``<path>.lock`` while the block runs."""
+    with open(f"{path}.lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def describe_cutout(path, with_checksum=False):
+    """
+    Catalog entry for one cutout, read from its coordinates only.
+
+    ``bbox`` is ``[N, W, S, E]``, ``resolution`` is ``[dlat, dlon]`` in
+    degrees and ``time`` holds the first and last time stamp.
+    """
+    size, mtime = _stat(path)
+    entry = {"size": size, "mtime": mtime}
+    try:
+        with open_cutout(path) as ds:
+            tdim = time_dim(ds)
+            lat, lon = spatial_dims(ds)
+            lats, lons, times = ds[lat].values, ds[lon].values, ds[tdim].values
+            entry.update(
+                format="zarr" if is_zarr(path) else "netcdf",
+                bbox=[float(lats.max()), float(lons.min()), float(lats.min()), float(lons.max())],
+                resolution=[
+                    round(float(abs(lats[1] - lats[0])), 6) if lats.size > 1 else None,
+                    round(float(abs(lons[1] - lons[0])), 6) if lons.size > 1 else None,
+                ],
+                time=[str(times[0])[:19], str(times[-1])[:19]] if times.size else None,
+                n_times=int(times.size),
+                variables=sorted(ds.data_vars),
+            )
+    except Exception as e:  # e.g. zipped CDS downloads or partial files
+        entry["error"] = str(e)
+        return entry
+    if with_checksum:
+        entry["sha256"] = checksum(path)
+    return entry
+
+
+def _overlaps(bbox, area):
+    north, west, south, east = area
+    return bbox[2] <= north and bbox[0] >= south and bbox[1] <= east and bbox[3] >= west
+
+
+def _contains(bbox, area, tol=0.0):
+    """True if ``bbox`` covers ``area`` up to ``tol`` degrees (one grid cell for snapped boxes)."""
+    north, west, south, east = area
+    return (bbox[0] >= north - tol and bbox[1] <= west + tol
+            and bbox[2] <= south + tol and bbox[3] >= east - tol)
+
+
+class CutoutCatalog:
+    """
+    JSON index of the cutouts in ``directory``, keyed by file name.
+
+    The index is rewritten atomically whenever an entry changes; only the
+    entries this instance added, refreshed or dropped are written, on top of
+    the current file, under a lock.
+    """
+
+    def __init__(self, directory="cutouts", with_checksum=False):
+        self.directory = Path(directory)
+        self.path = self.directory / CATALOG_NAME
+        self.with_checksum = with_checksum
+        self.entries = self._load()
+        self._changed, self._removed = set(), set()
+
+    def _load(self):
+        if not self.path.exists():
+            return {}
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def save(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with _locked(self.path):
+            entries = self._load()
+            entries.update({name: self.entries[name] for name in self._changed})
+            for name in self._removed:
+                entries.pop(name, None)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
+        self.entries = entries
+        self._changed, self._removed = set(), set()
+
+    def _stale(self, path):
+        entry = self.entries.get(path.name)
+        return entry is None or [entry["size"], entry["mtime"]] != list(_stat(path))
+
+    def register(self, path, save=True):
+        """Add or refresh the entry for ``path`` if it changed on disk; return it."""
+        path = Path(path)
+        if self._stale(path):
+            self.entries[path.name] = describe_cutout(path, self.with_checksum)
+            self._changed.add(path.name)
+            self._removed.discard(path.name)
+            print(f"Catalogued {path.name}")
+            if save:
+                self.save()
+        return self.entries[path.name]
+
+    def checksum(self, path, save=True):
+        """SHA-256 of the cutout at ``path``, computed once per size and modification time."""
+        path = Path(path)
+        entry = self.register(path, save=False)
+        if "sha256" not in entry:
+            entry["sha256"] = checksum(path)
+            self._changed.add(path.name)
+        if save and self._changed:
+            self.save()
+        return entry["sha256"]
+
+    def update(self):
+        """Refresh every cutout in the folder and drop entries whose files are gone."""
+        paths = {p.name: p for pattern in CUTOUT_PATTERNS for p in self.directory.glob(pattern)}
+        changed = [name for name in self.entries if name not in paths]
+        for name in changed:
+            del self.entries[name]
+            self._removed.add(name)
+        for name, path in sorted(paths.items()):
+            if self._stale(path):
+                self.register(path, save=False)
+                changed.append(name)
+        if changed:
+            self.save()
+        return self.entries
+
+    def query(self, area=None, start=None, end=None, variables=None):
+        """
+        Names of valid cutouts that cover ``area`` and ``start``–``end`` and hold ``variables``.
+
+        ``area`` is ``(N, W, S, E)`` and may exceed the cutout by less than one
+        grid cell; times are ISO strings (a date is enough).
+        """
+        hits = []
+        for name, entry in sorted(self.entries.items()):
+            if "error" in entry or entry.get("time") is None:
+                continue
+            tol = max((r for r in entry["resolution"] if r is not None), default=0.0)
+            if area is not None and not _contains(entry["bbox"], area, tol):
+                continue
+            if start is not None and entry["time"][0][:len(start)] > start:
+                continue
+            if end is not None and entry["time"][1][:len(end)] < end:
+                continue
+            if variables and set(variables) - set(entry["variables"]):
+                continue
+            hits.append(name)
+        return hits
+
+    def overlapping(self, area=None, start=None, end=None):
+        """Names of valid cutouts that overlap ``area`` and ``start``–``end`` at all."""
+        hits = []
+        for name, entry in sorted(self.entries.items()):
+            if "error" in entry or entry.get("time") is None:
+                continue
+            if area is not None and not _overlaps(entry["bbox"], area):
+                continue
+            if start is not None and entry["time"][1][:len(start)] < start:
+                continue
+            if end is not None and entry["time"][0][:len(end)] > end:
+                continue
+            hits.append(name)
+        return hits
+
+
+def catalog_entry(path):
+    """Up-to-date catalog entry for the cutout at ``path``, from the catalog of its folder."""
+    path = Path(path)
+    return CutoutCatalog(path.parent).register(path)
+
+
+def register_cutouts(paths):
+    """Record freshly written cutouts in the catalogs of their folders."""
+    by_dir = {}
+    for p in map(Path, paths):
+        by_dir.setdefault(p.parent, []).append(p)
+    for directory, members in by_dir.items():
+        catalog = CutoutCatalog(directory)
+        for p in members:
+            catalog.register(p, save=False)
+        catalog.save()
+
+
+def print_catalog(entries, names=None):
+    print(f"{'cutout':<36} {'start':<20} {'end':<20} {'bbox [N, W, S, E]':<28} {'res':<12} {'size (MB)':>10}  variables")
+    for name in names if names is not None else sorted(entries):
+        e = entries[name]
+        if "error" in e:
+            print(f"{name:<36} [not a readable cutout: {e['error']}]")
+            continue
+        start, end = e["time"] or ("-", "-")
+        bbox = ", ".join(f"{v:g}" for v in e["bbox"])
+        res = "×".join(f"{v:g}" for v in e["resolution"] if v is not None)
+        print(f"{name:<36} {start:<20} {end:<20} {bbox:<28} {res:<12} {e['size'] / 1024 ** 2:>10.1f}  "
+              f"{' '.join(e['variables'])}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Index the cutouts in a folder and query their coverage.")
+    parser.add_argument("directory", nargs="?", default="cutouts", help="Cutout folder (default: cutouts)")
+    parser.add_argument("--region", type=str.lower, choices=PREDEFINED_AREAS.keys(),
+                        help="Only cutouts covering this region's bounding box")
+    parser.add_argument("--start", help="Only cutouts starting on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Only cutouts ending on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--variables", nargs="*", help="Only cutouts holding these variables")
+    parser.add_argument("--checksum", action="store_true",
+                        help="Also compute SHA-256 checksums of new or changed entries (reads every file)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    catalog = CutoutCatalog(args.directory, with_checksum=args.checksum)
+    catalog.update()
+    if args.checksum:
+        for name, entry in sorted(catalog.entries.items()):
+            if "error" not in entry:
+                catalog.checksum(catalog.directory / name, save=False)
+        catalog.save()
+    names = None
+    if args.region or args.start or args.end or args.variables:
+        area = PREDEFINED_AREAS[args.region] if args.region else None
+        names = catalog.query(area, args.start, args.end, args.variables)
+    print_catalog(catalog.entries, names)
+
+
+if __name__ == "__main__":
+    main()
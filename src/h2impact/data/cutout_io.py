@@ -0,0 +1,348 @@
+"""
+Shared I/O helpers for the h2impact cutout merge tools.
+"""
+import shutil
+import sys
+from pathlib import Path
+
+TIME_DIMS = ("time", "valid_time")
+LAT_DIMS = ("latitude", "lat", "y")
+LON_DIMS = ("longitude", "lon", "x")
+
+# Atlite short variable names
+RENAME_MAP = {
+    "10m_u_component_of_wind":            "u10",
+    "10m_v_component_of_wind":            "v10",
+    "2m_temperature":                     "t2m",
+    "surface_solar_radiation_downwards":  "ssrd",
+}
+
+# Rough number of copies of a time chunk alive while it is read, decoded
+# and written; used to turn a memory ceiling into a chunk length.
+CHUNK_OVERHEAD = 3
+
+FORMATS = ("netcdf", "zarr")
+
+# Zarr chunks hold one week of hourly data; the spatial extent is split
+# only when a chunk would otherwise exceed ZARR_CHUNK_MB.
+ZARR_TIME_CHUNK = 168
+ZARR_CHUNK_MB = 8
+
+# Encoding keys that carry over between NetCDF and Zarr
+PORTABLE_ENCODING = ("dtype", "_FillValue", "missing_value", "units", "calendar", "scale_factor", "add_offset")
+
+
+def time_dim(ds):
+    """Name of the time dimension (``time`` or ERA5's ``valid_time``)."""
+    for dim in TIME_DIMS:
+        if dim in ds.dims:
+            return dim
+    raise KeyError("No 'time' or 'valid_time' dimension found in dataset.")
+
+
+def spatial_dims(ds):
+    """Names of the latitude and longitude dimensions."""
+    lat = next((d for d in LAT_DIMS if d in ds.dims), None)
+    lon = next((d for d in LON_DIMS if d in ds.dims), None)
+    if lat is None or lon is None:
+        raise KeyError("No latitude/longitude dimensions found in dataset.")
+    return lat, lon
+
+
+def union_area(areas):
+    """Bounding box ``(north, west, south, east)`` covering all ``areas``."""
+    areas = list(areas)
+    return (
+        max(a[0] for a in areas),
+        min(a[1] for a in areas),
+        min(a[2] for a in areas),
+        max(a[3] for a in areas),
+    )
+
+
+def bbox_slice(ds, area):
+    """
+    ``.sel`` indexers for a ``(north, west, south, east)`` box.
+
+    Works for ascending and for ERA5's descending latitude order.
+    """
+    north, west, south, east = area
+    lat, lon = spatial_dims(ds)
+    descending = ds[lat].size > 1 and ds[lat].values[0] > ds[lat].values[-1]
+    return {
+        lat: slice(north, south) if descending else slice(south, north),
+        lon: slice(west, east),
+    }
+
+
+def bytes_per_timestep(ds):
+    """Bytes needed to hold one time step of every time-dependent variable."""
+    tdim = time_dim(ds)
+    total = 0
+    for var in ds.data_vars.values():
+        if tdim not in var.dims:
+            continue
+        n = var.dtype.itemsize
+        for dim in var.dims:
+            if dim != tdim:
+                n *= ds.sizes[dim]
+        total += n
+    return total
+
+
+def time_chunk_for_budget(ds, max_memory_mb):
+    """Largest time-chunk length that keeps one chunk under ``max_memory_mb``."""
+    step = bytes_per_timestep(ds) * CHUNK_OVERHEAD
+    return max(1, int(max_memory_mb * 1024 ** 2 // max(step, 1)))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def output_path(path, fmt="netcdf"):
+    """``path`` with the suffix matching the output format."""
+    path = Path(path)
+    return path.with_suffix(".zarr") if fmt == "zarr" else path
+
+
+def remove_cutout(path):
+    """Delete an existing NetCDF file or Zarr store."""
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
+
+
+def size_on_disk(path):
+    """Size in bytes of a NetCDF file or of all files in a Zarr store."""
+    path = Path(path)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+
+def is_zarr(path):
+    path = Path(path)
+    return path.suffix == ".zarr" or (path / ".zgroup").exists() or (path / "zarr.json").exists()
+
+
+def portable_encoding(ds):
+    """Copy of ``ds`` keeping only the encodings that both backends understand."""
+    ds = ds.copy()
+    for var in ds.variables.values():
+        var.encoding = {k: v for k, v in var.encoding.items() if k in PORTABLE_ENCODING}
+    return ds
+
+
+def zarr_chunks(ds, time_chunk=ZARR_TIME_CHUNK, max_chunk_mb=ZARR_CHUNK_MB):
+    """
+    Chunk sizes per dimension for a Zarr cutout.
+
+    Short time windows of one variable map to few chunks: each chunk spans
+    ``time_chunk`` steps and, as far as ``max_chunk_mb`` allows, the whole
+    grid. Zarr stores every variable separately, so per-variable reads
+    never touch the others.
+    """
+    tdim = time_dim(ds)
+    chunks = {dim: size for dim, size in ds.sizes.items()}
+    chunks[tdim] = min(time_chunk, ds.sizes[tdim])
+    for var in ds.data_vars.values():
+        if tdim not in var.dims or var.ndim < 2:
+            continue
+        slow = next(d for d in var.dims if d != tdim)
+        inner = var.dtype.itemsize * chunks[tdim]
+        for dim in var.dims:
+            if dim not in (tdim, slow):
+                inner *= ds.sizes[dim]
+        rows = max(1, int(max_chunk_mb * 1024 ** 2 // max(inner, 1)))
+        chunks[slow] = min(chunks[slow], rows)
+    return chunks
+
+
+def write_cutout(ds, out, fmt="netcdf", max_memory_mb=None, profile="default"):
+    """
+    Write a cutout as NetCDF or as a chunked Zarr store.
+
+    Lazy inputs are written chunk by chunk with the synchronous scheduler;
+    for NetCDF, ``max_memory_mb`` sets the time-chunk length. ``profile``
+    names an encoding profile from ``encoding_profiles``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {FORMATS}.")
+    import dask
+    from src.h2impact.data.encoding_profiles import build_encoding
+
+    out = output_path(out, fmt)
+    remove_cutout(out)
+    with dask.config.set(scheduler="synchronous"):
+        if fmt == "zarr":
+            chunks = zarr_chunks(ds)
+            ds = portable_encoding(ds).chunk(chunks)
+            packing = build_encoding(ds, profile, fmt)
+            encoding = {
+                name: {"chunks": tuple(chunks[d] for d in var.dims), **packing.get(name, {})}
+                for name, var in ds.data_vars.items()
+            }
+            ds.to_zarr(out, mode="w", encoding=encoding, consolidated=True)
+        else:
+            if max_memory_mb:
+                ds = ds.chunk({time_dim(ds): time_chunk_for_budget(ds, max_memory_mb)})
+            ds.to_netcdf(out, encoding=build_encoding(ds, profile, fmt) or None)
+    return out
+
+
+def append_netcdf(path, ds, start=None):
+    """
+    Append ``ds`` along the unlimited time dimension of an existing NetCDF file.
+
+    The file must have been created with ``unlimited_dims=[<time dim>]`` and
+    hold the same variables; time values are encoded with the file's units.
+    With ``start``, time steps from that index on are overwritten instead
+    (and the file grows if ``ds`` reaches past its end).
+    """
+    import netCDF4
+    import numpy as np
+    import pandas as pd
+
+    tdim = time_dim(ds)
+    with netCDF4.Dataset(path, "a") as nc:
+        n0 = len(nc.dimensions[tdim]) if start is None else start
+        n = ds.sizes[tdim]
+        tvar = nc.variables[tdim]
+        times = pd.to_datetime(ds[tdim].values).to_pydatetime()
+        tvar[n0:n0 + n] = netCDF4.date2num(times, tvar.units, getattr(tvar, "calendar", "standard"))
+        for name, var in ds.variables.items():
+            if name == tdim or tdim not in var.dims:
+                continue
+            index = tuple(slice(n0, n0 + n) if d == tdim else slice(None) for d in var.dims)
+            values = var.values
+            if values.dtype.kind == "f":
+                values = np.ma.masked_invalid(values)
+            elif values.dtype.kind == "U":
+                values = values.astype(object)
+            nc.variables[name][index] = values
+
+
+def _bare(ds):
+    ds = ds.copy()
+    for var in ds.variables.values():
+        var.encoding = {}
+    return ds
+
+
+def write_time_slice(ds, out, fmt, start):
+    """
+    Overwrite time steps ``start:start+len(ds)`` of an existing cutout in place.
+
+    Steps past the current end are appended, so a growing last month can be
+    refreshed; coordinates other than time must match the existing cutout.
+    """
+    if fmt != "zarr":
+        return append_netcdf(out, ds, start)
+
+    import xarray as xr
+
+    tdim = time_dim(ds)
+    with xr.open_zarr(out) as existing:
+        n_existing = existing.sizes[tdim]
+    overlap = max(0, min(ds.sizes[tdim], n_existing - start))
+    if overlap:
+        part = _bare(ds.isel({tdim: slice(0, overlap)}))
+        part = part.drop_vars([v for v in part.variables if tdim not in part[v].dims])
+        part.to_zarr(out, region={tdim: slice(start, start + overlap)})
+    if overlap < ds.sizes[tdim]:
+        _bare(ds.isel({tdim: slice(overlap, None)})).to_zarr(out, append_dim=tdim)
+
+
+def append_cutout(ds, out, fmt="netcdf", first=False):
+    """
+    Create (``first=True``) or extend a cutout along its time dimension.
+
+    NetCDF outputs get an unlimited time dimension so later blocks can be
+    appended in place; Zarr outputs are appended with ``append_dim``.
+    """
+    tdim = time_dim(ds)
+    if first:
+        remove_cutout(out)
+        if fmt == "zarr":
+            return write_cutout(ds, out, "zarr")
+        ds.to_netcdf(out, unlimited_dims=[tdim])
+    elif fmt == "zarr":
+        _bare(ds).to_zarr(out, append_dim=tdim)
+    else:
+        append_netcdf(out, ds)
+    return Path(out)
+
+
+def open_cutout(path, chunks=None):
+    """
+    Open a NetCDF or Zarr cutout lazily.
+
+    ``chunks`` defaults to the on-disk chunking, so only the time windows
+    and variables that are actually used get read.
+    """
+    import xarray as xr
+
+    chunks = {} if chunks is None else chunks
+    if is_zarr(path):
+        return xr.open_zarr(path, chunks=chunks)
+    return xr.open_dataset(path, chunks=chunks)
+
+
+def export_netcdf(path, out, max_memory_mb=512):
+    """
+    Export a (Zarr) cutout as a single NetCDF file that atlite can read.
+
+    Backend-specific encodings are dropped and every data variable keeps
+    ``module='era5'``; data are streamed in time chunks.
+    """
+    with open_cutout(path) as ds:
+        ds = portable_encoding(ds)
+        for var in ds.data_vars:
+            ds[var].attrs.setdefault('module', 'era5')
+        return write_cutout(ds, out, "netcdf", max_memory_mb)
+
+
+def merge_instant_accum(ds_inst, ds_accu, rename_map=RENAME_MAP):
+    """
+    Merge an instant/accum pair, rename to atlite short names and tag ``module='era5'``.
+
+    Nothing is loaded, so lazily opened inputs stay lazy.
+    """
+    import xarray as xr
+
+    ds = xr.merge([ds_inst, ds_accu])
+    ds = ds.rename({k: v for k, v in rename_map.items() if k in ds})
+    # Add Atlite "module" metadata
+    for var in ds.data_vars:
+        ds[var].attrs['module'] = 'era5'
+    return ds
+
+
+def same_content(path_a, path_b):
+    """
+    True if two cutouts hold identical values, attributes and on-disk encodings.
+
+    Files are opened lazily, so the comparison runs chunk by chunk.
+    """
+    import xarray as xr
+
+    with xr.open_dataset(path_a, chunks={}) as a, xr.open_dataset(path_b, chunks={}) as b:
+        if not a.identical(b):
+            return False
+        keys = ("dtype", "zlib", "complevel", "shuffle", "chunksizes", "scale_factor", "add_offset", "_FillValue")
+        for name in a.variables:
+            enc_a = {k: a[name].encoding.get(k) for k in keys}
+            enc_b = {k: b[name].encoding.get(k) for k in keys}
+            if str(enc_a) != str(enc_b):
+                return False
+    return True
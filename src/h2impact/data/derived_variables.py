@@ -0,0 +1,197 @@
+"""
+Precompute derived fields of a merged cutout and store them next to the raw variables.
+
+Derived variables:
+  wnd10m    10 m wind speed, sqrt(u10² + v10²)                          [m s**-1]
+  wnd<H>m   wind speed at hub height H, extrapolated from wnd10m with a
+            power law (alpha) or a log law (roughness length z0)       [m s**-1]
+  influx    hourly mean downward solar irradiance from the accumulated
+            ``ssrd``/``si`` field                                       [W m**-2]
+
+ERA5 reanalysis accumulates radiation over each hour, so ``influx`` is the
+accumulation divided by the time step. For fields accumulated over a
+longer running window (e.g. forecast steps), ``--accumulation running``
+first differences consecutive steps and restarts at every reset.
+
+All fields are computed lazily in time chunks sized to ``max_memory_mb``
+and carry provenance attributes (``derived_from``, ``method``). Zarr
+cutouts can be updated in place; NetCDF cutouts are rewritten.
+
+Usage:
+  python -m src.h2impact.data.derived_variables cutouts/de-2020-merged-year.nc --hub-heights 100 150 --in-place
+"""
+import argparse
+import os
+import numpy as np
+import xarray as xr
+from pathlib import Path
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import (
+    FORMATS, is_zarr, open_cutout, output_path, remove_cutout, time_chunk_for_budget, time_dim,
+    write_cutout, zarr_chunks,
+)
+from src.h2impact.data.encoding_profiles import PROFILES
+
+LAWS = ("power", "log")
+ACCUMULATIONS = ("hourly", "running")
+
+HUB_HEIGHTS = (100,)
+# Neutral-stability power-law exponent and an open-terrain roughness length
+ALPHA = 1 / 7
+ROUGHNESS = 0.03
+REFERENCE_HEIGHT = 10.0
+
+IRRADIANCE_SOURCES = ("ssrd", "si")
+
+
+def _with_attrs(da, attrs):
+    """``da`` with exactly ``attrs`` and no inherited encoding."""
+    da = da.copy(deep=False)
+    da.attrs, da.encoding = attrs, {}
+    return da
+
+
+def wind_speed(ds):
+    return _with_attrs(np.hypot(ds["u10"], ds["v10"]), {
+        "long_name": "10 metre wind speed",
+        "units": "m s**-1",
+        "derived_from": "u10 v10",
+        "method": "sqrt(u10**2 + v10**2)",
+    })
+
+
+def hub_height_wind(wnd10m, height, law="power", alpha=ALPHA, roughness=ROUGHNESS):
+    """Extrapolate 10 m wind speed to ``height`` metres."""
+    if law == "power":
+        factor = (height / REFERENCE_HEIGHT) ** alpha
+        method = f"wnd10m * ({height:g} / {REFERENCE_HEIGHT:g}) ** {alpha:.4g}"
+    elif law == "log":
+        factor = np.log(height / roughness) / np.log(REFERENCE_HEIGHT / roughness)
+        method = f"wnd10m * ln({height:g} / {roughness:g}) / ln({REFERENCE_HEIGHT:g} / {roughness:g})"
+    else:
+        raise ValueError(f"Unknown extrapolation law '{law}', expected one of {LAWS}.")
+    return _with_attrs((wnd10m * factor).astype(wnd10m.dtype), {
+        "long_name": f"{height:g} metre wind speed",
+        "units": "m s**-1",
+        "derived_from": "u10 v10",
+        "method": f"{law} law: {method}",
+    })
+
+
+def irradiance(ds, accumulation="hourly"):
+    """Mean irradiance per time step from an accumulated radiation field (J m**-2)."""
+    source = next((v for v in IRRADIANCE_SOURCES if v in ds.data_vars), None)
+    if source is None:
+        raise KeyError(f"No accumulated radiation variable ({', '.join(IRRADIANCE_SOURCES)}) found.")
+    tdim = time_dim(ds)
+    acc = ds[source]
+    step_s = float(np.median(np.diff(ds[tdim].values)) / np.timedelta64(1, "s")) if ds.sizes[tdim] > 1 else 3600.0
+
+    if accumulation == "running":
+        prev = acc.shift({tdim: 1})
+        # A drop marks the start of a new accumulation window; keep the raw value there
+        acc = xr.where(acc >= prev, acc - prev, acc)
+        method = f"diff({source}) / {step_s:g}, restarting at accumulation resets"
+    elif accumulation == "hourly":
+        method = f"{source} / {step_s:g}"
+    else:
+        raise ValueError(f"Unknown accumulation '{accumulation}', expected one of {ACCUMULATIONS}.")
+    return _with_attrs((acc / step_s).clip(min=0).astype(ds[source].dtype), {
+        "long_name": "Surface solar radiation downwards, mean over time step",
+        "units": "W m**-2",
+        "derived_from": source,
+        "method": method,
+    })
+
+
+def derive(ds, hub_heights=HUB_HEIGHTS, law="power", alpha=ALPHA, roughness=ROUGHNESS, accumulation="hourly"):
+    """Dataset of the derived fields that ``ds`` has the inputs for; nothing is computed yet."""
+    derived = {}
+    if "u10" in ds.data_vars and "v10" in ds.data_vars:
+        derived["wnd10m"] = wind_speed(ds)
+        for h in hub_heights:
+            derived[f"wnd{h:g}m"] = hub_height_wind(derived["wnd10m"], h, law, alpha, roughness)
+    if any(v in ds.data_vars for v in IRRADIANCE_SOURCES):
+        derived["influx"] = irradiance(ds, accumulation)
+    if not derived:
+        raise KeyError("Cutout holds none of u10/v10, ssrd or si; nothing to derive.")
+    return xr.Dataset(derived)
+
+
+def add_derived_variables(path, out=None, hub_heights=HUB_HEIGHTS, law="power", alpha=ALPHA,
+                          roughness=ROUGHNESS, accumulation="hourly", fmt=None, max_memory_mb=512,
+                          profile="default"):
+    """
+    Compute derived fields of the cutout at ``path`` and store them with the raw variables.
+
+    With ``out=None`` the cutout is updated in place: Zarr stores get the
+    new arrays added, NetCDF files are rewritten through a temporary file.
+    Returns the output path.
+    """
+    fmt = fmt or ("zarr" if is_zarr(path) else "netcdf")
+    with open_cutout(path) as probe:
+        chunk = time_chunk_for_budget(probe, max_memory_mb)
+        tdim = time_dim(probe)
+
+    # Zarr stores are already chunked in small blocks; NetCDF files are read in budget-sized ones
+    ds = open_cutout(path, chunks={} if is_zarr(path) else {tdim: chunk})
+    derived = derive(ds, hub_heights, law, alpha, roughness, accumulation)
+    print(f"Deriving {', '.join(derived.data_vars)} from {path}")
+
+    if out is None and fmt == "zarr" and is_zarr(path):
+        import dask
+
+        chunks = zarr_chunks(ds)
+        derived = derived.chunk({d: chunks[d] for d in derived.dims})
+        encoding = {name: {"chunks": tuple(chunks[d] for d in var.dims)} for name, var in derived.data_vars.items()}
+        with dask.config.set(scheduler="synchronous"):
+            derived.drop_vars(list(derived.coords)).to_zarr(path, mode="a", encoding=encoding, consolidated=True)
+        ds.close()
+        return Path(path)
+
+    target = output_path(out or path, fmt)
+    tmp = target.with_name(target.stem + ".derived.tmp" + target.suffix) if out is None else target
+    try:
+        write_cutout(ds.assign(derived), tmp, fmt, max_memory_mb, profile)
+    finally:
+        ds.close()
+    if tmp != target:
+        remove_cutout(target)
+        os.replace(tmp, target)
+    return target
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Add wind speed, hub-height wind and irradiance to a cutout.")
+    parser.add_argument("cutout", help="Merged cutout (.nc or .zarr)")
+    parser.add_argument("-o", "--output", help="Output cutout (default: update the input, see --in-place)")
+    parser.add_argument("--in-place", action="store_true", help="Store the derived fields in the input cutout")
+    parser.add_argument("--hub-heights", nargs="*", type=float, default=list(HUB_HEIGHTS),
+                        help="Hub heights in metres for wnd<H>m (default: 100)")
+    parser.add_argument("--law", choices=LAWS, default="power", help="Wind profile law (default: power)")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="Power-law exponent (default: 1/7)")
+    parser.add_argument("--roughness", type=float, default=ROUGHNESS,
+                        help=f"Log-law roughness length in metres (default: {ROUGHNESS})")
+    parser.add_argument("--accumulation", choices=ACCUMULATIONS, default="hourly",
+                        help="How ssrd/si is accumulated: hourly (ERA5 reanalysis) or running (default: hourly)")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: same as the input)")
+    parser.add_argument("--encoding", choices=PROFILES, default="default",
+                        help="Encoding profile when the cutout is rewritten (default: default)")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling per time chunk (default: 512)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not (args.output or args.in_place):
+        raise SystemExit("Pass --output or --in-place.")
+    out = add_derived_variables(args.cutout, args.output, args.hub_heights, args.law, args.alpha,
+                                args.roughness, args.accumulation, args.format, args.max_memory_mb,
+                                args.encoding)
+    register_cutouts([out])
+    print(f"✅ Derived variables written to: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
 import argparse
 import calendar
 from pathlib import Path
-import cdsapi
 from src.h2impact.constants import PREDEFINED_AREAS, COUNTRY_CODES
+from src.h2impact.data.cds_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_GB, CDSCache, caching_client_factory
+from src.h2impact.data.download_queue import DATASET, DEFAULT_LEDGER, run_queue
 
-def download_era5_cutout(target, variables, area, year, month):
+VARIABLES = [
+    "10m_u_component_of_wind",
+    "10m_v_component_of_wind",
+    "2m_temperature",
+    "surface_solar_radiation_downwards",
+]
+
+def build_request(variables, area, year, month):
     """
-    Download an ERA5 single-level NetCDF cutout via the CDS API for one month.
+    Build the CDS request dict for one month of ERA5 single-level data.
     """
-    c = cdsapi.Client()
     days = [f"{d:02d}" for d in range(1, calendar.monthrange(year, month)[1] + 1)]
     times = [f"{h:02d}" for h in range(24)]  # CDS accepts "HH" or "HH:MM"
-    request = {
+    return {
         "product_type": "reanalysis",
         "format": "netcdf",
         "variable": variables,
@@ -21,41 +28,63 @@ def download_era5_cutout(target, variables, area, year, month):
         "time": [f"{h}:00" for h in times],
         "area": list(area),  # [N, W, S, E]
     }
+
+def download_era5_cutout(target, variables, area, year, month, client=None):
+    """
+    Download an ERA5 single-level NetCDF cutout via the CDS API for one month.
+    """
+    if client is None:
+        import cdsapi
+        client = cdsapi.Client()
+    request = build_request(variables, area, year, month)
     print(f"Requesting ERA5 for {year}-{month:02d} over {area}...")
-    c.retrieve("reanalysis-era5-single-levels", request, target)
+    client.retrieve(DATASET, request, target)
     print(f"Downloaded: {target}")
 
+def build_jobs(regions, year, months, variables=VARIABLES, cutout_dir="cutouts"):
+    """
+    One download job per region and month, named ``<CODE>_<YEAR>_<MM>.nc``.
+    """
+    jobs = []
+    for region in regions:
+        area = PREDEFINED_AREAS[region]
+        code = COUNTRY_CODES[region]
+        for m in months:
+            jobs.append({
+                "target": str(Path(cutout_dir) / f"{code}_{year}_{m:02d}.nc"),
+                "request": build_request(variables, area, year, m),
+            })
+    return jobs
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Download ERA5 monthly cutouts (all months or a single month).")
     parser.add_argument("--year", type=int, required=True, help="Target year (e.g., 2020)")
-    parser.add_argument("--region", type=str, choices=PREDEFINED_AREAS.keys(), required=True,
-                        help="Country/region name (e.g., germany, france, poland)")
+    parser.add_argument("--region", type=str.lower, nargs="+", choices=PREDEFINED_AREAS.keys(), required=True,
+                        help="Country/region name(s) (e.g., germany, france, poland)")
     parser.add_argument("--month", type=int, choices=range(1, 13), metavar="{1-12}",
                         help="Optional month number (1=Jan … 12=Dec). If omitted, downloads all 12 months.")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Maximum number of CDS requests in flight (default: 4)")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER,
+                        help=f"Job ledger used to resume interrupted runs (default: {DEFAULT_LEDGER})")
+    parser.add_argument("--retries", type=int, default=1,
+                        help="Retries per month after a failed request (default: 1)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Shared CDS request cache (default: $H2IMPACT_CDS_CACHE or ~/.cache/h2impact/cds)")
+    parser.add_argument("--cache-max-gb", type=float, default=DEFAULT_MAX_GB,
+                        help=f"Size cap of the cache; least recently used files are evicted (default: {DEFAULT_MAX_GB:g})")
+    parser.add_argument("--no-cache", action="store_true", help="Always request from CDS")
     return parser.parse_args()
 
 if __name__ == "__main__":
     args = parse_args()
-    region = args.region.lower()
-    area = PREDEFINED_AREAS[region]
-    code = COUNTRY_CODES[region]
 
     Path("cutouts").mkdir(exist_ok=True)
 
-    variables = [
-        "10m_u_component_of_wind",
-        "10m_v_component_of_wind",
-        "2m_temperature",
-        "surface_solar_radiation_downwards",
-    ]
-
     months = [args.month] if args.month else list(range(1, 13))
-    for m in months:
-        target = f"cutouts/{code}_{args.year}_{m:02d}.nc"
-        download_era5_cutout(
-            target=target,
-            variables=variables,
-            area=area,
-            year=args.year,
-            month=m,
-        )
+    jobs = build_jobs(args.region, args.year, months)
+    client_factory = None
+    if not args.no_cache:
+        client_factory = caching_client_factory(CDSCache(args.cache_dir, args.cache_max_gb))
+    run_queue(jobs, ledger_path=args.ledger, workers=args.workers, retries=args.retries,
+              client_factory=client_factory)
@@ -0,0 +1,167 @@
+"""
+Concurrent, resumable download queue for ERA5 cutouts.
+
+Several CDS requests are kept in flight at once by a bounded worker pool.
+Every job is recorded in a JSON ledger next to the cutouts, so an
+interrupted run only re-requests the months that are missing or partial.
+
+The transport is pluggable: anything with a cdsapi-style
+``retrieve(name, request, target)`` method can be passed as the client
+factory, e.g. a local fake client that copies a fixture file.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+DATASET = "reanalysis-era5-single-levels"
+DEFAULT_LEDGER = "cutouts/download_ledger.json"
+
+
+def cdsapi_client_factory():
+    """Default transport: one real ``cdsapi.Client`` per worker thread."""
+    import cdsapi
+    return cdsapi.Client()
+
+
+def request_hash(job):
+    """Short hash of a job's dataset and request; changes whenever area, variables or times do."""
+    text = json.dumps({"dataset": job.get("dataset", DATASET), "request": job["request"]},
+                      sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class DownloadLedger:
+    """
+    JSON record of download jobs keyed by target path.
+
+    Each entry holds the request and its hash, its status (``pending``,
+    ``done`` or ``failed``), the number of attempts and the size of the
+    finished file.
+    The file is rewritten atomically after every change.
+    """
+
+    def __init__(self, path=DEFAULT_LEDGER):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.jobs = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.jobs = json.load(f)
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.jobs, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def is_complete(self, target, job=None):
+        """
+        True if the job finished and the file on disk still matches it.
+
+        With ``job``, the finished download must also have been made for the
+        same dataset and request; a changed request counts as incomplete.
+        """
+        entry = self.jobs.get(str(target))
+        if not entry or entry.get("status") != "done":
+            return False
+        if job is not None:
+            if "request_hash" in entry:
+                same = entry["request_hash"] == request_hash(job)
+            else:  # ledgers written before requests were hashed
+                same = entry.get("request") == json.loads(json.dumps(job["request"], default=str))
+            if not same:
+                return False
+        target = Path(target)
+        return target.exists() and target.stat().st_size == entry.get("size")
+
+    def update(self, target, **fields):
+        with self._lock:
+            entry = self.jobs.setdefault(str(target), {})
+            entry.update(fields)
+            self._save()
+
+
+def _retrieve(job, ledger, client_factory, local, retries, retry_wait):
+    """Run one job in a worker thread, writing to ``<target>.part`` first."""
+    target = Path(job["target"])
+    part = target.with_name(target.name + ".part")
+    fingerprint = request_hash(job)
+    if not hasattr(local, "client"):
+        try:
+            local.client = client_factory()
+        except Exception as e:
+            # e.g. no ~/.cdsapirc: fail this job instead of the whole queue
+            ledger.update(target, request=job["request"], request_hash=fingerprint, status="failed",
+                          error=f"could not create client: {e}")
+            print(f"❌ {target.name}: could not create client ({e})")
+            return False
+
+    attempts = ledger.jobs.get(str(target), {}).get("attempts", 0)
+    for attempt in range(1, retries + 2):
+        attempts += 1
+        ledger.update(target, request=job["request"], request_hash=fingerprint, status="pending",
+                      attempts=attempts)
+        if part.exists():
+            part.unlink()
+        try:
+            start = time.perf_counter()
+            local.client.retrieve(job.get("dataset", DATASET), job["request"], str(part))
+            os.replace(part, target)
+        except Exception as e:
+            ledger.update(target, status="failed", error=str(e))
+            print(f"[WARN] {target.name}: attempt {attempt} failed ({e})")
+            if attempt <= retries:
+                time.sleep(retry_wait)
+            continue
+        elapsed = time.perf_counter() - start
+        ledger.update(target, status="done", size=target.stat().st_size,
+                      seconds=round(elapsed, 1), error=None)
+        print(f"✅ Downloaded: {target} ({elapsed:.0f} s)")
+        return True
+    return False
+
+
+def run_queue(jobs, ledger_path=DEFAULT_LEDGER, workers=4, client_factory=None,
+              retries=1, retry_wait=30.0):
+    """
+    Download ``jobs`` with at most ``workers`` CDS requests in flight.
+
+    ``jobs`` is a list of dicts with ``target`` and ``request`` (and an
+    optional ``dataset``). Jobs the ledger already marks as complete for
+    the same request are skipped, so re-running the same call resumes an
+    interrupted download; a target whose request changed is downloaded again.
+    Returns a dict mapping each target to ``"done"``, ``"skipped"`` or
+    ``"failed"``.
+    """
+    client_factory = client_factory or cdsapi_client_factory
+    ledger = DownloadLedger(ledger_path)
+    local = threading.local()
+    results = {}
+
+    todo = []
+    for job in jobs:
+        target = str(job["target"])
+        if ledger.is_complete(target, job):
+            results[target] = "skipped"
+            print(f"Skipping {target}: already downloaded.")
+        else:
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            todo.append(job)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(_retrieve, job, ledger, client_factory, local, retries, retry_wait): str(job["target"])
+            for job in todo
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = "done" if future.result() else "failed"
+
+    failed = [t for t, status in results.items() if status == "failed"]
+    if failed:
+        print(f"❌ {len(failed)} download(s) failed, re-run to resume: {', '.join(failed)}")
+    return results
@@ -0,0 +1,144 @@
+"""
+Named encoding profiles for merged cutouts, and a benchmark to compare them.
+
+Profiles:
+  default        backend defaults (uncompressed float for NetCDF)
+  lossless-zlib  zlib level 4 with byte shuffle on every data variable
+  packed-int16   int16 with per-variable scale_factor/add_offset for the
+                 ERA5 fields in PACKED_VARS, zlib on top; other variables,
+                 and packed ones without a finite range, stay lossless
+
+Zarr stores are always compressed by zarr's default codec, so for Zarr
+only the packing part of a profile applies.
+
+Usage:
+  python -m src.h2impact.data.encoding_profiles cutouts/de-2020-merged-year.nc \
+    --profiles default lossless-zlib packed-int16 --report encodings.json
+"""
+import argparse
+import json
+import math
+import tempfile
+import time
+from pathlib import Path
+
+PROFILES = ("default", "lossless-zlib", "packed-int16")
+
+PACKED_VARS = ("u10", "v10", "t2m", "ssrd", "si")
+
+ZLIB = {"zlib": True, "complevel": 4, "shuffle": True}
+
+INT16_FILL = -32768
+# Packed values use [-32767, 32767], keeping INT16_FILL free for missing data
+INT16_STEPS = 2 * 32767
+
+
+def _packing(vmin, vmax):
+    scale = (vmax - vmin) / INT16_STEPS or 1.0
+    return {
+        "dtype": "int16",
+        "scale_factor": float(scale),
+        "add_offset": float((vmax + vmin) / 2),
+        "_FillValue": INT16_FILL,
+    }
+
+
+def build_encoding(ds, profile="default", fmt="netcdf"):
+    """
+    Per-variable encoding dict for ``profile``, ready for ``to_netcdf``/``to_zarr``.
+
+    ``packed-int16`` computes each variable's min/max in one lazy pass.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown encoding profile '{profile}', expected one of {PROFILES}.")
+    if profile == "default":
+        return {}
+
+    import dask
+
+    compression = ZLIB if fmt == "netcdf" else {}
+    encoding = {}
+    for name, var in ds.data_vars.items():
+        enc = {"dtype": str(var.dtype), **compression}
+        if var.dtype.kind == "f":
+            enc["_FillValue"] = var.encoding.get("_FillValue", float("nan"))
+        encoding[name] = enc
+
+    if profile == "packed-int16":
+        packed = [v for v in PACKED_VARS if v in ds.data_vars]
+        ranges = dask.compute({v: (ds[v].min(), ds[v].max()) for v in packed})[0]
+        for name, (vmin, vmax) in ranges.items():
+            if not (math.isfinite(float(vmin)) and math.isfinite(float(vmax))):
+                # No finite range (e.g. an all-NaN field) to pack into; keep it lossless
+                continue
+            encoding[name] = {**_packing(float(vmin), float(vmax)), **compression}
+    return encoding
+
+
+def benchmark_profiles(path, profiles=PROFILES, fmt="netcdf", workdir=None):
+    """
+    Write ``path`` once per profile and report size, write/read time and error.
+
+    The maximum absolute quantisation error is measured per variable
+    against the float original. Returns one report dict per profile.
+    """
+    from src.h2impact.data.cutout_io import open_cutout, size_on_disk, write_cutout
+
+    reports = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp, open_cutout(path) as src:
+        for profile in profiles:
+            out = Path(tmp) / f"{profile}.nc"
+            start = time.perf_counter()
+            out = write_cutout(src, out, fmt, max_memory_mb=512, profile=profile)
+            write_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open_cutout(out) as ds:
+                ds.load()
+                read_s = time.perf_counter() - start
+                errors = {
+                    name: float(abs(ds[name].astype("float64") - src[name].astype("float64")).max())
+                    for name in src.data_vars
+                    if src[name].dtype.kind == "f"
+                }
+            reports.append({
+                "profile": profile,
+                "size_mb": round(size_on_disk(out) / 1024 ** 2, 2),
+                "write_s": round(write_s, 2),
+                "read_s": round(read_s, 2),
+                "max_abs_error": errors,
+            })
+    return reports
+
+
+def print_report(reports):
+    print(f"{'profile':<15} {'size (MB)':>10} {'write (s)':>10} {'read (s)':>10}  max abs error")
+    for r in reports:
+        errors = ", ".join(f"{k}={v:.3g}" for k, v in r["max_abs_error"].items())
+        print(f"{r['profile']:<15} {r['size_mb']:>10.1f} {r['write_s']:>10.2f} {r['read_s']:>10.2f}  {errors}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare encoding profiles on a merged cutout.")
+    parser.add_argument("cutout", help="Merged cutout (.nc or .zarr) with float variables")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES),
+                        help="Profiles to benchmark (default: all)")
+    parser.add_argument("--format", choices=("netcdf", "zarr"), default="netcdf",
+                        help="Output format to benchmark (default: netcdf)")
+    parser.add_argument("--workdir", help="Folder for the temporary outputs (default: system temp)")
+    parser.add_argument("--report", help="Optional JSON file for the results")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    reports = benchmark_profiles(args.cutout, args.profiles, args.format, args.workdir)
+    print_report(reports)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+from src.h2impact.data.cutout_io import export_netcdf, open_cutout
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Inspect a Zarr/NetCDF cutout lazily or export it as an atlite-compatible NetCDF."
+    )
+    parser.add_argument("cutout", help="Path to a .zarr store or .nc file")
+    parser.add_argument("--to-netcdf", metavar="OUT", help="Write the cutout as a single NetCDF file")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling per time chunk while exporting (default: 512)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.to_netcdf:
+        out = export_netcdf(args.cutout, args.to_netcdf, args.max_memory_mb)
+        print(f"✅ Exported {args.cutout} → {out}")
+        return
+    with open_cutout(args.cutout) as ds:
+        print(ds)
+
+if __name__ == "__main__":
+    main()
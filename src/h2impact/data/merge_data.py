@@ -1,12 +1,23 @@
 # Revised merge_cutout.py
 
+import argparse
 import xarray as xr
 from pathlib import Path
 import sys
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import FORMATS, output_path, remove_cutout, write_cutout
+from src.h2impact.data.encoding_profiles import PROFILES
+
+parser = argparse.ArgumentParser(description="Merge the instant/accum pair of one CDS download into an atlite cutout.")
+parser.add_argument("--prefix", default="be-05-2013-era5", help="Output name without suffix")
+parser.add_argument("--dir", default="cutouts", help="Folder with the extracted .nc files")
+parser.add_argument("--format", choices=FORMATS, default="netcdf", help="Output format (default: netcdf)")
+parser.add_argument("--encoding", choices=PROFILES, default="default", help="Encoding profile (default: default)")
+args = parser.parse_args()
 
 # 1) Define prefix & paths
-prefix = "be-05-2013-era5"
-cutout_dir = Path("cutouts")
+prefix = args.prefix
+cutout_dir = Path(args.dir)
 instant_file = cutout_dir / "data_stream-oper_stepType-instant.nc"
 accum_file   = cutout_dir / "data_stream-oper_stepType-accum.nc"
 
@@ -52,11 +63,11 @@ for var in ds.data_vars:
     ds[var].attrs['module'] = 'era5'
 
 # 9) Write out
-out = cutout_dir / f"{prefix}.nc"
-if out.exists():
-    out.unlink()
-ds.to_netcdf(out)
+out = output_path(cutout_dir / f"{prefix}.nc", args.format)
+remove_cutout(out)
+write_cutout(ds, out, args.format, profile=args.encoding)
 
+register_cutouts([out])
 print(f"✅ Merged & renamed cutout written to: {out}")
 print("Final dims:", ds.dims)
 print("Final data_vars and modules:")
@@ -1,24 +1,240 @@
+import argparse
+import json
+import os
+import sys
+import warnings
+import numpy as np
 import xarray as xr
 from pathlib import Path
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import (
+    FORMATS, append_cutout, open_cutout, output_path, peak_rss_mb, remove_cutout, same_content,
+    spatial_dims, time_chunk_for_budget, time_dim, write_cutout, write_time_slice,
+)
+from src.h2impact.data.encoding_profiles import PROFILES
+from src.h2impact.data.time_continuity import (
+    MAX_GAP, check_files, check_time, normalise_time, print_summary, repair_time, unfilled_gaps,
+    write_report,
+)
 
-# List your 12 merged monthly files
-files = [Path(f"de-2020-{month:02d}-merged.nc") for month in range(1, 13)]
+def merge_year(files, out, fmt="netcdf", profile="default", repair=False, max_gap=MAX_GAP):
+    """
+    Merge monthly cutouts into one yearly file, holding the whole year in memory.
 
-# Sanity check: print out any files that do NOT exist
-for f in files:
-    if not f.exists():
-        print(f"❌ Missing file: {f}")
+    With ``repair``, the time axis is renamed to ``time``, de-duplicated,
+    sorted and gaps up to ``max_gap`` are interpolated before writing.
+    """
+    ds = xr.open_mfdataset([str(f) for f in files], combine="by_coords", engine="netcdf4",
+                           preprocess=normalise_time if repair else None)
+    if repair:
+        ds = repair_time(ds, max_gap=max_gap)
+    ds.load()
+    return write_cutout(ds, out, fmt, profile=profile)
 
-# Merge the files into a single dataset
-ds = xr.open_mfdataset([str(f) for f in files], combine="by_coords", engine="netcdf4")
-ds.load()
+def merge_year_streaming(files, out, max_memory_mb=512, fmt="netcdf", profile="default", repair=False,
+                         max_gap=MAX_GAP):
+    """
+    Merge monthly cutouts into one yearly file time-chunk by time-chunk.
 
-# Save the merged yearly dataset
-out = Path("de-2020-merged-year.nc")
-if out.exists():
-    out.unlink()
-ds.to_netcdf(out)
+    The chunk length is chosen so that one chunk stays under ``max_memory_mb``,
+    and chunks are written one at a time, so peak memory no longer grows with
+    the number of months. Values, attributes and encodings are the same as
+    for ``merge_year``; only the HDF5 block layout differs, since chunks are
+    allocated in a different order (see ``same_content``).
+    """
+    with xr.open_dataset(files[0], engine="netcdf4") as first:
+        tdim = time_dim(first)
+        chunk = time_chunk_for_budget(first, max_memory_mb)
+    print(f"Streaming with {chunk} time steps per chunk (ceiling {max_memory_mb} MB)")
 
-print(f"✅ Merged yearly NetCDF written to: {out}")
+    with warnings.catch_warnings():
+        # A ceiling smaller than one stored chunk means reading inside it; that is intended
+        warnings.filterwarnings("ignore", message="The specified chunks separate the stored chunks")
+        ds = xr.open_mfdataset([str(f) for f in files], combine="by_coords", engine="netcdf4",
+                               chunks={tdim: chunk}, preprocess=normalise_time if repair else None)
+    if repair:
+        ds = repair_time(ds, max_gap=max_gap)
+    out = write_cutout(ds, out, fmt, profile=profile)
+    ds.close()
+    return out
 
+def manifest_path(out):
+    """Sidecar JSON listing the months contained in a yearly cutout."""
+    return Path(str(out) + ".manifest.json")
 
+def _save_manifest(out, manifest):
+    path = manifest_path(out)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def _check_compatible(ds, existing, source):
+    """Raise if ``ds`` cannot be written into ``existing`` (grid or variables differ)."""
+    for dim in spatial_dims(existing):
+        if dim not in ds.dims or ds.sizes[dim] != existing.sizes[dim] \
+                or not np.allclose(ds[dim].values, existing[dim].values):
+            raise ValueError(f"{source}: '{dim}' coordinates differ from the yearly cutout.")
+    if set(ds.data_vars) != set(existing.data_vars):
+        raise ValueError(f"{source}: variables {sorted(ds.data_vars)} differ from "
+                         f"{sorted(existing.data_vars)} in the yearly cutout.")
+
+def update_year(files, out, fmt="netcdf"):
+    """
+    Append new months to, or replace changed months in, an existing yearly cutout.
+
+    The manifest records each month's source file, size, mtime and time
+    index range. Unchanged months are skipped, new months after the last one
+    are appended and changed months are overwritten in place, so a monthly
+    refresh costs one month of I/O. The last month may also grow (a partial
+    month being completed). Any other change of length, a month that would
+    go before the end of the cutout, or an incompatible grid raises
+    ValueError; rebuild without --incremental in that case.
+    """
+    manifest_file = manifest_path(out)
+    if Path(out).exists() and manifest_file.exists():
+        with open(manifest_file, "r") as f:
+            manifest = json.load(f)
+    else:
+        if Path(out).exists():
+            print(f"No manifest for {out}, rebuilding it incrementally from scratch.")
+        remove_cutout(out)
+        manifest = {"format": fmt, "months": {}}
+
+    sources = []
+    for f in files:
+        if Path(f).exists():
+            with xr.open_dataset(f, engine="netcdf4") as ds:
+                sources.append((str(ds[time_dim(ds)].values[0])[:7], Path(f)))
+
+    for key, f in sorted(sources):
+        stat = f.stat()
+        fingerprint = {"source": str(f), "size": stat.st_size, "mtime": stat.st_mtime}
+        entry = manifest["months"].get(key)
+        if entry and all(entry[k] == v for k, v in fingerprint.items()):
+            print(f"Unchanged: {key}")
+            continue
+
+        with xr.open_dataset(f, engine="netcdf4") as ds:
+            ds.load()
+            tdim = time_dim(ds)
+            n = ds.sizes[tdim]
+            if not Path(out).exists():
+                start = 0
+                append_cutout(ds, out, fmt, first=True)
+                print(f"Created {out} with {key}")
+            else:
+                with open_cutout(out) as existing:
+                    _check_compatible(ds, existing, f)
+                    n_existing = existing.sizes[tdim]
+                    last_time = existing[tdim].values[-1]
+                if entry:
+                    start = entry["start"]
+                    grows_last = start + entry["n_times"] == n_existing and n > entry["n_times"]
+                    if n != entry["n_times"] and not grows_last:
+                        raise ValueError(f"{key} changed from {entry['n_times']} to {n} time steps; "
+                                         "rebuild the yearly cutout without --incremental.")
+                    write_time_slice(ds, out, fmt, start)
+                    print(f"Replaced {key}")
+                else:
+                    if ds[tdim].values[0] <= last_time:
+                        raise ValueError(f"{key} falls before the end of {out}; "
+                                         "rebuild the yearly cutout without --incremental.")
+                    start = n_existing
+                    append_cutout(ds, out, fmt)
+                    print(f"Appended {key}")
+
+        manifest["months"][key] = {**fingerprint, "start": start, "n_times": n}
+        _save_manifest(out, manifest)
+    return out
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge twelve monthly cutouts into one yearly NetCDF.")
+    parser.add_argument("--prefix", default="de-2020",
+                        help="Monthly files are <prefix>-<MM>-merged.nc (default: de-2020)")
+    parser.add_argument("--dir", default=".", help="Folder with the monthly files (default: .)")
+    parser.add_argument("--output", help="Output file (default: <prefix>-merged-year.nc)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Write time-chunk by time-chunk instead of loading the whole year")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Append new or replace changed months in an existing output (tracked in a manifest)")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling per time chunk in streaming mode (default: 512)")
+    parser.add_argument("--format", choices=FORMATS, default="netcdf",
+                        help="Output format; zarr writes a chunked store for time-window reads (default: netcdf)")
+    parser.add_argument("--encoding", choices=PROFILES, default="default",
+                        help="Encoding profile, e.g. lossless-zlib or packed-int16 (default: default)")
+    parser.add_argument("--repair-time", action="store_true",
+                        help="Rename valid_time to time, drop duplicate stamps, sort and interpolate short gaps")
+    parser.add_argument("--max-gap", default=MAX_GAP,
+                        help=f"Longest gap --repair-time interpolates, e.g. 3h (default: {MAX_GAP})")
+    parser.add_argument("--strict-time", action="store_true",
+                        help="Abort before merging if the inputs' time axis has gaps, duplicates or disorder")
+    parser.add_argument("--time-report", help="Optional JSON file for the time-axis check of inputs and output")
+    parser.add_argument("--compare-with",
+                        help="Reference yearly file to check the output against (values, attributes, encodings)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cutout_dir = Path(args.dir)
+
+    # List your 12 merged monthly files
+    files = [cutout_dir / f"{args.prefix}-{month:02d}-merged.nc" for month in range(1, 13)]
+
+    # Sanity check: print out any files that do NOT exist
+    for f in files:
+        if not f.exists():
+            print(f"❌ Missing file: {f}")
+
+    # Check the combined time axis of the inputs (time coordinates only)
+    time_report = {"inputs": check_files([f for f in files if f.exists()])}
+    print_summary(time_report["inputs"], "inputs")
+    if not time_report["inputs"]["ok"] and not args.repair_time:
+        if args.strict_time or time_report["inputs"]["mixed_time_dims"]:
+            sys.exit("❌ Time axis of the inputs is not continuous; rerun with --repair-time to fix it.")
+
+    # Save the merged yearly dataset
+    out = output_path(args.output or cutout_dir / f"{args.prefix}-merged-year.nc", args.format)
+
+    if args.incremental:
+        if args.repair_time:
+            print("[WARN] --repair-time is not applied in --incremental mode; months are written as they are")
+        if args.encoding != "default":
+            # Profiles such as packed-int16 derive their scaling from the whole year, which an update never sees
+            print(f"[WARN] --encoding {args.encoding} is not applied in --incremental mode; "
+                  "months are written with the default encoding")
+        update_year(files, out, args.format)
+    else:
+        # A full rebuild invalidates any manifest from earlier incremental runs
+        remove_cutout(manifest_path(out))
+        if args.streaming:
+            merge_year_streaming(files, out, args.max_memory_mb, args.format, args.encoding,
+                                 args.repair_time, args.max_gap)
+        else:
+            merge_year(files, out, args.format, args.encoding, args.repair_time, args.max_gap)
+        if args.repair_time:
+            time_report["unfilled_gaps"] = unfilled_gaps(time_report["inputs"], args.max_gap)
+            for g in time_report["unfilled_gaps"]:
+                print(f"[WARN] gap of {g['missing']} steps after {g['after']} is longer than {args.max_gap}; "
+                      "left as NaN")
+
+    with open_cutout(out) as merged:
+        time_report["output"] = check_time(merged)
+    print_summary(time_report["output"], "output")
+    if args.time_report:
+        write_report(time_report, args.time_report)
+
+    register_cutouts([out])
+    print(f"✅ Merged yearly cutout written to: {out}")
+    if args.compare_with:
+        if same_content(out, args.compare_with):
+            print(f"✅ Output matches {args.compare_with}")
+        else:
+            print(f"❌ Output differs from {args.compare_with}")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"Peak RSS: {rss:,.0f} MB")
+
+if __name__ == "__main__":
+    main()
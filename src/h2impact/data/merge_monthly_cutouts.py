@@ -1,41 +1,133 @@
 # merge_monthly_cutouts.py
 
+import argparse
+import json
+import time
 import xarray as xr
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import (
+    FORMATS, merge_instant_accum, output_path, peak_rss_mb, write_cutout,
+)
+from src.h2impact.data.encoding_profiles import PROFILES
 
-cutout_dir = Path(".")  # set to "." if you run the script inside the cutouts folder
+# de-2020-01-instant.nc → de-2020-01-merged.nc, the <prefix>-<MM>-merged.nc files merge_data_year reads
+NAME_FORMAT = "{code}-{year}-{month:02d}-{kind}.nc"
 
-# Atlite short variable names
-rename_map = {
-    "10m_u_component_of_wind":            "u10",
-    "10m_v_component_of_wind":            "v10",
-    "2m_temperature":                     "t2m",
-    "surface_solar_radiation_downwards":  "ssrd",
-}
+def month_paths(code, year, month, cutout_dir=".", name_format=NAME_FORMAT):
+    """
+    Instant, accum and merged file paths for one month.
 
-for month in range(1, 13):
-    mm = f"{month:02d}"
-    instant_file = cutout_dir / f"de-2020-{mm}-instant.nc"
-    accum_file   = cutout_dir / f"de-2020-{mm}-accum.nc"
-    out_file     = cutout_dir / f"de-2020-{mm}-merged.nc"
+    ``{code}`` in ``name_format`` is the lower-case code, ``{CODE}`` the upper-case one.
+    """
+    cutout_dir = Path(cutout_dir)
+    return tuple(
+        cutout_dir / name_format.format(code=code.lower(), CODE=code.upper(), year=year, month=month, kind=kind)
+        for kind in ("instant", "accum", "merged")
+    )
+
+def merge_month(code, year, month, cutout_dir=".", name_format=NAME_FORMAT, memory_budget_mb=None,
+                fmt="netcdf", profile="default"):
+    """
+    Merge one month's instant/accum pair into ``..._merged.nc``.
+
+    With ``memory_budget_mb`` the pair is written time-chunk by time-chunk
+    so the merge stays under the budget; otherwise it is loaded at once.
+    Returns a report dict with the status, timing and worker peak RSS.
+    """
+    instant_file, accum_file, out_file = month_paths(code, year, month, cutout_dir, name_format)
+    out_file = output_path(out_file, fmt)
+    report = {"month": month, "output": str(out_file), "status": "skipped",
+              "seconds": 0.0, "peak_rss_mb": None, "error": None}
 
     if not (instant_file.exists() and accum_file.exists()):
-        print(f"❌ Skipping month {mm}: Missing files.")
-        continue
+        report["error"] = "missing files"
+        print(f"❌ Skipping month {month:02d}: Missing files.")
+        return report
+
+    start = time.perf_counter()
+    try:
+        # Open and merge datasets
+        with xr.open_dataset(instant_file, engine="netcdf4") as ds_inst, \
+             xr.open_dataset(accum_file, engine="netcdf4") as ds_accu:
+            ds = merge_instant_accum(ds_inst, ds_accu)
+            if memory_budget_mb:
+                write_cutout(ds, out_file, fmt, memory_budget_mb, profile)
+            else:
+                write_cutout(ds.load(), out_file, fmt, profile=profile)
+    except Exception as e:
+        report.update(status="failed", error=str(e))
+        print(f"❌ Month {month:02d} failed: {e}")
+    else:
+        report["status"] = "merged"
+        print(f"✅ Merged {instant_file.name} + {accum_file.name} → {out_file.name}")
+    report["seconds"] = round(time.perf_counter() - start, 2)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+def merge_months_parallel(code, year, cutout_dir=".", months=range(1, 13), workers=4,
+                          memory_budget_mb=None, name_format=NAME_FORMAT, fmt="netcdf", profile="default"):
+    """
+    Fan the monthly merges out across a process pool.
+
+    Every month runs in a fresh worker process, so its peak RSS is that
+    month's alone rather than the peak of all months the worker ran before.
+    Returns one report dict per month, in month order.
+    """
+    try:
+        pool = ProcessPoolExecutor(max_workers=max(1, workers), max_tasks_per_child=1)
+    except TypeError:  # Python < 3.11: workers are reused, so peaks carry over between months
+        pool = ProcessPoolExecutor(max_workers=max(1, workers))
+    with pool:
+        futures = [
+            pool.submit(merge_month, code, year, m, cutout_dir, name_format, memory_budget_mb, fmt, profile)
+            for m in months
+        ]
+        reports = [f.result() for f in futures]
 
-    # Open and merge datasets
-    ds_inst = xr.open_dataset(instant_file, engine="netcdf4")
-    ds_accu = xr.open_dataset(accum_file,   engine="netcdf4")
-    ds = xr.merge([ds_inst, ds_accu]).load()
+    for r in reports:
+        if memory_budget_mb and r["peak_rss_mb"] and r["peak_rss_mb"] > memory_budget_mb:
+            print(f"[WARN] Month {r['month']:02d}: worker peak RSS {r['peak_rss_mb']:,.0f} MB "
+                  f"exceeded the {memory_budget_mb:,.0f} MB budget")
+    return reports
 
-    # Rename vars
-    found_rename = {k: v for k, v in rename_map.items() if k in ds}
-    ds = ds.rename(found_rename)
+def print_report(reports):
+    print(f"\n{'month':>5}  {'status':<8}  {'seconds':>8}  {'peak RSS (MB)':>13}")
+    for r in reports:
+        rss = f"{r['peak_rss_mb']:,.0f}" if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['month']:>5}  {r['status']:<8}  {r['seconds']:>8.1f}  {rss:>13}")
 
-    # Add Atlite "module" metadata
-    for var in ds.data_vars:
-        ds[var].attrs['module'] = 'era5'
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge monthly ERA5 instant/accum pairs in parallel.")
+    parser.add_argument("--code", required=True, help="Country code used in the file names (e.g., DE)")
+    parser.add_argument("--year", type=int, required=True, help="Year (e.g., 2020)")
+    parser.add_argument("--dir", default="cutouts", help="Folder with the monthly files (default: cutouts)")
+    parser.add_argument("--months", nargs="*", type=int, default=list(range(1, 13)),
+                        help="Months to merge (default: all 12)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes (default: 4)")
+    parser.add_argument("--memory-budget-mb", type=float,
+                        help="Per-worker memory budget; merges are written in time chunks to stay under it")
+    parser.add_argument("--name-format", default=NAME_FORMAT,
+                        help="File name pattern with code (lower case), CODE, year, month and kind "
+                             f"(default: {NAME_FORMAT})")
+    parser.add_argument("--format", choices=FORMATS, default="netcdf",
+                        help="Output format for the merged months (default: netcdf)")
+    parser.add_argument("--encoding", choices=PROFILES, default="default",
+                        help="Encoding profile, e.g. lossless-zlib or packed-int16 (default: default)")
+    parser.add_argument("--report", help="Optional JSON file for the per-month report")
+    return parser.parse_args()
 
-    ds.to_netcdf(out_file)
-    print(f"✅ Merged {instant_file.name} + {accum_file.name} → {out_file.name}")
+def main():
+    args = parse_args()
+    reports = merge_months_parallel(args.code, args.year, args.dir, args.months, args.workers,
+                                    args.memory_budget_mb, args.name_format, args.format, args.encoding)
+    register_cutouts(r["output"] for r in reports if r["status"] == "merged")
+    print_report(reports)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"Report written to {args.report}")
 
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
+import numpy as np
 import xarray as xr
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import argparse
 import sys
+from src.h2impact.data.cutout_catalog import CutoutCatalog, register_cutouts
+from src.h2impact.data.cutout_io import FORMATS, output_path, time_dim, write_cutout
+from src.h2impact.data.encoding_profiles import PROFILES
+from src.h2impact.data.time_continuity import (
+    MAX_GAP, check_files, check_time, normalise_time, print_summary, repair_time, unfilled_gaps,
+    write_report,
+)
+
+VALIDATION_MODES = ("full", "header")
 
 def is_valid_nc(nc_path):
     try:
@@ -12,6 +23,72 @@ def is_valid_nc(nc_path):
         print(f"[WARN] Skipping invalid file: {nc_path} ({e})")
         return False
 
+def check_header(nc_path, expected_vars=None, sample_chunks=0):
+    """
+    Validate a NetCDF file from its metadata and coordinates only.
+
+    Checks that the file opens, has a non-empty, strictly increasing time
+    axis and holds ``expected_vars``. With ``sample_chunks`` > 0, that many
+    evenly spaced time steps of every variable are read to catch truncated
+    or corrupt compressed data. Returns ``(ok, info)``; ``info`` holds the
+    dimensions, variables and time coverage, or the error.
+    """
+    info = {"path": str(nc_path)}
+    try:
+        with xr.open_dataset(nc_path) as ds:
+            tdim = time_dim(ds)
+            times = ds[tdim].values
+            info.update(
+                dims={d: n for d, n in ds.sizes.items() if d != tdim},
+                variables=sorted(ds.data_vars),
+                n_times=len(times),
+            )
+            if len(times) == 0:
+                raise ValueError("empty time axis")
+            info.update(start=str(times[0])[:19], end=str(times[-1])[:19])
+            if not (np.diff(times) > np.timedelta64(0)).all():
+                raise ValueError("time axis is not strictly increasing")
+            missing = set(expected_vars or ()) - set(ds.data_vars)
+            if missing:
+                raise ValueError(f"missing variables {sorted(missing)}")
+            if sample_chunks:
+                steps = np.unique(np.linspace(0, len(times) - 1, sample_chunks).astype(int))
+                for var in ds.data_vars.values():
+                    if tdim in var.dims:
+                        var.isel({tdim: steps}).values
+    except Exception as e:
+        info["error"] = str(e)
+        return False, info
+    return True, info
+
+def validate_files(nc_files, mode="full", expected_vars=None, sample_chunks=0, workers=4):
+    """
+    Return the subset of ``nc_files`` that pass validation, in input order.
+
+    ``header`` mode scans the files in parallel without loading data and
+    also rejects files whose grid or variables differ from the first valid
+    file, since those would fail the merge later on.
+    """
+    if mode == "full":
+        return [f for f in nc_files if is_valid_nc(f)]
+
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(check_header, nc_files,
+                                [expected_vars] * len(nc_files), [sample_chunks] * len(nc_files)))
+
+    valid, reference = [], None
+    for f, (ok, info) in zip(nc_files, results):
+        if ok and reference is None:
+            reference = info
+        elif ok and (info["dims"], info["variables"]) != (reference["dims"], reference["variables"]):
+            ok, info["error"] = False, f"grid/variables differ from {reference['path']}"
+        if ok:
+            valid.append(f)
+            print(f"[OK] {f}: {info['start']} → {info['end']} ({info['n_times']} steps)")
+        else:
+            print(f"[WARN] Skipping invalid file: {f} ({info['error']})")
+    return valid
+
 def main():
     parser = argparse.ArgumentParser(
         description="Merge NetCDF files along time dimension, user-friendly."
@@ -32,12 +109,68 @@ def main():
         "--files", nargs="*", type=str,
         help="Specific filenames to merge (overrides --months)"
     )
+    parser.add_argument(
+        "--format", choices=FORMATS, default="netcdf",
+        help="Output format; zarr writes a chunked store (default: netcdf)"
+    )
+    parser.add_argument(
+        "--encoding", choices=PROFILES, default="default",
+        help="Encoding profile for the output, e.g. lossless-zlib or packed-int16 (default: default)"
+    )
+    parser.add_argument(
+        "--validation", choices=VALIDATION_MODES, default="full",
+        help="full loads every file; header checks metadata and time coverage only (default: full)"
+    )
+    parser.add_argument(
+        "--expect-vars", nargs="*",
+        help="Variables every file must contain in header mode (e.g. u10 v10 t2m ssrd)"
+    )
+    parser.add_argument(
+        "--sample-chunks", type=int, default=0,
+        help="In header mode, also read this many evenly spaced time steps per variable"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4,
+        help="Parallel processes for header validation (default: 4)"
+    )
+    parser.add_argument(
+        "--use-catalog", action="store_true",
+        help="Select --months and order files by the time ranges in the folder's cutout catalog"
+    )
+    parser.add_argument(
+        "--repair-time", action="store_true",
+        help="Rename valid_time to time, drop duplicate stamps, sort and interpolate short gaps"
+    )
+    parser.add_argument(
+        "--max-gap", default=MAX_GAP,
+        help=f"Longest gap --repair-time interpolates, e.g. 3h (default: {MAX_GAP})"
+    )
+    parser.add_argument(
+        "--strict-time", action="store_true",
+        help="Abort if the combined time axis has gaps, duplicates or disorder"
+    )
+    parser.add_argument(
+        "--time-report", type=str,
+        help="Optional JSON file for the time-axis check of inputs and output"
+    )
+    parser.add_argument(
+        "--validate-only", action="store_true",
+        help="Only validate the selected files, do not merge"
+    )
     args = parser.parse_args()
 
     input_folder = Path(args.input_folder)
 
     if args.files:
         nc_files = [Path(f) for f in args.files]
+    elif args.use_catalog:
+        # Select and order files from the catalog, without opening unchanged files
+        catalog = CutoutCatalog(input_folder)
+        entries = catalog.update()
+        names = [n for n in catalog.overlapping() if n.endswith(".nc") and n != Path(args.output_file).name]
+        if args.months:
+            names = [n for n in names if int(entries[n]["time"][0][5:7]) in args.months]
+        nc_files = [input_folder / n for n in sorted(names, key=lambda n: entries[n]["time"][0])]
     elif args.months:
         # Select files whose month matches any given in --months
         nc_files = [
@@ -47,17 +180,41 @@ def main():
     else:
         nc_files = sorted(input_folder.glob("*.nc"))
 
-    valid_files = [str(f) for f in nc_files if is_valid_nc(f)]
+    valid_files = [str(f) for f in validate_files(nc_files, args.validation, args.expect_vars,
+                                                  args.sample_chunks, args.workers)]
     if not valid_files:
         print("No valid .nc files to merge.")
         sys.exit(1)
+    time_report = {"inputs": check_files(valid_files)}
+    print_summary(time_report["inputs"], "inputs")
+    if args.validate_only:
+        print(f"{len(valid_files)} of {len(nc_files)} files are valid.")
+        if args.time_report:
+            write_report(time_report, args.time_report)
+        return
+    if not time_report["inputs"]["ok"] and not args.repair_time:
+        if args.strict_time or time_report["inputs"]["mixed_time_dims"]:
+            print("Time axis of the inputs is not continuous; rerun with --repair-time to fix it.")
+            sys.exit(1)
 
     print(f"Merging {len(valid_files)} files:")
     for f in valid_files:
         print(f"  {f}")
-    ds_merged = xr.open_mfdataset(valid_files, combine="by_coords")
-    ds_merged.to_netcdf(args.output_file)
-    print(f"Successfully merged to: {args.output_file}")
+    ds_merged = xr.open_mfdataset(valid_files, combine="by_coords",
+                                  preprocess=normalise_time if args.repair_time else None)
+    if args.repair_time:
+        ds_merged = repair_time(ds_merged, max_gap=args.max_gap)
+        time_report["unfilled_gaps"] = unfilled_gaps(time_report["inputs"], args.max_gap)
+        for g in time_report["unfilled_gaps"]:
+            print(f"[WARN] gap of {g['missing']} steps after {g['after']} is longer than {args.max_gap}; left as NaN")
+    out = write_cutout(ds_merged, output_path(args.output_file, args.format), args.format,
+                       profile=args.encoding)
+    time_report["output"] = check_time(ds_merged)
+    print_summary(time_report["output"], "output")
+    if args.time_report:
+        write_report(time_report, args.time_report)
+    register_cutouts([out])
+    print(f"Successfully merged to: {out}")
 
 if __name__ == "__main__":
     main()
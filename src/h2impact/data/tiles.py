@@ -0,0 +1,148 @@
+"""
+Tile-based, deduplicated ERA5 downloads for multi-country requests.
+
+The union of the requested PREDEFINED_AREAS is split into a fixed,
+globally aligned lat/lon tile grid. Every tile is fetched once per month
+and cached under ``cutouts/tiles``; region cutouts are then assembled from
+the cached tiles. Download volume therefore grows with the union area of
+the requested countries rather than with the sum of their bounding boxes,
+and later requests reuse any tile that is already cached.
+
+Tiles do not overlap: a tile covers the native 0.25° ERA5 grid points in
+``[south, south + size)`` × ``[west, west + size)``.
+
+Usage:
+  python -m src.h2impact.data.tiles --year 2020 --regions germany netherlands belgium --months 1 2
+"""
+import argparse
+import math
+from pathlib import Path
+import xarray as xr
+from src.h2impact.constants import PREDEFINED_AREAS, COUNTRY_CODES
+from src.h2impact.data.cds_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_GB, CDSCache, caching_client_factory
+from src.h2impact.data.cds_payload import open_payload
+from src.h2impact.data.cutout_catalog import register_cutouts
+from src.h2impact.data.cutout_io import FORMATS, bbox_slice, write_cutout
+from src.h2impact.data.download_era5_cutout import VARIABLES, build_request
+from src.h2impact.data.download_queue import run_queue
+
+TILE_DEG = 5.0
+GRID_RES = 0.25
+TILE_DIR = "cutouts/tiles"
+
+
+def tiles_for_area(area, tile_deg=TILE_DEG):
+    """
+    Set of ``(lat_index, lon_index)`` tiles covering a ``(N, W, S, E)`` box, edges included.
+
+    A north or east edge on the tile grid lies in the next tile, since tiles
+    exclude their own north and east edges.
+    """
+    north, west, south, east = area
+    lats = range(math.floor(south / tile_deg), math.floor(north / tile_deg) + 1)
+    lons = range(math.floor(west / tile_deg), math.floor(east / tile_deg) + 1)
+    return {(i, j) for i in lats for j in lons}
+
+
+def tile_area(tile, tile_deg=TILE_DEG):
+    """CDS ``[N, W, S, E]`` area of a tile, excluding its north and east edges."""
+    i, j = tile
+    south, west = i * tile_deg, j * tile_deg
+    return [south + tile_deg - GRID_RES, west, south, west + tile_deg - GRID_RES]
+
+
+def tile_path(tile, year, month, tile_dir=TILE_DIR, tile_deg=TILE_DEG):
+    i, j = tile
+    return Path(tile_dir) / f"tile_{tile_deg:g}deg_lat{i * tile_deg:g}_lon{j * tile_deg:g}_{year}_{month:02d}.nc"
+
+
+def plan_tiles(regions, tile_deg=TILE_DEG):
+    """Tiles covering every region, and the deduplicated union of them."""
+    per_region = {r: tiles_for_area(PREDEFINED_AREAS[r], tile_deg) for r in regions}
+    union = set().union(*per_region.values())
+    return per_region, union
+
+
+def download_tiles(regions, year, months, tile_dir=TILE_DIR, tile_deg=TILE_DEG, workers=4,
+                   client_factory=None):
+    """
+    Fetch every tile of the regions' union once per month through the download queue.
+
+    Tiles already in the ledger of ``tile_dir`` are skipped.
+    """
+    per_region, union = plan_tiles(regions, tile_deg)
+    n_separate = sum(len(t) for t in per_region.values())
+    print(f"{len(union)} tiles cover {len(regions)} regions "
+          f"({n_separate} if each region were fetched separately)")
+    jobs = [
+        {
+            "target": str(tile_path(tile, year, m, tile_dir, tile_deg)),
+            "request": build_request(VARIABLES, tile_area(tile, tile_deg), year, m),
+        }
+        for tile in sorted(union) for m in months
+    ]
+    return run_queue(jobs, ledger_path=Path(tile_dir) / "download_ledger.json", workers=workers,
+                     client_factory=client_factory)
+
+
+def assemble_region(region, year, month, out, tile_dir=TILE_DIR, tile_deg=TILE_DEG, fmt="netcdf"):
+    """Build one region's monthly cutout from cached tiles."""
+    area = PREDEFINED_AREAS[region]
+    paths = [tile_path(t, year, month, tile_dir, tile_deg) for t in sorted(tiles_for_area(area, tile_deg))]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Missing cached tiles for {region}: {', '.join(map(str, missing))}")
+
+    ds = xr.combine_by_coords([open_payload(p) for p in paths], combine_attrs="override")
+    ds = ds.sel(bbox_slice(ds, area))
+    return write_cutout(ds, out, fmt)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download ERA5 once per tile and assemble region cutouts.")
+    parser.add_argument("--year", type=int, required=True, help="Target year (e.g., 2020)")
+    parser.add_argument("--regions", type=str.lower, nargs="+", choices=PREDEFINED_AREAS.keys(), required=True,
+                        help="Country/region names (e.g., germany netherlands)")
+    parser.add_argument("--months", nargs="*", type=int, default=list(range(1, 13)),
+                        help="Months to fetch (default: all 12)")
+    parser.add_argument("--tile-deg", type=float, default=TILE_DEG,
+                        help=f"Tile edge length in degrees, a multiple of {GRID_RES} (default: {TILE_DEG:g})")
+    parser.add_argument("--tile-dir", default=TILE_DIR, help=f"Tile cache folder (default: {TILE_DIR})")
+    parser.add_argument("--out-dir", default="cutouts", help="Folder for the assembled cutouts (default: cutouts)")
+    parser.add_argument("--format", choices=FORMATS, default="netcdf", help="Output format (default: netcdf)")
+    parser.add_argument("--workers", type=int, default=4, help="CDS requests in flight (default: 4)")
+    parser.add_argument("--download-only", action="store_true", help="Only fill the tile cache")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Shared CDS request cache (default: $H2IMPACT_CDS_CACHE or ~/.cache/h2impact/cds)")
+    parser.add_argument("--cache-max-gb", type=float, default=DEFAULT_MAX_GB,
+                        help=f"Size cap of the CDS request cache (default: {DEFAULT_MAX_GB:g})")
+    parser.add_argument("--no-cache", action="store_true", help="Always request from CDS")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.tile_deg % GRID_RES:
+        raise ValueError(f"--tile-deg must be a multiple of {GRID_RES}.")
+
+    client_factory = None
+    if not args.no_cache:
+        client_factory = caching_client_factory(CDSCache(args.cache_dir, args.cache_max_gb))
+    results = download_tiles(args.regions, args.year, args.months, args.tile_dir, args.tile_deg, args.workers,
+                             client_factory)
+    if args.download_only or "failed" in results.values():
+        return
+
+    outputs = []
+    for region in args.regions:
+        code = COUNTRY_CODES[region]
+        for m in args.months:
+            out = Path(args.out_dir) / f"{code}_{args.year}_{m:02d}_merged.nc"
+            out = assemble_region(region, args.year, m, out, args.tile_dir, args.tile_deg, args.format)
+            print(f"✅ Assembled {region} {args.year}-{m:02d} → {out}")
+            outputs.append(out)
+    register_cutouts(outputs)
+
+
+if __name__ == "__main__":
+    main()
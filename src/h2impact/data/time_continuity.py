@@ -0,0 +1,222 @@
+"""
+Time-axis continuity checks and gap repair for merged cutouts.
+
+The check works on the time coordinate alone (a few kB per year of hourly
+data) with vectorised numpy, so it runs in well under a second. It reports
+missing steps (gaps), duplicate time stamps, steps that go backwards, and
+input files that name their time axis differently (``valid_time`` from new
+CDS downloads vs. ``time``).
+
+Repair renames ``valid_time`` to ``time``, drops duplicate stamps (first
+one wins), sorts, reindexes onto the regular axis and linearly
+interpolates gaps up to ``max_gap``. Longer gaps stay NaN; the merge
+scripts list them under ``unfilled_gaps`` in their time report.
+
+Usage:
+  python -m src.h2impact.data.time_continuity cutouts/de-2020-merged-year.nc --report time_report.json
+"""
+import argparse
+import json
+import numpy as np
+import pandas as pd
+import xarray as xr
+from src.h2impact.data.cutout_io import open_cutout, time_dim
+
+FREQ = "1h"
+MAX_GAP = "3h"
+# Cap on the number of listed gaps/duplicates; counts are always complete
+MAX_LISTED = 50
+
+
+def normalise_time(ds):
+    """Rename ERA5's ``valid_time`` axis to ``time``, as atlite expects."""
+    if "valid_time" in ds.dims:
+        ds = ds.swap_dims({"valid_time": "time"}) if "time" in ds.coords else ds.rename({"valid_time": "time"})
+    elif "valid_time" in ds.coords:
+        ds = ds.rename({"valid_time": "time"})
+    return ds
+
+
+def _stamp(t):
+    return str(np.datetime_as_string(t, unit="s"))
+
+
+def check_times(times, freq=FREQ):
+    """
+    Continuity report for an array of time stamps.
+
+    ``ok`` is True when the stamps are strictly increasing with exactly one
+    ``freq`` between neighbours.
+    """
+    times = np.asarray(times, dtype="datetime64[ns]")
+    step = np.timedelta64(pd.Timedelta(freq))
+    report = {"n_times": int(times.size), "freq": freq}
+    if times.size == 0:
+        return {**report, "ok": False, "error": "empty time axis"}
+
+    deltas = np.diff(times)
+    backwards = np.flatnonzero(deltas < np.timedelta64(0))
+    unique, counts = np.unique(times, return_counts=True)
+    duplicates = unique[counts > 1]
+
+    # Gaps and irregular steps are judged on the sorted, de-duplicated axis
+    udeltas = np.diff(unique)
+    gap_idx = np.flatnonzero(udeltas > step)
+    off_grid = int(np.count_nonzero(udeltas % step))
+    expected = int((unique[-1] - unique[0]) // step) + 1
+    missing = (udeltas[gap_idx] // step - 1).astype(int)
+
+    report.update(
+        start=_stamp(unique[0]),
+        end=_stamp(unique[-1]),
+        expected=expected,
+        missing_steps=int(missing.sum()),
+        n_gaps=int(gap_idx.size),
+        gaps=[
+            {"after": _stamp(unique[i]), "before": _stamp(unique[i + 1]), "missing": int(m)}
+            for i, m in zip(gap_idx[:MAX_LISTED], missing[:MAX_LISTED])
+        ],
+        n_duplicates=int((counts[counts > 1] - 1).sum()),
+        duplicates=[_stamp(t) for t in duplicates[:MAX_LISTED]],
+        n_backwards=int(backwards.size),
+        backwards_at=[_stamp(times[i + 1]) for i in backwards[:MAX_LISTED]],
+        off_grid_steps=off_grid,
+    )
+    report["ok"] = not (report["missing_steps"] or report["n_duplicates"] or backwards.size or off_grid)
+    return report
+
+
+def check_time(ds, freq=FREQ):
+    """Continuity report for the time axis of a dataset."""
+    tdim = time_dim(ds)
+    return {"time_dim": tdim, **check_times(ds[tdim].values, freq)}
+
+
+def check_files(files, freq=FREQ):
+    """
+    Continuity report for the combined time axes of files that are about to be merged.
+
+    Only the time coordinates are read. ``time_dims`` counts the time axis
+    names; more than one name means the files cannot be combined as is.
+    """
+    times, names = [], {}
+    for f in files:
+        with xr.open_dataset(f) as ds:
+            tdim = time_dim(ds)
+            names[tdim] = names.get(tdim, 0) + 1
+            times.append(ds[tdim].values)
+    report = check_times(np.concatenate(times) if times else [], freq)
+    report["time_dims"] = names
+    report["mixed_time_dims"] = len(names) > 1
+    report["ok"] = report["ok"] and not report["mixed_time_dims"]
+    return report
+
+
+def _interpolate_onto(ds, axis, max_gap=MAX_GAP):
+    """
+    Linear interpolation of a sorted, duplicate-free ``ds`` onto ``axis``.
+
+    Each target step takes its valid neighbours by index, so the gather is
+    one vectorised ``isel`` per side and lazily opened inputs stay lazy.
+    Steps inside gaps longer than ``max_gap`` become NaN.
+    """
+    tdim = time_dim(ds)
+    orig = ds[tdim].values.astype("datetime64[ns]")
+    target = np.asarray(axis, dtype="datetime64[ns]")
+    pos = np.searchsorted(orig, target)
+    nxt = np.minimum(pos, orig.size - 1)
+    present = orig[nxt] == target
+    prv = np.where(present, nxt, np.maximum(pos - 1, 0))
+    span = orig[nxt] - orig[prv]
+    weight = np.where(span > np.timedelta64(0), (target - orig[prv]) / np.maximum(span, np.timedelta64(1)), 0.0)
+    filled = present | (span <= np.timedelta64(pd.Timedelta(max_gap)))
+
+    weight = xr.DataArray(weight, dims=[tdim])
+    valid = xr.DataArray(filled, dims=[tdim])
+    out = {}
+    for name, var in ds.data_vars.items():
+        if tdim not in var.dims:
+            continue
+        lo, hi = var.isel({tdim: prv}).drop_vars(tdim), var.isel({tdim: nxt}).drop_vars(tdim)
+        value = (lo + (hi - lo) * weight).where(valid).astype(var.dtype)
+        out[name] = value.assign_attrs(var.attrs).assign_coords({tdim: target})
+    static = ds.drop_vars(list(out) + [tdim]).drop_dims(tdim, errors="ignore")
+    return xr.Dataset(out, attrs=ds.attrs).assign_coords({tdim: target}).merge(static)
+
+
+def repair_time(ds, freq=FREQ, max_gap=MAX_GAP):
+    """
+    Return ``ds`` on a regular, duplicate-free time axis named ``time``.
+
+    Gaps up to ``max_gap`` are linearly interpolated; longer ones stay NaN.
+    """
+    ds = normalise_time(ds)
+    before = check_time(ds, freq)
+    if before["ok"]:
+        return ds
+
+    tdim = time_dim(ds)
+    if before["n_duplicates"]:
+        ds = ds.drop_duplicates(tdim, keep="first")
+        print(f"Dropped {before['n_duplicates']} duplicate time stamps")
+    if before["n_backwards"]:
+        ds = ds.sortby(tdim)
+        print("Sorted the time axis")
+    if before["missing_steps"] or before["off_grid_steps"]:
+        axis = pd.date_range(before["start"], before["end"], freq=freq)
+        ds = _interpolate_onto(ds, axis, max_gap)
+        print(f"Reindexed onto {len(axis)} {freq} steps, interpolating gaps up to {max_gap}")
+    return ds
+
+
+def unfilled_gaps(before, max_gap=MAX_GAP, freq=FREQ):
+    """Gaps from a pre-repair report that ``repair_time`` leaves as NaN."""
+    limit = pd.Timedelta(max_gap) // pd.Timedelta(freq)
+    # _interpolate_onto measures a gap from the last valid to the next valid step
+    return [g for g in before["gaps"] if g["missing"] + 1 > limit]
+
+
+def print_summary(report, label="time axis"):
+    if report.get("error"):
+        print(f"❌ {label}: {report['error']}")
+        return
+    status = "✅" if report["ok"] else "⚠️"
+    print(f"{status} {label}: {report['start']} → {report['end']}, {report['n_times']}/{report['expected']} steps, "
+          f"{report['missing_steps']} missing in {report['n_gaps']} gaps, {report['n_duplicates']} duplicates, "
+          f"{report['n_backwards']} backwards")
+    for g in report["gaps"][:5]:
+        print(f"    gap: {g['missing']} steps between {g['after']} and {g['before']}")
+    if report.get("mixed_time_dims"):
+        print(f"    mixed time axis names: {report['time_dims']}")
+
+
+def write_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Time report written to {path}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check a cutout's time axis for gaps, duplicates and ordering.")
+    parser.add_argument("cutouts", nargs="+",
+                        help="Cutout (.nc or .zarr); several files are checked as one combined axis")
+    parser.add_argument("--freq", default=FREQ, help=f"Expected time step (default: {FREQ})")
+    parser.add_argument("--report", help="Optional JSON file for the report")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if len(args.cutouts) > 1:
+        report = check_files(args.cutouts, args.freq)
+    else:
+        with open_cutout(args.cutouts[0]) as ds:
+            report = check_time(ds, args.freq)
+    print_summary(report, " + ".join(args.cutouts) if len(args.cutouts) < 4 else f"{len(args.cutouts)} files")
+    if args.report:
+        write_report(report, args.report)
+    raise SystemExit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Capacity-factor error of PyPSA-Eur's time segmentation, computed on the cutout.
+
+A scenario with ``clustering.temporal.resolution_elec: <N>seg`` is solved
+on N variable-length segments that PyPSA-Eur builds with tsam. This module
+repeats that aggregation on the cutout the scenario will use, so the loss
+of detail is known before the solve. The cutout is reduced to two
+region-mean hourly capacity-factor proxies:
+  wind   generic turbine power curve on hub-height wind speed (cut-in 3,
+         rated 12, cut-out 25 m s**-1)
+  solar  irradiance relative to 1000 W m**-2
+
+Both are segmented together with the same tsam settings PyPSA-Eur uses
+(one typical period spanning the whole range, N segments). Each segment's
+value is held over its duration, and the report compares that series with
+the full-resolution one per technology: mean, variance and duration curve.
+PyPSA-Eur segments its own availability and load series, so the figures
+are an estimate of its error, not a replica.
+
+Usage:
+  python -m src.h2impact.data.time_segments cutouts/de-2020-merged-year.nc --segments 100 --report seg.json
+"""
+import argparse
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.h2impact.data.cutout_io import is_zarr, open_cutout, spatial_dims, time_chunk_for_budget, time_dim
+from src.h2impact.data.derived_variables import hub_height_wind, irradiance, wind_speed
+
+HUB_HEIGHT = 100
+CUT_IN, RATED, CUT_OUT = 3.0, 12.0, 25.0
+STC_IRRADIANCE = 1000.0
+# Relative errors of variance or duration curve above this are flagged
+MAX_ERROR_PCT = 10.0
+
+
+def capacity_factor_profiles(ds):
+    """Hourly region-mean wind and solar capacity-factor proxies as a DataFrame."""
+    tdim = time_dim(ds)
+    lat, lon = spatial_dims(ds)
+    wind = ds[f"wnd{HUB_HEIGHT}m"] if f"wnd{HUB_HEIGHT}m" in ds else hub_height_wind(wind_speed(ds), HUB_HEIGHT)
+    power = ((wind ** 3 - CUT_IN ** 3) / (RATED ** 3 - CUT_IN ** 3)).clip(0, 1).where(wind < CUT_OUT, 0)
+    influx = ds["influx"] if "influx" in ds else irradiance(ds)
+    solar = (influx / STC_IRRADIANCE).clip(0, 1)
+    profiles = {
+        "wind": power.mean([lat, lon]).values,
+        "solar": solar.mean([lat, lon]).values,
+    }
+    return pd.DataFrame(profiles, index=pd.DatetimeIndex(ds[tdim].values, name="time")).astype("float64")
+
+
+def cutout_profiles(path, max_memory_mb=512):
+    """``capacity_factor_profiles`` of the cutout at ``path``, read in time chunks under ``max_memory_mb``."""
+    with open_cutout(path) as probe:
+        chunk = time_chunk_for_budget(probe, max_memory_mb)
+        tdim = time_dim(probe)
+    with open_cutout(path, chunks={} if is_zarr(path) else {tdim: chunk}) as ds:
+        return capacity_factor_profiles(ds)
+
+
+def segment_profiles(profiles, segments):
+    """
+    ``profiles`` aggregated into ``segments`` segments as PyPSA-Eur does, back on the original steps.
+
+    Returns the segmented series (each segment's value repeated over its
+    duration) and the segment durations in time steps.
+    """
+    import tsam.timeseriesaggregation as tsam
+
+    if not 0 < segments <= len(profiles):
+        raise ValueError(f"Need between 1 and {len(profiles)} segments, got {segments}.")
+    step_hours = (profiles.index[1] - profiles.index[0]) / pd.Timedelta("1h") if len(profiles) > 1 else 1.0
+    agg = tsam.TimeSeriesAggregation(
+        profiles.copy(),  # tsam reorders the columns of its input in place
+        resolution=step_hours,
+        hoursPerPeriod=len(profiles) * step_hours,
+        noTypicalPeriods=1,
+        noSegments=int(segments),
+        segmentation=True,
+    )
+    segmented = agg.createTypicalPeriods()
+    durations = segmented.index.get_level_values("Segment Duration").to_numpy(dtype=int)
+    values = np.repeat(segmented[profiles.columns].to_numpy(), durations, axis=0)
+    return pd.DataFrame(values, index=profiles.index, columns=profiles.columns), durations
+
+
+def _pct(value, reference):
+    return round(100 * float((value - reference) / reference), 2) if reference else 0.0
+
+
+def cf_error(full, segmented):
+    """Mean, variance and duration-curve error of ``segmented`` against ``full``, per column."""
+    report = {}
+    for name in full.columns:
+        f, s = full[name].to_numpy(), segmented[name].to_numpy()
+        duration_rmse = float(np.sqrt(np.mean((np.sort(f)[::-1] - np.sort(s)[::-1]) ** 2)))
+        report[name] = {
+            "mean_full": round(float(f.mean()), 4),
+            "mean_segmented": round(float(s.mean()), 4),
+            "mean_error_pct": _pct(s.mean(), f.mean()),
+            "var_full": round(float(f.var()), 5),
+            "var_segmented": round(float(s.var()), 5),
+            "var_error_pct": _pct(s.var(), f.var()),
+            "duration_curve_rmse": round(duration_rmse, 4),
+            # RMSE relative to the mean capacity factor
+            "duration_curve_error_pct": round(100 * duration_rmse / f.mean(), 2) if f.mean() else 0.0,
+        }
+    return report
+
+
+def segmentation_report(profiles, segments, start=None, end=None, max_error_pct=MAX_ERROR_PCT):
+    """
+    Error report of segmenting ``profiles`` between ``start`` and ``end`` into ``segments`` segments.
+
+    ``end`` is exclusive, as in PyPSA-Eur's snapshots. ``warnings`` lists
+    every technology whose variance or duration-curve error exceeds
+    ``max_error_pct``.
+    """
+    index = profiles.index
+    mask = np.ones(len(index), dtype=bool)
+    if start is not None:
+        mask &= index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= index < pd.Timestamp(end)
+    full = profiles[mask]
+    if full.empty:
+        raise ValueError(f"The cutout has no time steps between {start} and {end}.")
+
+    segmented, durations = segment_profiles(full, segments)
+    errors = cf_error(full, segmented)
+    warnings = [
+        f"{name}: {label} error {stats[key]:+.1f}% exceeds {max_error_pct:g}%"
+        for name, stats in errors.items()
+        for key, label in (("var_error_pct", "variance"), ("duration_curve_error_pct", "duration-curve"))
+        if abs(stats[key]) > max_error_pct
+    ]
+    return {
+        "start": full.index[0].strftime("%Y-%m-%d %H:%M"),
+        "end": full.index[-1].strftime("%Y-%m-%d %H:%M"),
+        "time_steps": len(full),
+        "segments": int(segments),
+        "reduction": round(len(full) / segments, 1),
+        "segment_hours": {"min": int(durations.min()), "max": int(durations.max())},
+        "cf_error": errors,
+        "max_error_pct": max_error_pct,
+        "warnings": warnings,
+    }
+
+
+def report_path(config_path):
+    """Sidecar JSON of a scenario config, e.g. ``config_H2_de-2020.segments.json``."""
+    return Path(config_path).with_suffix(".segments.json")
+
+
+def write_report(report, path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def scenario_report(profiles, config, config_path, max_error_pct=MAX_ERROR_PCT, verbose=True):
+    """
+    Segmentation report for the snapshots and ``<N>seg`` resolution of ``config``.
+
+    The report is written next to ``config_path`` (see ``report_path``);
+    warnings are always printed, the summary only with ``verbose``.
+    """
+    segments = int(config["clustering"]["temporal"]["resolution_elec"][:-len("seg")])
+    snapshots = config["snapshots"]
+    report = segmentation_report(profiles, segments, snapshots["start"], snapshots["end"], max_error_pct)
+    report["config"] = str(config_path)
+    write_report(report, report_path(config_path))
+    if verbose:
+        print_summary(report, Path(config_path).name)
+    else:
+        for warning in report["warnings"]:
+            print(f"[WARN] {Path(config_path).name}: {warning}")
+    return report
+
+
+def print_summary(report, label="segments"):
+    print(f"{label}: {report['time_steps']} steps → {report['segments']} segments "
+          f"({report['reduction']:g}× fewer, {report['segment_hours']['min']}–{report['segment_hours']['max']} h)")
+    for name, stats in report["cf_error"].items():
+        print(f"  {name:<5} mean CF {stats['mean_full']:.3f} → {stats['mean_segmented']:.3f}, "
+              f"variance {stats['var_error_pct']:+.1f}%, duration curve {stats['duration_curve_error_pct']:.1f}%")
+    for warning in report["warnings"]:
+        print(f"[WARN] {label}: {warning}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Capacity-factor error of segmenting a cutout's time axis as PyPSA-Eur does (tsam)."
+    )
+    parser.add_argument("cutout", help="Merged cutout (.nc or .zarr)")
+    parser.add_argument("--segments", type=int, required=True, help="Number of time segments (e.g., 100)")
+    parser.add_argument("--start", help="First snapshot (default: start of the cutout)")
+    parser.add_argument("--end", help="Snapshot end, exclusive (default: end of the cutout)")
+    parser.add_argument("--max-error-pct", type=float, default=MAX_ERROR_PCT,
+                        help=f"Warn above this variance or duration-curve error (default: {MAX_ERROR_PCT:g})")
+    parser.add_argument("--report", help="Optional JSON file for the report")
+    parser.add_argument("--max-memory-mb", type=float, default=512,
+                        help="Memory ceiling per time chunk (default: 512)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    profiles = cutout_profiles(args.cutout, args.max_memory_mb)
+    try:
+        report = segmentation_report(profiles, args.segments, args.start, args.end, args.max_error_pct)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    report["cutout"] = str(args.cutout)
+    print_summary(report, Path(args.cutout).name)
+    if args.report:
+        write_report(report, args.report)
+        print(f"Report written to {args.report}")
+    raise SystemExit(1 if report["warnings"] else 0)
+
+
+if __name__ == "__main__":
+    main()
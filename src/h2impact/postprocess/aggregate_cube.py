@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Daily, monthly and yearly aggregates of link and store time series, stored next to a result network.
+
+The cube is built once per result file by one pass over the hourly data and
+saved as a Parquet sidecar (``<network>.cube.parquet``). Period questions —
+energy through each link in a month, a store's peak level in a year — are
+then answered from a handful of row groups instead of rescanning the hourly
+frame.
+The sidecar is rebuilt automatically when the result file changes.
+``--cube-dir`` keeps the cubes in a cache directory instead of next to the
+results; ``--no-cube`` (or a location that cannot be written) makes the
+scripts aggregate the hourly data on the fly instead.
+
+One row per component list, attribute, component, granularity and period:
+
+  list, attr, name   e.g. ``links``, ``p0``, ``DE0 H2 Electrolysis``
+  freq, period       ``D``/``M``/``Y`` and the period's first day
+  sum, abs_sum       sum of the values and of their absolute values
+  mean, max, count   mean, maximum and number of snapshots
+
+Sums are plain sums over snapshots, as in the postprocess scripts (MWh for
+hourly results); snapshot weightings are not applied.
+
+Usage:
+  python aggregate_cube.py --input base_s_5_elec_.nc
+  python aggregate_cube.py --input base_s_5_elec_.nc --query links p0 --freq M --period 2020-01
+  python aggregate_cube.py --input base_s_5_elec_.nc --cube-dir ~/.cache/h2impact
+
+Dependencies:
+  pip install xarray netCDF4 pandas pyarrow
+"""
+import os
+import sys
+import hashlib
+import time
+import argparse
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.network_loader import load_network
+
+SERIES = {"links": ["p0"], "stores": ["e"]}
+FREQS = ("D", "M", "Y")
+STATS = ("sum", "abs_sum", "mean", "max", "count")
+SOURCE_KEY = b"h2impact_cube_source"
+# Small row groups let a query skip everything outside its list, attribute and granularity
+ROW_GROUP_SIZE = 50_000
+
+
+def cube_path(network_path, cube_dir=None):
+    """
+    Path of the cube of ``network_path``: the sidecar ``base_s_5_elec_.cube.parquet``,
+    or a file in ``cube_dir`` named after the result's stem and absolute path.
+    """
+    path = Path(network_path)
+    if cube_dir is None:
+        return path.with_name(f"{path.stem}.cube.parquet")
+    key = hashlib.sha1(str(path.resolve()).encode()).hexdigest()[:10]
+    return Path(cube_dir) / f"{path.stem}-{key}.cube.parquet"
+
+
+def _source_stamp(network_path):
+    stat = os.stat(network_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+
+
+def _tidy(stats, freq):
+    """Long table from per-statistic (periods × names) frames of one granularity."""
+    frame = stats["sum"]
+    n_periods, n_names = frame.shape
+    table = pd.DataFrame({
+        "freq": freq,
+        "period": np.repeat(frame.index.values, n_names),
+        "name": np.tile(frame.columns.values.astype(str), n_periods),
+        **{s: stats[s].to_numpy(dtype="float64").ravel() for s in ("sum", "abs_sum", "max", "count")},
+    })
+    table["mean"] = table["sum"] / table["count"].where(table["count"] > 0)
+    return table
+
+
+def aggregate(df):
+    """Aggregates of one (snapshots × components) frame at every granularity in FREQS."""
+    day = df.index.floor("D")
+    grouped = df.groupby(day)
+    daily = {
+        "sum": grouped.sum(),
+        "abs_sum": df.abs().groupby(day).sum(),
+        "max": grouped.max(),
+        "count": grouped.count(),
+    }
+    tables = [_tidy(daily, "D")]
+    # Months and years are rolled up from the days instead of rescanning the hours
+    for freq in FREQS[1:]:
+        key = daily["sum"].index.to_period(freq).to_timestamp()
+        tables.append(_tidy({
+            "sum": daily["sum"].groupby(key).sum(),
+            "abs_sum": daily["abs_sum"].groupby(key).sum(),
+            "max": daily["max"].groupby(key).max(),
+            "count": daily["count"].groupby(key).sum(),
+        }, freq))
+    return pd.concat(tables, ignore_index=True)
+
+
+def build_cube(network_path, series=None, out=None):
+    """Aggregate the ``series`` of ``network_path`` and write the Parquet sidecar; returns its path."""
+    series = series or SERIES
+    out = Path(out or cube_path(network_path))
+    parts = []
+    with load_network(network_path, series=series) as n:
+        for list_name, attrs in series.items():
+            for attr in attrs:
+                if not n.has_series(list_name, attr):
+                    continue
+                df = n.series(list_name, attr)
+                if df.empty or not len(df.columns):
+                    continue
+                table = aggregate(df)
+                table.insert(0, "attr", attr)
+                table.insert(0, "list", list_name)
+                parts.append(table)
+
+    cube = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["list", "attr", "freq", "period", "name", *STATS])
+    cube = cube.sort_values(["list", "attr", "freq", "period", "name"], ignore_index=True)
+    cube["name"] = cube["name"].astype("category")
+
+    table = pa.Table.from_pandas(cube, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SOURCE_KEY: _source_stamp(network_path)})
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    pq.write_table(table, tmp, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, out)
+    return out
+
+
+def is_fresh(network_path, path=None):
+    """True if the cube sidecar exists and was built from the current ``network_path``."""
+    path = Path(path or cube_path(network_path))
+    if not path.exists():
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(SOURCE_KEY) == _source_stamp(network_path)
+
+
+def ensure_cube(network_path, cube_dir=None):
+    """
+    Path of an up-to-date cube of ``network_path``, building it first if needed.
+
+    None if the cube cannot be written there; callers then aggregate the
+    hourly data instead.
+    """
+    path = cube_path(network_path, cube_dir)
+    if not is_fresh(network_path, path):
+        start = time.perf_counter()
+        try:
+            build_cube(network_path, out=path)
+        except OSError as e:
+            print(f"[WARN] Cannot write the aggregate cube ({e}); reading hourly data instead.", file=sys.stderr)
+            return None
+        print(f"Aggregate cube built in {time.perf_counter() - start:.1f} s: {path}")
+    return path
+
+
+def _hourly_rows(network_path, list_name, attr, freq, start=None, end=None):
+    """Cube rows of one series computed from the hourly data of ``start``..``end``."""
+    end = end.to_period(freq).end_time if end is not None else None
+    with load_network(network_path, series={list_name: [attr]}, start=start, end=end) as n:
+        if not n.has_series(list_name, attr) or n.series(list_name, attr).empty:
+            return pd.DataFrame(columns=["freq", "period", "name", *STATS])
+        table = aggregate(n.series(list_name, attr))
+    return table[table.freq == freq]
+
+
+def query(network_path, list_name, attr, freq="M", period=None, stat="abs_sum", names=None, cube=True,
+          cube_dir=None):
+    """
+    One statistic of ``list_name.attr`` as a (periods × components) frame.
+
+    ``period`` is a date within the wanted period (e.g. ``"2020-01"``) or a
+    ``(start, end)`` pair of dates; all periods when omitted. With
+    ``cube=False`` the statistic is aggregated from the hourly data.
+    """
+    if freq not in FREQS or stat not in STATS:
+        raise ValueError(f"freq must be one of {FREQS} and stat one of {STATS}.")
+    start = end = None
+    filters = [("list", "=", list_name), ("attr", "=", attr), ("freq", "=", freq)]
+    if period is not None:
+        start, end = period if isinstance(period, (tuple, list)) else (period, period)
+        start = pd.Timestamp(start).to_period(freq).to_timestamp()
+        end = pd.Timestamp(end).to_period(freq).to_timestamp()
+        filters += [("period", ">=", start), ("period", "<=", end)]
+    if names is not None:
+        filters.append(("name", "in", list(names)))
+
+    path = ensure_cube(network_path, cube_dir) if cube else None
+    if path is not None:
+        rows = pd.read_parquet(path, columns=["period", "name", stat], filters=filters)
+    else:
+        rows = _hourly_rows(network_path, list_name, attr, freq, start, end)
+        if names is not None:
+            rows = rows[rows.name.isin(list(names))]
+    result = rows.pivot(index="period", columns="name", values=stat)
+    result.index = pd.DatetimeIndex(result.index, name="period")
+    result.columns = result.columns.astype(str)
+    result.columns.name = None
+    return result
+
+
+def period_totals(network_path, list_name, attr, period, freq="M", stat="abs_sum", cube=True, cube_dir=None):
+    """Per-component ``stat`` of the single period containing ``period``, as a Series."""
+    frame = query(network_path, list_name, attr, freq, period, stat, cube=cube, cube_dir=cube_dir)
+    return frame.iloc[0] if len(frame) else pd.Series(dtype="float64")
+
+
+def add_cube_args(parser):
+    """Add the ``--no-cube`` and ``--cube-dir`` options shared by the scripts that query the cube."""
+    parser.add_argument("--no-cube", dest="cube", action="store_false",
+                        help="Aggregate the hourly data instead of using the aggregate cube")
+    parser.add_argument("--cube-dir",
+                        help="Directory for aggregate cubes (default: next to the result file)")
+    return parser
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Build or query the daily/monthly/yearly aggregate cube of a result network."
+    )
+    parser.add_argument("--input", "-i", required=True, help="Path to the PyPSA network .nc file")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the cube even if it is up to date")
+    parser.add_argument("--query", nargs=2, metavar=("LIST", "ATTR"), help="Print a query, e.g. links p0")
+    parser.add_argument("--freq", choices=FREQS, default="M", help="Granularity of the query (default: M)")
+    parser.add_argument("--period", help="Date within the queried period, e.g. 2020-01 (default: all)")
+    parser.add_argument("--stat", choices=STATS, default="abs_sum", help="Statistic to query (default: abs_sum)")
+    parser.add_argument("--cube-dir", help="Directory for aggregate cubes (default: next to the result file)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    path = cube_path(args.input, args.cube_dir)
+    if args.rebuild or not is_fresh(args.input, path):
+        start = time.perf_counter()
+        build_cube(args.input, out=path)
+        print(f"Aggregate cube of {args.input} built in {time.perf_counter() - start:.1f} s: "
+              f"{path} ({path.stat().st_size / 1024 ** 2:.1f} MB)")
+    else:
+        print(f"Aggregate cube is up to date: {path}")
+
+    if args.query:
+        start = time.perf_counter()
+        result = query(args.input, *args.query, args.freq, args.period, args.stat, cube_dir=args.cube_dir)
+        print(result.T.to_string())
+        print(f"Query answered in {1000 * (time.perf_counter() - start):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
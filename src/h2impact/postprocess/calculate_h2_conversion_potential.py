@@ -2,25 +2,39 @@
 """
 Compute H₂ round-trip conversion metrics with descriptive CLI parameters.
 
+Without --month, or with --freq/--by, the metrics of every period of the
+year (or of the month) are computed in one pass and written as one tidy
+table with a row per period, optionally per bus or country. D, M and Y
+periods come from the aggregate cube; any other pandas frequency (e.g. W,
+QS) resamples the hourly link flows.
+
 Dependencies:
-  pip install pypsa pandas
+  pip install xarray netCDF4 pandas pyarrow
 Usage:
   python calculate_h2_conversion_potential.py \
     --input base_s_5___2020_full.nc \
     --year 2020 --month 1 \
     --output summary.csv
+  python calculate_h2_conversion_potential.py \
+    --input base_s_5___2020_full.nc \
+    --year 2020 --freq M --by country
 """
 import sys
+from pathlib import Path
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
 
 # Check dependencies
 try:
     import argparse
-    import pypsa
     import pandas as pd
+    from src.h2impact.postprocess.aggregate_cube import FREQS, add_cube_args, period_totals, query
+    from src.h2impact.postprocess.network_loader import load_network
 except ImportError as e:
     missing = e.name if hasattr(e, 'name') else str(e)
     print(f"Error: missing dependency '{missing}'.", file=sys.stderr)
-    print("Install required packages with: pip install pypsa pandas", file=sys.stderr)
+    print("Install required packages with: pip install xarray netCDF4 pandas pyarrow", file=sys.stderr)
     sys.exit(1)
 
 
@@ -37,67 +51,168 @@ def parse_args():
         help="Analysis year, e.g. 2020"
     )
     parser.add_argument(
-        "--month", type=int, choices=range(1,13), required=True,
-        help="Analysis month (1-12)"
+        "--month", type=int, choices=range(1,13),
+        help="Analysis month (1-12); omit for a table of the whole year"
+    )
+    parser.add_argument(
+        "--freq",
+        help="Period of the table rows: D, M, Y or a pandas frequency like W (default: M)"
+    )
+    parser.add_argument(
+        "--by", choices=("bus", "country"),
+        help="Break the table down per electricity bus or per country"
     )
     parser.add_argument(
         "--output",
-        help="Path for CSV summary output (default: h2_conversion_summary_YEAR_MONTH.csv)"
+        help="Path for CSV output (default: h2_conversion_summary_YEAR_MONTH.csv, "
+             "or h2_conversion_YEAR_FREQ[_BY].csv for a table)"
     )
     parser.add_argument(
         "--no-csv", action="store_true",
         help="Skip CSV export"
     )
+    add_cube_args(parser)
     return parser.parse_args()
 
 
-def main():
-    args = parse_args()
-    n = pypsa.Network(args.input)
-    flows = n.links_t.p0
-    mask = (flows.index.year == args.year) & (flows.index.month == args.month)
-    flows_mth = flows.loc[mask]
-
-    elec_mask = n.links.carrier.str.contains("Electrolysis", case=False, na=False)
-    fc_mask   = n.links.carrier.str.contains("Fuel Cell", case=False, na=False)
-
-    energy_in  = flows_mth.loc[:, elec_mask].abs().sum().sum()
-    energy_out = flows_mth.loc[:, fc_mask].abs().sum().sum()
-
-    elec_eff = n.links.loc[elec_mask, "efficiency"].mean() or 0.0
-    fc_eff   = n.links.loc[fc_mask,   "efficiency"].mean() or 0.0
+def carrier_masks(links):
+    """Boolean masks of the electrolysis and fuel-cell links."""
+    return {
+        "electrolysis": links.carrier.str.contains("Electrolysis", case=False, na=False),
+        "fuel_cell": links.carrier.str.contains("Fuel Cell", case=False, na=False),
+    }
+
+
+def link_regions(links, masks=None, by="bus", buses=None):
+    """
+    Electricity bus (``by="bus"``) or its country (``by="country"``) of each link.
+
+    That is ``bus0`` for electrolysers and ``bus1`` for fuel cells. Countries
+    come from ``buses.country`` if available, else from the bus name prefix.
+    """
+    masks = masks or carrier_masks(links)
+    bus = links.bus0.where(masks["electrolysis"], links.bus1)
+    if by == "country":
+        prefix = bus.str[:2]
+        bus = bus.map(buses["country"]).fillna(prefix) if buses is not None and "country" in buses else prefix
+    return bus
+
+
+def conversion_table(links, energy, masks=None, regions=None):
+    """
+    H₂ conversion metrics of every period (and region) in one pass.
+
+    ``energy`` is the absolute flow per link summed per period (MWh, periods
+    × links). With ``regions`` (a label per link, see ``link_regions``) the
+    rows are indexed by (period, region), else by period.
+    """
+    masks = masks or carrier_masks(links)
+    elec, fc = links.index[masks["electrolysis"]], links.index[masks["fuel_cell"]]
+    keys = regions if regions is not None else pd.Series("total", index=links.index)
+    energy = energy.reindex(columns=links.index).fillna(0.0)
+
+    energy_in  = energy[elec].T.groupby(keys[elec]).sum().T
+    energy_out = energy[fc].T.groupby(keys[fc]).sum().T
+    groups = energy_in.columns.union(energy_out.columns)
+    if groups.empty:
+        groups = pd.Index(["total"])
+    energy_in  = energy_in.reindex(columns=groups, fill_value=0.0)
+    energy_out = energy_out.reindex(columns=groups, fill_value=0.0)
+
+    table = pd.DataFrame({"energy_in": energy_in.stack(), "energy_out": energy_out.stack()})
+    group = table.index.get_level_values(-1)
+    table["elec_eff"] = links.efficiency[elec].groupby(keys[elec]).mean().reindex(group).fillna(0.0).values
+    table["fc_eff"]   = links.efficiency[fc].groupby(keys[fc]).mean().reindex(group).fillna(0.0).values
+
+    table["h2_energy"]        = table.energy_in * table.elec_eff
+    table["potential_output"] = table.h2_energy * table.fc_eff
+    table["theoretical_rt"]   = table.elec_eff * table.fc_eff
+    table["empirical_rt"]     = (table.energy_out / table.energy_in.where(table.energy_in != 0)).fillna(0.0)
+
+    if regions is None:
+        return table.droplevel(-1).rename_axis("period")
+    return table.rename_axis(["period", regions.name or "region"])
+
+
+def conversion_metrics(links, energy, masks=None):
+    """
+    H₂ conversion metrics from per-link energy sums.
+
+    ``energy`` is the absolute flow per link summed over the period (MWh).
+    """
+    return conversion_table(links, energy.to_frame().T, masks).iloc[0].to_dict()
+
+
+def period_energy(path, period, freq="M", cube=True, cube_dir=None):
+    """
+    Absolute link flows of ``period`` (e.g. ``"2020"``) summed per ``freq`` (periods × links).
+
+    D, M and Y are read from the aggregate cube (unless ``cube`` is False),
+    other frequencies are resampled from the hourly flows.
+    """
+    span = pd.Period(period)
+    if freq in FREQS:
+        return query(path, "links", "p0", freq, (span.start_time, span.end_time), cube=cube, cube_dir=cube_dir)
+    with load_network(path, series={"links": ["p0"]}, start=span.start_time, end=span.end_time) as n:
+        return n.links_t.p0.abs().resample(freq).sum()
+
+
+def print_metrics(metrics, period):
+    fmt_mwh = lambda x: f"{x:,.1f} MWh"
+    fmt_pct = lambda x: f"{100*x:.1f}%"
 
-    h2_energy        = energy_in * elec_eff
-    potential_output = h2_energy * fc_eff
-    theoretical_rt   = elec_eff * fc_eff
+    print(f"Analysis Period: {period}\n")
+    print(f"Electrolysis input:            {fmt_mwh(metrics['energy_in'])}")
+    print(f"Actual fuel-cell output:        {fmt_mwh(metrics['energy_out'])}")
+    print(f"Nominal electrolyzer eff.:      {fmt_pct(metrics['elec_eff'])}")
+    print(f"Nominal fuel-cell eff.:         {fmt_pct(metrics['fc_eff'])}")
+    print(f"Theoretical H₂ stored energy:   {fmt_mwh(metrics['h2_energy'])}")
+    print(f"Theoretical electricity output: {fmt_mwh(metrics['potential_output'])}")
+    print(f"Theoretical round-trip eff.:    {fmt_pct(metrics['theoretical_rt'])}")
+    print(f"Empirical round-trip eff.:      {fmt_pct(metrics['empirical_rt'])}")
+
+
+def table_mode(args):
+    """Metrics of every ``--freq`` period of the year (or month) as one tidy CSV table."""
+    period = f"{args.year}-{args.month:02d}" if args.month else str(args.year)
+    freq = args.freq or "M"
+    n = load_network(args.input, static=["links", "buses"] if args.by == "country" else ["links"])
+    masks = carrier_masks(n.links)
+    regions = link_regions(n.links, masks, args.by, n.buses if args.by == "country" else None) if args.by else None
+    if regions is not None:
+        regions.name = args.by
+
+    table = conversion_table(n.links, period_energy(args.input, period, freq, args.cube, args.cube_dir), masks, regions).reset_index()
+    n.close()
+    if not args.by:
+        print(table.to_string(index=False))
+    else:
+        print(f"{len(table)} rows: {table.period.nunique()} periods × {table[args.by].nunique()} {args.by} values")
 
-    empirical_rt = energy_out / energy_in if energy_in else 0.0
+    if not args.no_csv:
+        out_path = args.output or f"h2_conversion_{period}_{freq}{'_' + args.by if args.by else ''}.csv"
+        try:
+            table.to_csv(out_path, index=False)
+            print(f"Table exported to {out_path}")
+        except Exception as e:
+            print(f"CSV export failed: {e}", file=sys.stderr)
 
-    fmt_mwh = lambda x: f"{x:,.1f} MWh"
-    fmt_pct = lambda x: f"{100*x:.1f}%"
 
+def main():
+    args = parse_args()
+    if args.month is None or args.freq or args.by:
+        table_mode(args)
+        return
     period = f"{args.year}-{args.month:02d}"
-    print(f"Analysis Period: {period}\n")
-    print(f"Electrolysis input:            {fmt_mwh(energy_in)}")
-    print(f"Actual fuel-cell output:        {fmt_mwh(energy_out)}")
-    print(f"Nominal electrolyzer eff.:      {fmt_pct(elec_eff)}")
-    print(f"Nominal fuel-cell eff.:         {fmt_pct(fc_eff)}")
-    print(f"Theoretical H₂ stored energy:   {fmt_mwh(h2_energy)}")
-    print(f"Theoretical electricity output: {fmt_mwh(potential_output)}")
-    print(f"Theoretical round-trip eff.:    {fmt_pct(theoretical_rt)}")
-    print(f"Empirical round-trip eff.:      {fmt_pct(empirical_rt)}")
+    # Only the links are read from the file; the month's per-link energy comes from the aggregate cube
+    n = load_network(args.input, static=["links"])
+    energy = period_totals(args.input, "links", "p0", period, cube=args.cube, cube_dir=args.cube_dir)
+
+    metrics = conversion_metrics(n.links, energy)
+    print_metrics(metrics, period)
 
     if not args.no_csv:
-        df = pd.DataFrame({
-            "energy_in": [energy_in],
-            "energy_out": [energy_out],
-            "elec_eff": [elec_eff],
-            "fc_eff": [fc_eff],
-            "h2_energy": [h2_energy],
-            "potential_output": [potential_output],
-            "theoretical_rt": [theoretical_rt],
-            "empirical_rt": [empirical_rt]
-        }, index=[period])
+        df = pd.DataFrame(metrics, index=[period])
         out_path = args.output or f"h2_conversion_summary_{period}.csv"
         try:
             df.to_csv(out_path)
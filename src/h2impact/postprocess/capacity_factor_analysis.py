@@ -3,7 +3,7 @@
 Capacity-Factor Analysis of Electrolysers with Dispatch Constraints (CLI)
 
 Dependencies:
-  pip install pypsa numpy matplotlib
+  pip install xarray netCDF4 pandas numpy matplotlib
 
 Usage:
   python capacity_factor_analysis_cli.py \
@@ -17,8 +17,14 @@ Usage:
 import argparse
 import sys
 import numpy as np
-import pypsa
+import pandas as pd
 import matplotlib.pyplot as plt
+from pathlib import Path
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.network_loader import load_network
 
 
 def parse_args():
@@ -44,59 +50,52 @@ def parse_args():
     return parser.parse_args()
 
 
-def main():
-    args = parse_args()
-    # Load network
-    try:
-        net = pypsa.Network(args.network)
-    except Exception as e:
-        print(f"Error loading network: {e}", file=sys.stderr)
-        sys.exit(1)
+def bus_prices(net, elec_links, snapshots):
+    """
+    Marginal prices at the electrolyser buses, or a simulated daily price cycle
+    (40 ± 20 €/MWh) if the network holds no ``buses_t.marginal_price``.
+    """
+    if net.has_series("buses", "marginal_price"):
+        return net.buses_t.marginal_price
+    print("No bus marginal prices in the network; using a simulated daily price cycle.")
+    price = 40 + 20 * np.sin(2 * np.pi * np.arange(len(snapshots)) / 24)
+    return pd.DataFrame({bus: price for bus in elec_links.bus0.unique()}, index=snapshots)
 
-    # Extract monthly flows
-    flows = net.links_t.p0
-    mask_time = (flows.index.year == args.year) & (flows.index.month == args.month)
-    flows_mth = flows.loc[mask_time]
-    hours = len(flows_mth) or 1
 
-    # Identify electrolysis links
-    elec_mask = net.links.carrier.str.contains('Electrolysis', case=False, na=False)
-    elec_links = net.links[elec_mask]
-    if elec_links.empty:
-        print("No electrolyser links found.")
-        sys.exit(0)
+def capacity_factors(elec_links, flows, prices, price_threshold=50.0, min_turndown=0.4, outage_fraction=0.05):
+    """
+    Raw and dispatch-constrained capacity factors of ``elec_links`` over the hours of ``flows``.
 
+    ``prices`` are bus marginal prices (snapshots × buses); each electrolyser
+    runs only in hours where the price at its ``bus0`` reaches the threshold.
+    """
+    hours = len(flows) or 1
     p_nom = elec_links.p_nom_opt.fillna(0)
 
-    # Simulate prices (or use actual if available)
-    try:
-        prices = net.generators_t.marginal_price.loc[mask_time]
-    except Exception:
-        t = hours
-        prices = 40 + 20 * np.sin(2 * np.pi * np.arange(t) / 24)
-
-    # Dispatch mask
-    run_mask = prices >= args.price_threshold
+    # Dispatch mask from the electricity price at each electrolyser's bus
+    link_prices = prices.reindex(index=flows.index, columns=elec_links.bus0.values)
+    link_prices.columns = elec_links.index
+    run_mask = link_prices >= price_threshold
     rng = np.random.default_rng(seed=42)
-    outages = rng.choice(hours, size=int(hours * args.outage_fraction), replace=False)
+    outages = rng.choice(hours, size=int(hours * outage_fraction), replace=False)
     run_mask.iloc[outages] = False
 
     # Raw dispatch flows
-    raw = flows_mth[elec_links.index].abs()
+    raw = flows[elec_links.index].abs()
     # Apply run mask
     disp = raw.where(run_mask, 0.0)
     # Enforce minimum turndown
-    floor = p_nom * args.min_turndown
+    floor = p_nom * min_turndown
     disp = disp.where(disp >= floor, 0.0)
 
     # Capacity factors
     cf_raw = raw.sum(axis=0) / (p_nom * hours)
     cf_constrained = disp.sum(axis=0) / (p_nom * hours)
+    return cf_raw, cf_constrained
 
-    # Summary
-    print(f"Raw CF ({args.year}-{args.month:02d}):   Min {cf_raw.min():.2%}, Max {cf_raw.max():.2%}, Mean {cf_raw.mean():.2%}")
-    print(f"Constr CF: Min {cf_constrained.min():.2%}, Max {cf_constrained.max():.2%}, Mean {cf_constrained.mean():.2%}\n")
 
+def plot_capacity_factors(cf_raw, cf_constrained, period, histogram=None, boxplot=None):
+    """Histogram and boxplot of raw vs. constrained capacity factors; saved if paths are given, else shown."""
     # Plot histogram
     plt.figure()
     plt.hist(cf_raw.dropna(), bins=20, alpha=0.6, label='Raw')
@@ -104,25 +103,62 @@ def main():
     plt.xlabel('Capacity Factor')
     plt.ylabel('Number of Links')
     plt.legend()
-    plt.title(f'CF Distribution Raw vs Constrained ({args.year}-{args.month:02d})')
+    plt.title(f'CF Distribution Raw vs Constrained ({period})')
     plt.tight_layout()
-    if args.histogram:
-        plt.savefig(args.histogram, dpi=300)
-        print(f"Histogram saved to {args.histogram}")
+    if histogram:
+        plt.savefig(histogram, dpi=300)
+        print(f"Histogram saved to {histogram}")
     else:
         plt.show()
+    plt.close()
 
     # Plot boxplot
     plt.figure()
-    plt.boxplot([cf_raw.dropna(), cf_constrained.dropna()], labels=['Raw','Constrained'], vert=False)
+    plt.boxplot([cf_raw.dropna(), cf_constrained.dropna()], vert=False)
+    plt.yticks([1, 2], ['Raw', 'Constrained'])
     plt.xlabel('Capacity Factor')
     plt.title('CF Boxplot Raw vs Constrained')
     plt.tight_layout()
-    if args.boxplot:
-        plt.savefig(args.boxplot, dpi=300)
-        print(f"Boxplot saved to {args.boxplot}")
+    if boxplot:
+        plt.savefig(boxplot, dpi=300)
+        print(f"Boxplot saved to {boxplot}")
     else:
         plt.show()
+    plt.close()
+
+
+def main():
+    args = parse_args()
+    # Load links, monthly link flows and prices only
+    period = f"{args.year}-{args.month:02d}"
+    try:
+        net = load_network(args.network, static=["links"],
+                           series={"links": ["p0"], "buses": ["marginal_price"]}, start=period, end=period)
+    except Exception as e:
+        print(f"Error loading network: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Extract monthly flows
+    flows_mth = net.links_t.p0
+
+    # Identify electrolysis links
+    elec_mask = net.links.carrier.str.contains('Electrolysis', case=False, na=False)
+    elec_links = net.links[elec_mask]
+    if elec_links.empty:
+        print("No electrolyser links found.")
+        sys.exit(0)
+
+    # Simulate prices (or use actual if available)
+    prices = bus_prices(net, elec_links, flows_mth.index)
+
+    cf_raw, cf_constrained = capacity_factors(elec_links, flows_mth, prices, args.price_threshold,
+                                              args.min_turndown, args.outage_fraction)
+
+    # Summary
+    print(f"Raw CF ({period}):   Min {cf_raw.min():.2%}, Max {cf_raw.max():.2%}, Mean {cf_raw.mean():.2%}")
+    print(f"Constr CF: Min {cf_constrained.min():.2%}, Max {cf_constrained.max():.2%}, Mean {cf_constrained.mean():.2%}\n")
+
+    plot_capacity_factors(cf_raw, cf_constrained, period, args.histogram, args.boxplot)
 
 if __name__ == '__main__':
     main()
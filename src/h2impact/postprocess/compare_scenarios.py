@@ -1,7 +1,13 @@
-import pypsa
+import sys
+from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.network_loader import load_network
+
 def ask_file(prompt):
     import os
     while True:
@@ -15,8 +21,9 @@ file_h2 = ask_file("Enter path to H2-enabled .nc file: ")
 file_noh2 = ask_file("Enter path to no-H2 .nc file: ")
 
 print("Loading networks...")
-net_h2 = pypsa.Network(file_h2)
-net_noh2 = pypsa.Network(file_noh2)
+# Only the tables compared below are read
+net_h2 = load_network(file_h2, static=["generators", "global_constraints"])
+net_noh2 = load_network(file_noh2, static=["generators", "global_constraints"])
 
 def get_total_cost(net):
     # May need to adapt depending on network version
@@ -3,7 +3,7 @@
 Map H₂ pipeline network with pipeline capacities and electrolysis bus locations via CLI.
 
 Dependencies:
-  pip install pypsa pandas numpy matplotlib cartopy
+  pip install xarray netCDF4 pandas pyarrow numpy matplotlib cartopy
 
 Usage:
   python map_h2_pipelines_with_buses.py \
@@ -13,13 +13,20 @@ Usage:
     [--extent 5 15 47 56] [--top-n-buses 10]
 """
 import argparse
-import pypsa
+import sys
+from pathlib import Path
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.aggregate_cube import add_cube_args, period_totals
+from src.h2impact.postprocess.network_loader import load_network
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -50,6 +57,7 @@ def parse_args():
         '--top-n-buses', type=int, default=10,
         help='Number of top electrolysis buses to label'
     )
+    add_cube_args(parser)
     return parser.parse_args()
 
 
@@ -63,7 +71,8 @@ def main():
     extent = args.extent
     top_n_buses = args.top_n_buses
 
-    n = pypsa.Network(network_path)
+    period = f"{year}-{month:02d}"
+    n = load_network(network_path, static=["links", "buses"])
 
     # print all buses
     print("All buses in the network with coordinates:")
@@ -79,13 +88,11 @@ def main():
     norm_pipe = plt.Normalize(vmin=0, vmax=vmax)
 
     # 2) electrolysis summary
-    flows = n.links_t.p0
-    mask_time = (flows.index.year==year)&(flows.index.month==month)
-    flows_mth = flows.loc[mask_time]
+    energy_mth = period_totals(network_path, "links", "p0", period, cube=args.cube, cube_dir=args.cube_dir)
 
     elec_mask = n.links.carrier.str.contains("Electrolysis", case=False, na=False)
     elec_links = n.links.loc[elec_mask]
-    energy_in_link = flows_mth[elec_links.index].abs().sum(axis=0)
+    energy_in_link = energy_mth.reindex(elec_links.index).fillna(0)
 
     # efficiencies
     elec_eff = elec_links.efficiency.mean() if 'efficiency' in elec_links else 1.0
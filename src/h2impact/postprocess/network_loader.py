@@ -0,0 +1,198 @@
+"""
+Selective, lazy reader for PyPSA result networks.
+
+``pypsa.Network(path)`` deserialises every component and time series of a
+result file. Most postprocess scripts only need a few tables, e.g.
+``links``, ``links_t.p0`` and ``buses``, so this loader reads those straight
+from the NetCDF file instead:
+
+  - the file is opened lazily; a table is read on first access only,
+  - only the declared tables can be accessed, so a script lists what it needs,
+  - time series can be restricted to a period (``start``/``end`` accept
+    partial dates like ``"2020-01"``), and only that slice is read.
+
+PyPSA NetCDF layout: static attributes are ``<list>_<attr>`` over
+``<list>_i``; time series are ``<list>_t_<attr>`` over ``snapshots`` and
+``<list>_t_<attr>_i``. PyPSA omits attributes that hold only default
+values; the defaults of the attributes the scripts use are filled in.
+Recent PyPSA versions store ``snapshots`` as a 0..N-1 counter and the
+timestamps in ``snapshots_snapshot`` (``snapshots_timestep`` next to
+``snapshots_period`` for multi-period networks); the time index is taken
+from there.
+
+Usage:
+  from src.h2impact.postprocess.network_loader import load_network
+  n = load_network("base_s_5_elec_.nc", static=["links", "buses"], series={"links": ["p0"]},
+                   start="2020-01", end="2020-01")
+  n.links_t.p0
+
+Dependencies:
+  pip install xarray pandas netCDF4
+"""
+import warnings
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+SNAPSHOTS = "snapshots"
+
+# Defaults of attributes PyPSA does not store when no component deviates from them
+DEFAULTS = {
+    "buses": {"carrier": "AC", "x": 0.0, "y": 0.0},
+    "generators": {"carrier": "", "p_nom": 0.0, "p_nom_opt": 0.0, "capital_cost": 0.0, "marginal_cost": 0.0},
+    "links": {"carrier": "", "efficiency": 1.0, "p_nom": 0.0, "p_nom_opt": 0.0, "capital_cost": 0.0},
+    "lines": {"carrier": "AC", "s_nom": 0.0, "s_nom_opt": 0.0},
+    "stores": {"carrier": "", "e_nom": 0.0, "e_nom_opt": 0.0, "capital_cost": 0.0},
+    "storage_units": {"carrier": "", "p_nom": 0.0, "p_nom_opt": 0.0, "max_hours": 1.0},
+    "global_constraints": {"type": "", "constant": 0.0},
+}
+# Index names PyPSA gives the component tables
+COMPONENTS = {
+    "buses": "Bus", "carriers": "Carrier", "generators": "Generator", "global_constraints": "GlobalConstraint",
+    "lines": "Line", "links": "Link", "loads": "Load", "storage_units": "StorageUnit", "stores": "Store",
+}
+
+
+def snapshot_index(ds):
+    """
+    Timestamps of the snapshots of a PyPSA NetCDF dataset.
+
+    Falls back to the ``snapshots`` coordinate only if it already holds
+    datetimes; raises ValueError if the file has no timestamps.
+    """
+    if SNAPSHOTS not in ds.dims:
+        return pd.DatetimeIndex([], name=SNAPSHOTS)
+    for name in (f"{SNAPSHOTS}_snapshot", f"{SNAPSHOTS}_timestep", SNAPSHOTS):
+        if name in ds.variables and np.issubdtype(ds[name].dtype, np.datetime64):
+            return pd.DatetimeIndex(ds[name].values, name=SNAPSHOTS)
+    raise ValueError("The network has no datetime snapshots (neither snapshots_snapshot nor snapshots_timestep).")
+
+
+class _SeriesTables:
+    """``n.<list>_t``: attribute access to the declared time series of one component list."""
+
+    def __init__(self, network, list_name, attrs):
+        self._network = network
+        self._list_name = list_name
+        self._attrs = set(attrs)
+
+    def __getattr__(self, attr):
+        if attr.startswith("_") or attr not in self._attrs:
+            raise AttributeError(
+                f"{self._list_name}_t.{attr} was not loaded; add it to series={{'{self._list_name}': [...]}}."
+            )
+        return self._network.series(self._list_name, attr)
+
+    def __getitem__(self, attr):
+        return getattr(self, attr)
+
+
+class LazyNetwork:
+    """
+    Read-only view of a PyPSA result file that loads declared tables on demand.
+
+    ``static`` lists component lists (``links``, ``buses``, ...) that are
+    available as DataFrames; ``series`` maps component lists to time-series
+    attributes available as ``n.<list>_t.<attr>``.
+    """
+
+    def __init__(self, path, static=(), series=None, start=None, end=None):
+        self.path = str(path)
+        self._ds = xr.open_dataset(path)
+        self._static = set(static)
+        self._series = {k: list(v) for k, v in (series or {}).items()}
+        self._cache = {}
+        self._time = slice(None)
+        self._snapshots = snapshot_index(self._ds)
+        if start is not None or end is not None:
+            self._time = self._snapshots.slice_indexer(start, end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._ds.close()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name.endswith("_t") and name[:-2] in self._series:
+            return _SeriesTables(self, name[:-2], self._series[name[:-2]])
+        if name in self._static:
+            return self.static(name)
+        raise AttributeError(f"'{name}' was not loaded; declare it in static= or series= of load_network.")
+
+    @property
+    def snapshots(self):
+        return self._snapshots[self._time]
+
+    @property
+    def investment_periods(self):
+        """Investment period of every snapshot of a multi-period network, else None."""
+        name = f"{SNAPSHOTS}_period"
+        if name not in self._ds.variables:
+            return None
+        return pd.Index(self._ds[name].values[self._time], name="period")
+
+    @property
+    def objective(self):
+        return self._ds.attrs.get("network_objective", np.nan)
+
+    def static(self, list_name):
+        """Static attributes of ``list_name`` as a DataFrame indexed by component name."""
+        key = (list_name, None)
+        if key not in self._cache:
+            dim = f"{list_name}_i"
+            values = self._ds[dim].values if dim in self._ds.coords else []
+            index = pd.Index(values, name=COMPONENTS.get(list_name, list_name))
+            prefix = f"{list_name}_"
+            columns = {
+                name[len(prefix):]: var.values
+                for name, var in self._ds.data_vars.items()
+                if name.startswith(prefix) and var.dims == (dim,)
+            }
+            df = pd.DataFrame(columns, index=index)
+            for attr, default in DEFAULTS.get(list_name, {}).items():
+                if attr not in df:
+                    df[attr] = default
+            self._cache[key] = df
+        return self._cache[key]
+
+    def has_series(self, list_name, attr):
+        """True if the file holds the time series ``attr`` of ``list_name``."""
+        return f"{list_name}_t_{attr}" in self._ds
+
+    def series(self, list_name, attr):
+        """
+        Time series ``attr`` of ``list_name`` (snapshots × components), restricted to the period.
+
+        Empty if the file does not hold the series; a warning is issued if
+        the network has ``list_name`` components, since results computed
+        from an empty series are easy to mistake for real zeros.
+        """
+        key = (list_name, attr)
+        if key not in self._cache:
+            name = f"{list_name}_t_{attr}"
+            if name in self._ds:
+                var = self._ds[name].isel({SNAPSHOTS: self._time})
+                columns = pd.Index(var[f"{name}_i"].values, name=COMPONENTS.get(list_name, list_name))
+                df = pd.DataFrame(var.values, index=self.snapshots, columns=columns)
+            else:
+                if f"{list_name}_i" in self._ds.coords:
+                    warnings.warn(f"{name} is not in {self.path}; using an empty table.", stacklevel=3)
+                df = pd.DataFrame(index=self.snapshots)
+            self._cache[key] = df
+        return self._cache[key]
+
+
+def load_network(path, static=(), series=None, start=None, end=None):
+    """
+    Open the result network at ``path`` with only the declared tables available.
+
+    ``start``/``end`` restrict all time series to that period (inclusive,
+    partial dates allowed).
+    """
+    return LazyNetwork(path, static, series, start, end)
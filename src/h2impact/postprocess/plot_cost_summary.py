@@ -37,6 +37,18 @@ def plot_and_save(series, title, ylabel, filename, color):
     plt.close()
 
 
+def cost_summary(df):
+    """Generator capital and marginal costs by carrier, and H₂ store/link capital costs."""
+    df_gen = df[df["component"] == "Generator"]
+    capital = df_gen.set_index("carrier")["capital_cost"].dropna()
+    marginal = df_gen.set_index("carrier")["marginal_cost"].dropna()
+
+    # H2-related infra (Store, Link)
+    df_h2 = df[df["component"].isin(["Store", "Link"])]
+    h2_costs = df_h2.groupby("component")["capital_cost"].sum().rename(index={"Store": "H2 Store", "Link": "H2 Link"})
+    return capital, marginal, h2_costs
+
+
 def main():
     parser = argparse.ArgumentParser(description="Plot component-level costs from PyPSA cost CSV.")
     parser.add_argument("--input", required=True, help="Path to costs_*.csv file")
@@ -58,10 +70,7 @@ def main():
     os.makedirs(args.output_dir, exist_ok=True)
     basename = os.path.basename(args.input).replace(".csv", "")
 
-    # Generator costs
-    df_gen = df[df["component"] == "Generator"]
-    capital = df_gen.set_index("carrier")["capital_cost"].dropna()
-    marginal = df_gen.set_index("carrier")["marginal_cost"].dropna()
+    capital, marginal, h2_costs = cost_summary(df)
 
     print("\n== Generator Cost Summary ==")
     print("Capital (€):")
@@ -73,10 +82,6 @@ def main():
         plot_and_save(capital, "Capital Cost by Generator Carrier", "Capital Cost (€)", f"{args.output_dir}/{basename}_capital_cost.png", "lightblue")
         plot_and_save(marginal, "Marginal Cost by Generator Carrier", "Marginal Cost (€/MWh)", f"{args.output_dir}/{basename}_marginal_cost.png", "salmon")
 
-    # H2-related infra (Store, Link)
-    df_h2 = df[df["component"].isin(["Store", "Link"])]
-    h2_costs = df_h2.groupby("component")["capital_cost"].sum().rename(index={"Store": "H2 Store", "Link": "H2 Link"})
-
     print("\n== Hydrogen Infrastructure Capital Cost ==")
     print(h2_costs)
 
@@ -3,8 +3,8 @@
 Plot H₂ pipeline flows on a Cartopy map with major German city labels for a specified month.
 
 Dependencies (install via pip):
-  - pypsa
-  - pandas
+  - xarray, netCDF4
+  - pandas, pyarrow
   - numpy
   - matplotlib
   - cartopy
@@ -30,13 +30,19 @@ Example:
 """
 import sys
 import argparse
-import pypsa
+from pathlib import Path
 import numpy as np
 import matplotlib.pyplot as plt
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import cartopy.io.shapereader as shpreader
 
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.aggregate_cube import add_cube_args, period_totals
+from src.h2impact.postprocess.network_loader import load_network
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -67,13 +73,15 @@ def parse_args():
         default=[5,15,47,56],
         help='Map extent: lon_min lon_max lat_min lat_max'
     )
+    add_cube_args(parser)
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
     try:
-        network = pypsa.Network(args.network)
+        period = f"{args.year}-{args.month:02d}"
+        network = load_network(args.network, static=["links", "buses"])
     except Exception as e:
         print(f"Error loading network: {e}", file=sys.stderr)
         sys.exit(1)
@@ -82,10 +90,8 @@ def main():
     mask = network.links.carrier.str.contains('pipeline', case=False, na=False)
     pipelines = network.links.loc[mask].copy()
 
-    # Compute monthly flows
-    flows = network.links_t.p0
-    mask_time = (flows.index.year == args.year) & (flows.index.month == args.month)
-    flows_sum = flows.loc[mask_time].abs().sum(axis=0)
+    # Monthly flows from the aggregate cube
+    flows_sum = period_totals(args.network, "links", "p0", period, cube=args.cube, cube_dir=args.cube_dir)
     flows_sum.name = 'total_flow_MWh'
     pipelines = pipelines.join(flows_sum, how='left').fillna(0)
 
@@ -22,6 +22,13 @@ def parse_args():
     return parser.parse_args()
 
 
+def monthly_demand(demand, country):
+    """Monthly total demand of ``country``, indexed by month name."""
+    monthly = demand[country].resample("MS").sum()
+    monthly.index = monthly.index.strftime('%B')
+    return monthly
+
+
 def main():
     args = parse_args()
 
@@ -37,11 +44,10 @@ def main():
         sys.exit(1)
 
     # Resample to monthly total and rename index to month names
-    monthly_demand = demand[args.country].resample("M").sum()
-    monthly_demand.index = monthly_demand.index.strftime('%B')
+    monthly = monthly_demand(demand, args.country)
 
     # Plotting
-    monthly_demand.plot(kind="bar", color="red", figsize=(10, 6))
+    monthly.plot(kind="bar", color="red", figsize=(10, 6))
     plt.title(f"Monthly Electricity Demand - {args.country}")
     plt.xlabel("Month")
     plt.ylabel("Total Demand (MWh)")
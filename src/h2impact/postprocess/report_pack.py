@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Produce the standard report pack for one result network in a single pass.
+
+The network is read once, with only the tables the analyses need. Shared
+intermediates are computed once and reused by every analysis: the link
+carrier masks, the period's link flows and their per-link energy sums
+for each month and for the whole period. The monthly sums come from the
+aggregate cube (aggregate_cube.py; see --no-cube and --cube-dir); hourly
+flows are only read for the capacity factors. Analyses whose time series
+the file does not hold are skipped.
+
+Analyses (``--analyses``, default: all that have their inputs):
+  conversion        H₂ conversion metrics per month and for the period
+  capacity_factors  raw and dispatch-constrained electrolyser capacity factors
+  pipelines         energy through each H₂ pipeline (table and bar chart;
+                    maps with coastlines stay in plot_h2_pipelines.py)
+  soc               H₂ store state of charge
+  costs             component costs (needs --costs-csv)
+  demand            monthly demand of a country (needs --demand-csv and --country)
+
+Everything is written into one report directory, with an index.json
+listing the outputs and the time each analysis took.
+
+Usage:
+  python report_pack.py --input base_s_5_elec_.nc --year 2020 --output-dir reports/de-2020-H2
+  python report_pack.py --input base_s_5_elec_.nc --year 2020 --month 1 --analyses conversion pipelines
+
+Dependencies:
+  pip install xarray netCDF4 pandas pyarrow numpy matplotlib
+"""
+import sys
+import json
+import time
+import argparse
+from functools import cached_property
+from pathlib import Path
+import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.aggregate_cube import add_cube_args, query
+from src.h2impact.postprocess.calculate_h2_conversion_potential import carrier_masks, conversion_metrics, conversion_table
+from src.h2impact.postprocess.capacity_factor_analysis import bus_prices, capacity_factors, plot_capacity_factors
+from src.h2impact.postprocess.network_loader import load_network
+from src.h2impact.postprocess.plot_cost_summary import cost_summary, plot_and_save
+from src.h2impact.postprocess.plot_monthly_demand import monthly_demand
+from src.h2impact.postprocess.visualize_h2_soc import h2_store_soc
+
+ANALYSES = ("conversion", "capacity_factors", "pipelines", "soc", "costs", "demand")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run several postprocess analyses on one result network in a single pass."
+    )
+    parser.add_argument("--input", "-i", required=True, help="Path to the PyPSA network .nc file")
+    parser.add_argument("--output-dir", "-o", default="report", help="Report directory (default: ./report)")
+    parser.add_argument("--year", type=int, help="Restrict the analyses to this year (default: whole result)")
+    parser.add_argument("--month", type=int, choices=range(1, 13), help="Restrict the analyses to this month")
+    parser.add_argument("--analyses", nargs="+", choices=ANALYSES, help="Analyses to run (default: all)")
+    parser.add_argument("--costs-csv", help="costs_*.csv for the cost analysis")
+    parser.add_argument("--demand-csv", help="electricity_demand.csv for the demand analysis")
+    parser.add_argument("--country", help="Country code for the demand analysis, e.g. DE")
+    parser.add_argument("--price-threshold", type=float, default=50.0, help="€/MWh threshold to run electrolysers")
+    parser.add_argument("--min-turndown", type=float, default=0.4, help="Minimum fraction of p_nom when running")
+    parser.add_argument("--outage-fraction", type=float, default=0.05, help="Fraction of hours in random outage")
+    add_cube_args(parser)
+    return parser.parse_args()
+
+
+class ReportContext:
+    """The network of one report pack and the intermediates shared by its analyses."""
+
+    def __init__(self, path, year=None, month=None, cube=True, cube_dir=None):
+        self.path = path
+        self.cube, self.cube_dir = cube, cube_dir
+        self.period = f"{year}-{month:02d}" if year and month else (str(year) if year else None)
+        self.months = (self.period, self.period) if month else ((f"{year}-01", f"{year}-12") if year else None)
+        self.network = load_network(
+            path,
+            static=["links", "buses", "stores"],
+            series={"links": ["p0"], "stores": ["e"], "buses": ["marginal_price"]},
+            start=self.period, end=self.period,
+        )
+        self.label = self.period or "all"
+
+    @cached_property
+    def flows(self):
+        return self.network.links_t.p0
+
+    @cached_property
+    def masks(self):
+        links = self.network.links
+        return {**carrier_masks(links), "pipeline": links.carrier.str.contains("pipeline", case=False, na=False)}
+
+    @cached_property
+    def monthly_energy(self):
+        """Absolute link flows summed per month (months × links)."""
+        return query(self.path, "links", "p0", "M", self.months, cube=self.cube, cube_dir=self.cube_dir)
+
+    @cached_property
+    def energy(self):
+        """Absolute link flows summed over the period, per link."""
+        return self.monthly_energy.sum()
+
+
+def run_conversion(ctx, out):
+    links = ctx.network.links
+    if ctx.monthly_energy.empty:
+        print("No link flows found; skipping conversion metrics.")
+        return []
+    table = conversion_table(links, ctx.monthly_energy, ctx.masks)
+    table.index = table.index.strftime("%Y-%m")
+    table.loc["total"] = conversion_metrics(links, ctx.energy, ctx.masks)
+    path = out / "h2_conversion_summary.csv"
+    table.to_csv(path)
+    return [path]
+
+
+def run_capacity_factors(ctx, out, price_threshold=50.0, min_turndown=0.4, outage_fraction=0.05):
+    elec_links = ctx.network.links[ctx.masks["electrolysis"]]
+    if elec_links.empty or not ctx.network.has_series("links", "p0"):
+        print("No electrolyser flows found; skipping capacity factors.")
+        return []
+    prices = bus_prices(ctx.network, elec_links, ctx.flows.index)
+    cf_raw, cf_constrained = capacity_factors(elec_links, ctx.flows, prices, price_threshold, min_turndown,
+                                              outage_fraction)
+    paths = [out / "capacity_factors.csv", out / "cf_hist.png", out / "cf_box.png"]
+    pd.DataFrame({"raw": cf_raw, "constrained": cf_constrained}).to_csv(paths[0])
+    plot_capacity_factors(cf_raw, cf_constrained, ctx.label, paths[1], paths[2])
+    return paths
+
+
+def run_pipelines(ctx, out):
+    pipelines = ctx.network.links.loc[ctx.masks["pipeline"], ["bus0", "bus1", "p_nom_opt"]].copy()
+    if pipelines.empty:
+        print("No H₂ pipelines found; skipping pipeline flows.")
+        return []
+    pipelines["total_flow_MWh"] = ctx.energy.reindex(pipelines.index).fillna(0)
+    monthly = ctx.monthly_energy.reindex(columns=pipelines.index).fillna(0)
+    monthly.index = monthly.index.strftime("%Y-%m")
+
+    paths = [out / "pipeline_flows.csv", out / "pipeline_flows_monthly.csv", out / "pipeline_flows.png"]
+    pipelines.to_csv(paths[0])
+    monthly.to_csv(paths[1])
+    plot_and_save(pipelines.total_flow_MWh.sort_values(ascending=False),
+                  f"H₂ Pipeline Flow ({ctx.label})", "Total flow (MWh)", paths[2], "steelblue")
+    return paths
+
+
+def run_soc(ctx, out):
+    if not ctx.network.has_series("stores", "e"):
+        print("No store levels found; skipping state of charge.")
+        return []
+    h2_stores, h2_soc = h2_store_soc(ctx.network.stores, ctx.network.stores_t.e)
+    if h2_stores.empty:
+        print("No hydrogen stores found; skipping state of charge.")
+        return []
+    paths = [out / "h2_soc.csv", out / "h2_soc.png"]
+    h2_soc.to_csv(paths[0])
+    ax = h2_soc.plot(figsize=(10, 5), title="Hydrogen Store State of Charge Over Time")
+    ax.set_ylabel("State of Charge [MWh]")
+    ax.set_xlabel("Time")
+    plt.grid(True, linestyle='--', alpha=0.5)
+    plt.tight_layout()
+    plt.savefig(paths[1])
+    plt.close()
+    return paths
+
+
+def run_costs(ctx, out, costs_csv):
+    capital, marginal, h2_costs = cost_summary(pd.read_csv(costs_csv))
+    paths = [out / "capital_cost.png", out / "marginal_cost.png", out / "h2_cost.png"]
+    plot_and_save(capital, "Capital Cost by Generator Carrier", "Capital Cost (€)", paths[0], "lightblue")
+    plot_and_save(marginal, "Marginal Cost by Generator Carrier", "Marginal Cost (€/MWh)", paths[1], "salmon")
+    plot_and_save(h2_costs, "Hydrogen Infrastructure Costs", "Capital Cost (€)", paths[2], "lightgreen")
+    return [p for p in paths if p.exists()]
+
+
+def run_demand(ctx, out, demand_csv, country):
+    monthly = monthly_demand(pd.read_csv(demand_csv, index_col=0, parse_dates=True), country)
+    paths = [out / f"monthly_demand_{country}.csv", out / f"monthly_demand_{country}.png"]
+    monthly.to_csv(paths[0])
+    plot_and_save(monthly, f"Monthly Electricity Demand - {country}", "Total Demand (MWh)", paths[1], "red")
+    return paths
+
+
+def main():
+    args = parse_args()
+    if args.month and not args.year:
+        print("--month needs --year.", file=sys.stderr)
+        sys.exit(1)
+
+    out = Path(args.output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    analyses = args.analyses or [
+        a for a in ANALYSES
+        if (a != "costs" or args.costs_csv) and (a != "demand" or (args.demand_csv and args.country))
+    ]
+
+    start = time.perf_counter()
+    try:
+        ctx = ReportContext(args.input, args.year, args.month, args.cube, args.cube_dir)
+    except Exception as e:
+        print(f"Error loading network: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    runners = {
+        "conversion": lambda: run_conversion(ctx, out),
+        "capacity_factors": lambda: run_capacity_factors(ctx, out, args.price_threshold, args.min_turndown,
+                                                         args.outage_fraction),
+        "pipelines": lambda: run_pipelines(ctx, out),
+        "soc": lambda: run_soc(ctx, out),
+        "costs": lambda: run_costs(ctx, out, args.costs_csv),
+        "demand": lambda: run_demand(ctx, out, args.demand_csv, args.country),
+    }
+    index = {"input": args.input, "period": ctx.label, "analyses": {}}
+    for name in analyses:
+        t0 = time.perf_counter()
+        try:
+            paths = runners[name]()
+        except Exception as e:
+            print(f"[!] {name} failed: {e}", file=sys.stderr)
+            index["analyses"][name] = {"error": str(e)}
+            continue
+        index["analyses"][name] = {"outputs": [str(p) for p in paths],
+                                   "seconds": round(time.perf_counter() - t0, 3)}
+        print(f"[✓] {name}: {len(paths)} outputs")
+    ctx.network.close()
+
+    index["seconds"] = round(time.perf_counter() - start, 3)
+    with open(out / "index.json", "w") as f:
+        json.dump(index, f, indent=2)
+    print(f"Report pack written to {out} in {index['seconds']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Stitch the result networks of snapshot windows into one continuous result network.
+
+Scenarios split with ``window`` in the config generators are solved per
+window; this joins their result ``.nc`` files back into one network that
+the other postprocess scripts read like a full-period result.
+
+Works on the PyPSA NetCDF layout directly with xarray:
+  - time series (``<list>_t_<attr>``) are concatenated along ``snapshots``;
+    a column missing from some window takes its static value there (as in
+    PyPSA), or 0 for results,
+  - snapshot weightings are concatenated with the snapshots,
+  - static tables come from the first window, except optimised capacities
+    (``*_opt``), which take the maximum over all windows,
+  - the objective is the sum of the window objectives.
+
+Usage:
+  python stitch_results.py \
+    --input results/de-2020-H2-2020-*/networks/base_s_5_elec_.nc \
+    --output results/de-2020-H2/networks/base_s_5_elec_.nc
+
+Dependencies:
+  pip install xarray netCDF4
+"""
+import sys
+import argparse
+from pathlib import Path
+import numpy as np
+import xarray as xr
+
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.network_loader import SNAPSHOTS, snapshot_index
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Stitch per-window PyPSA result networks into one continuous network."
+    )
+    parser.add_argument(
+        "--input", "-i", nargs="+", required=True,
+        help="Result network .nc files of the windows (any order)"
+    )
+    parser.add_argument(
+        "--output", "-o", required=True,
+        help="Path of the stitched network .nc file"
+    )
+    return parser.parse_args()
+
+
+def _first_snapshot(ds):
+    return ds[SNAPSHOTS].values.min()
+
+
+def _with_timestamps(ds):
+    """``ds`` with the snapshot timestamps as ``snapshots`` coordinate (PyPSA stores a 0..N-1 counter)."""
+    return ds.assign_coords({SNAPSHOTS: snapshot_index(ds).values})
+
+
+def _series_name(dim):
+    """``links_t_p0_i`` → (``links``, ``p0``)."""
+    list_name, attr = dim[:-2].split("_t_", 1)
+    return list_name, attr
+
+
+def stitch_series(name, windows):
+    """Concatenate one time-series variable over the windows, filling missing columns."""
+    dim = next(d for d in windows[0][name].dims if d != SNAPSHOTS)
+    list_name, attr = _series_name(dim)
+    columns = np.unique(np.concatenate([ds[name][dim].values for ds in windows if name in ds]))
+
+    parts = []
+    for ds in windows:
+        if name in ds:
+            part = ds[name].reindex({dim: columns})
+        else:
+            part = xr.DataArray(np.nan, dims=[SNAPSHOTS, dim], coords={SNAPSHOTS: ds[SNAPSHOTS], dim: columns})
+        # Columns a window did not store fall back to the static value, as PyPSA does on import
+        static = f"{list_name}_{attr}"
+        if static in ds:
+            default = ds[static].rename({f"{list_name}_i": dim}).reindex({dim: columns})
+            part = part.fillna(default)
+        parts.append(part.fillna(0))
+    return xr.concat(parts, dim=SNAPSHOTS)
+
+
+def stitch(windows):
+    """One dataset from per-window result datasets, ordered by their first snapshot."""
+    counter = not np.issubdtype(windows[0][SNAPSHOTS].dtype, np.datetime64)
+    windows = sorted((_with_timestamps(ds) for ds in windows), key=_first_snapshot)
+    base = windows[0]
+
+    series = sorted({name for ds in windows for name, var in ds.data_vars.items() if SNAPSHOTS in var.dims})
+    weightings = [name for name in series if name.startswith(f"{SNAPSHOTS}_")]
+    out = {}
+    for name in weightings:
+        out[name] = xr.concat([ds[name] for ds in windows], dim=SNAPSHOTS)
+    for name in series:
+        if name not in weightings:
+            out[name] = stitch_series(name, windows)
+
+    series_dims = {d for ds in windows for name in series if name in ds for d in ds[name].dims}
+    static = base.drop_vars(series, errors="ignore").drop_dims(list(series_dims & set(base.dims)))
+    for name in static.data_vars:
+        if name.endswith("_opt"):
+            static[name] = xr.concat([ds[name] for ds in windows if name in ds], dim="window").max("window")
+
+    stitched = xr.Dataset(out).merge(static)
+    _, first = np.unique(stitched[SNAPSHOTS].values, return_index=True)
+    if first.size < stitched.sizes[SNAPSHOTS]:
+        print(f"[WARN] {stitched.sizes[SNAPSHOTS] - first.size} snapshots appear in several windows; "
+              f"keeping the earlier window's values", file=sys.stderr)
+        stitched = stitched.isel({SNAPSHOTS: np.sort(first)})
+
+    if counter:
+        stitched = stitched.assign_coords({SNAPSHOTS: np.arange(stitched.sizes[SNAPSHOTS])})
+
+    stitched.attrs = dict(base.attrs)
+    objectives = [ds.attrs.get("network_objective") for ds in windows]
+    if all(o is not None for o in objectives):
+        stitched.attrs["network_objective"] = float(np.sum(objectives))
+    stitched.attrs["stitched_windows"] = len(windows)
+    return stitched
+
+
+def main():
+    args = parse_args()
+    if len(args.input) < 2:
+        print("Need at least two window networks to stitch.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Stitching {len(args.input)} window networks")
+    try:
+        windows = [xr.open_dataset(path) for path in args.input]
+    except Exception as e:
+        print(f"Error loading network: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    stitched = stitch(windows)
+    stitched.to_netcdf(args.output)
+    for ds in windows:
+        ds.close()
+
+    snapshots = snapshot_index(stitched).values
+    print(f"Stitched network with {snapshots.size} snapshots "
+          f"({np.datetime_as_string(snapshots[0], unit='h')} → {np.datetime_as_string(snapshots[-1], unit='h')}) "
+          f"written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,19 @@ Usage:
   python visualize_h2_soc.py --input path/to/network.nc
 
 Dependencies:
-  pip install pypsa matplotlib
+  pip install xarray netCDF4 matplotlib
 """
 
 import sys
 import argparse
-import pypsa
+from pathlib import Path
 import matplotlib.pyplot as plt
 
+# Ensure imports work when run from project root
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+
+from src.h2impact.postprocess.network_loader import load_network
+
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -26,18 +31,24 @@ def parse_args():
     return parser.parse_args()
 
 
+def h2_store_soc(stores, stores_e):
+    """Hydrogen stores and their state of charge over time."""
+    h2_stores = stores[stores.carrier.str.contains("H2", case=False, na=False)]
+    return h2_stores, stores_e.reindex(columns=h2_stores.index)
+
+
 def main():
     args = parse_args()
 
     print(f"Loading network from: {args.input}")
     try:
-        n = pypsa.Network(args.input)
+        n = load_network(args.input, static=["stores"], series={"stores": ["e"]})
     except Exception as e:
         print(f"Error loading network: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Filter hydrogen stores
-    h2_stores = n.stores[n.stores.carrier.str.contains("H2", case=False, na=False)]
+    # Filter hydrogen stores and their state of charge
+    h2_stores, h2_soc = h2_store_soc(n.stores, n.stores_t.e)
     if h2_stores.empty:
         print("No hydrogen stores found in the network.")
         sys.exit(0)
@@ -45,9 +56,6 @@ def main():
     print("Hydrogen Stores Found:")
     print(h2_stores[["bus", "e_nom", "carrier"]])
 
-    # Get time-series state of charge
-    h2_soc = n.stores_t.e[h2_stores.index]
-
     # Plotting
     ax = h2_soc.plot(figsize=(10, 5),
                      title="Hydrogen Store State of Charge Over Time")
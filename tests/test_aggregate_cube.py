@@ -0,0 +1,80 @@
+"""Checks of the aggregate cube against plain pandas on a tiny synthetic result network."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.postprocess.aggregate_cube import cube_path, is_fresh, period_totals, query
+
+LINKS = ["DE0 H2 Electrolysis", "DE0 H2 Fuel Cell", "H2 pipeline 0"]
+STORES = ["DE0 H2 Store"]
+SNAPSHOTS = pd.date_range("2020-01-01", "2020-03-15 23:00", freq="h")
+
+
+@pytest.fixture
+def network(tmp_path):
+    """PyPSA NetCDF layout: integer snapshots, timestamps in ``snapshots_snapshot``."""
+    rng = np.random.default_rng(0)
+    n = len(SNAPSHOTS)
+    ds = xr.Dataset(coords={"snapshots": np.arange(n), "links_i": LINKS, "links_t_p0_i": LINKS,
+                            "stores_i": STORES, "stores_t_e_i": STORES})
+    ds["snapshots_snapshot"] = ("snapshots", SNAPSHOTS)
+    ds["links_carrier"] = ("links_i", np.array(["H2 Electrolysis", "H2 Fuel Cell", "H2 pipeline"], dtype=object))
+    ds["links_t_p0"] = (("snapshots", "links_t_p0_i"), rng.uniform(-50, 100, (n, len(LINKS))))
+    ds["stores_t_e"] = (("snapshots", "stores_t_e_i"), rng.uniform(0, 1e3, (n, len(STORES))))
+    path = tmp_path / "base_s_1_elec_.nc"
+    ds.to_netcdf(path)
+    return path
+
+
+def hourly(path, name):
+    with xr.open_dataset(path) as ds:
+        values = ds[name].values
+        columns = ds[f"{name}_i"].values.astype(str)
+    return pd.DataFrame(values, index=SNAPSHOTS, columns=columns)
+
+
+@pytest.mark.parametrize("cube", [True, False])
+def test_monthly_abs_sum_matches_pandas(network, cube):
+    p0 = hourly(network, "links_t_p0")
+    expected = p0.abs().resample("MS").sum()
+
+    result = query(network, "links", "p0", "M", cube=cube)
+    assert isinstance(result.index, pd.DatetimeIndex) and result.index.name == "period"
+    pd.testing.assert_frame_equal(result[LINKS], expected.rename_axis("period"), check_freq=False,
+                                  check_index_type=False)
+    assert cube_path(network).exists() == cube
+
+
+def test_cube_and_hourly_paths_agree_on_slices(network):
+    for kwargs in ({"freq": "D", "period": ("2020-02-27", "2020-03-02"), "stat": "sum"},
+                   {"freq": "Y", "period": "2020", "stat": "max"},
+                   {"freq": "M", "period": "2020-02", "stat": "mean", "names": LINKS[:1]}):
+        with_cube = query(network, "links", "p0", cube=True, **kwargs)
+        without = query(network, "links", "p0", cube=False, **kwargs)
+        pd.testing.assert_frame_equal(with_cube, without[with_cube.columns])
+    assert list(with_cube.columns) == LINKS[:1]
+
+    peak = period_totals(network, "stores", "e", "2020-03", stat="max")
+    assert peak[STORES[0]] == pytest.approx(hourly(network, "stores_t_e").loc["2020-03"].max().iloc[0])
+
+
+def test_cube_dir_and_rebuild_on_change(network, tmp_path):
+    cache = tmp_path / "cache"
+    query(network, "links", "p0", "M", cube_dir=cache)
+    path = cube_path(network, cache)
+    assert path.parent == cache and is_fresh(network, path)
+    assert not cube_path(network).exists()
+
+    with xr.open_dataset(network) as ds:
+        changed = ds.load()
+    changed["links_t_p0"] = changed["links_t_p0"] * 2
+    changed.to_netcdf(network)
+    assert not is_fresh(network, path)
+    doubled = query(network, "links", "p0", "M", cube_dir=cache)
+    pd.testing.assert_frame_equal(doubled, query(network, "links", "p0", "M", cube=False)[doubled.columns])
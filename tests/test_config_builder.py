@@ -0,0 +1,63 @@
+"""Checks of the scenario config building blocks on in-memory configs."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.configs.config_builder import apply_segments, build_config, resource_fingerprint, time_steps
+
+AREA = (56.0, 5.0, 47.0, 16.0)
+
+
+def test_apply_segments_sets_resolution():
+    config = {"snapshots": {"start": "2020-01-01", "end": "2021-01-01"},
+              "clustering": {"temporal": {"resolution_elec": "3h"}}}
+    assert time_steps(config) == 2928
+    apply_segments(config, 100)
+    assert config["clustering"]["temporal"]["resolution_elec"] == "100seg"
+    assert time_steps(config) == 100
+
+
+def test_apply_segments_adds_missing_sections():
+    config = {"snapshots": {"start": "2020-03-01", "end": "2020-04-01"}}
+    apply_segments(config, 24)
+    assert config["clustering"] == {"temporal": {"resolution_elec": "24seg"}}
+
+
+@pytest.mark.parametrize("segments", [0, 31, 100])
+def test_apply_segments_rejects_counts_that_do_not_reduce(segments):
+    # 31 daily steps in March
+    config = {"snapshots": {"start": "2020-03-01", "end": "2020-04-01"},
+              "clustering": {"temporal": {"resolution_elec": "24h"}}}
+    with pytest.raises(ValueError, match="31 time steps"):
+        apply_segments(config, segments)
+    assert config["clustering"]["temporal"]["resolution_elec"] == "24h"
+
+
+def scenario(variant, start="2020-01-01", end="2020-12-31"):
+    return build_config(variant, ["DE"], AREA, "de-2020", "cutouts/de-2020.nc", start, end,
+                        run_name=f"de-2020-{variant}")
+
+
+def test_resource_fingerprint_shared_by_variants():
+    h2, no_h2 = scenario("H2"), scenario("noH2")
+    assert h2["run"]["name"] != no_h2["run"]["name"]
+    assert resource_fingerprint(h2) == resource_fingerprint(no_h2)
+    assert h2["run"]["shared_resources"]["policy"].startswith("de-")
+    assert h2["run"]["shared_resources"]["policy"] == no_h2["run"]["shared_resources"]["policy"]
+
+
+def test_resource_fingerprint_follows_shared_keys_only():
+    base = scenario("H2")
+    assert len(resource_fingerprint(base)) == 10
+
+    other = scenario("H2")
+    other["solving"] = {"solver": {"name": "gurobi"}}
+    other["atlite"] = dict(reversed(list(other["atlite"].items())))
+    assert resource_fingerprint(other) == resource_fingerprint(base)
+
+    assert resource_fingerprint(scenario("H2", end="2020-06-30")) != resource_fingerprint(base)
+    other["countries"] = ["DE", "FR"]
+    assert resource_fingerprint(other) != resource_fingerprint(base)
@@ -0,0 +1,55 @@
+"""Checks of the vectorised H₂ conversion table against hand-computed values."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.postprocess.calculate_h2_conversion_potential import (
+    conversion_metrics, conversion_table, link_regions,
+)
+
+LINKS = pd.DataFrame({
+    "carrier": ["H2 Electrolysis", "H2 Electrolysis", "H2 Fuel Cell", "H2 pipeline"],
+    "bus0": ["DE0", "FR0", "DE0 H2", "DE0 H2"],
+    "bus1": ["DE0 H2", "FR0 H2", "DE0", "FR0 H2"],
+    "efficiency": [0.7, 0.6, 0.5, 1.0],
+}, index=["DE0 H2 Electrolysis", "FR0 H2 Electrolysis", "DE0 H2 Fuel Cell", "H2 pipeline DE0-FR0"])
+
+# Absolute flows summed per month (MWh); the pipeline must not count
+ENERGY = pd.DataFrame(
+    [[100.0, 50.0, 20.0, 999.0], [0.0, 10.0, 5.0, 999.0]],
+    index=pd.DatetimeIndex(["2020-01-01", "2020-02-01"], name="period"), columns=LINKS.index,
+)
+
+
+def test_totals_per_period():
+    table = conversion_table(LINKS, ENERGY)
+    assert list(table.index) == list(ENERGY.index)
+    jan, feb = table.iloc[0], table.iloc[1]
+    assert jan.energy_in == 150 and jan.energy_out == 20
+    assert jan.elec_eff == pytest.approx(0.65) and jan.fc_eff == pytest.approx(0.5)
+    assert jan.h2_energy == pytest.approx(150 * 0.65)
+    assert jan.potential_output == pytest.approx(150 * 0.65 * 0.5)
+    assert jan.theoretical_rt == pytest.approx(0.325)
+    assert jan.empirical_rt == pytest.approx(20 / 150)
+    assert feb.energy_in == 10 and feb.empirical_rt == pytest.approx(0.5)
+
+
+def test_table_by_country():
+    regions = link_regions(LINKS, by="country").rename("country")
+    table = conversion_table(LINKS, ENERGY, regions=regions)
+    assert table.index.names == ["period", "country"]
+    de, fr = table.loc[("2020-01-01", "DE")], table.loc[("2020-01-01", "FR")]
+    assert de.energy_in == 100 and de.energy_out == 20 and de.elec_eff == pytest.approx(0.7)
+    # No fuel cell in FR: nothing can be reconverted there
+    assert fr.energy_in == 50 and fr.fc_eff == 0 and fr.potential_output == 0
+    # No electrolysis in February in DE: no division by zero
+    assert table.loc[("2020-02-01", "DE")].empirical_rt == 0
+
+
+def test_conversion_metrics_is_one_row_of_the_table():
+    metrics = conversion_metrics(LINKS, ENERGY.iloc[0])
+    assert metrics == pytest.approx(conversion_table(LINKS, ENERGY).iloc[0].to_dict())
@@ -0,0 +1,54 @@
+"""Checks of the resumable download queue against a local fake CDS client."""
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.data.download_queue import DownloadLedger, run_queue
+
+
+class FakeClient:
+    """Writes the request's area into the target instead of downloading."""
+
+    calls = []
+
+    def retrieve(self, name, request, target):
+        FakeClient.calls.append(request["month"])
+        Path(target).write_text(f"{name} {request['area']}")
+
+
+def jobs(tmp_path, area):
+    return [{"target": tmp_path / f"de_2020_{m:02d}.nc", "request": {"month": m, "area": area}} for m in (1, 2)]
+
+
+def test_resume_skips_done_jobs_and_redownloads_changed_requests(tmp_path):
+    ledger = tmp_path / "ledger.json"
+    FakeClient.calls = []
+    results = run_queue(jobs(tmp_path, [56, 5, 47, 16]), ledger, workers=2, client_factory=FakeClient)
+    assert set(results.values()) == {"done"}
+    assert sorted(FakeClient.calls) == [1, 2]
+
+    FakeClient.calls = []
+    results = run_queue(jobs(tmp_path, [56, 5, 47, 16]), ledger, client_factory=FakeClient)
+    assert set(results.values()) == {"skipped"}
+    assert FakeClient.calls == []
+
+    # Same targets, different area: both months are requested again
+    changed = jobs(tmp_path, [55, 6, 47, 15])
+    results = run_queue(changed, ledger, client_factory=FakeClient)
+    assert set(results.values()) == {"done"}
+    assert sorted(FakeClient.calls) == [1, 2]
+    assert (tmp_path / "de_2020_01.nc").read_text().endswith("[55, 6, 47, 15]")
+    assert DownloadLedger(ledger).is_complete(changed[0]["target"], changed[0])
+
+
+def test_client_factory_failure_fails_jobs_not_queue(tmp_path):
+    ledger = tmp_path / "ledger.json"
+
+    def no_credentials():
+        raise RuntimeError("Missing/incomplete configuration file: ~/.cdsapirc")
+
+    results = run_queue(jobs(tmp_path, [56, 5, 47, 16]), ledger, client_factory=no_credentials)
+    assert set(results.values()) == {"failed"}
+    entries = DownloadLedger(ledger).jobs
+    assert all(e["status"] == "failed" and "cdsapirc" in e["error"] for e in entries.values())
@@ -0,0 +1,37 @@
+"""Checks of the encoding profiles on a tiny synthetic cutout."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.data.encoding_profiles import build_encoding
+from src.h2impact.data.cutout_io import write_cutout
+
+
+def cutout():
+    time = pd.date_range("2020-01-01", periods=24, freq="h")
+    shape = (24, 2, 3)
+    return xr.Dataset(
+        {
+            "t2m": (("time", "y", "x"), np.linspace(260, 300, np.prod(shape)).reshape(shape).astype("f4")),
+            "si": (("time", "y", "x"), np.full(shape, np.nan, dtype="f4")),
+        },
+        coords={"time": time, "y": [50.0, 50.25], "x": [6.0, 6.25, 6.5]},
+    )
+
+
+def test_packed_int16_skips_variables_without_finite_values(tmp_path):
+    ds = cutout()
+    encoding = build_encoding(ds, "packed-int16")
+    assert encoding["t2m"]["dtype"] == "int16"
+    assert encoding["si"]["dtype"] == "float32"
+    assert "scale_factor" not in encoding["si"]
+
+    out = write_cutout(ds, tmp_path / "packed.nc", profile="packed-int16")
+    with xr.open_dataset(out) as back:
+        assert back["si"].isnull().all()
+        np.testing.assert_allclose(back["t2m"].values, ds["t2m"].values, atol=40 / 65534)
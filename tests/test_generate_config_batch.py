@@ -0,0 +1,27 @@
+"""Checks of the batch generator's spec handling."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.configs.generate_config_batch import DEFAULT_SPEC, check_segments, generate
+
+
+def spec(tmp_path, **overrides):
+    return {**DEFAULT_SPEC, "countries": ["germany"], "years": [2020], "cutout_dir": str(tmp_path / "cutouts"),
+            "output_dir": str(tmp_path / "yaml"), **overrides}
+
+
+def test_check_segments_accepts_counts_below_every_window(tmp_path):
+    # The H2 template solves daily steps: February 2020 has 29
+    check_segments(spec(tmp_path, window="month", segments=28))
+
+
+def test_too_many_segments_fail_once_before_writing(tmp_path, capsys):
+    s = spec(tmp_path, window="month", segments=100)
+    with pytest.raises(ValueError, match="only 29 steps for 2020-02"):
+        generate(s)
+    assert not (tmp_path / "yaml").exists()
+    assert "[WARN]" not in capsys.readouterr().out
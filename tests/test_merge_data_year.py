@@ -0,0 +1,74 @@
+"""Checks of the incremental yearly merge on tiny synthetic monthly cutouts."""
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.data.merge_data_year import manifest_path, update_year
+
+
+def month(path, start, periods, offset=0.0):
+    """Monthly cutout whose t2m value is the hour of the year plus ``offset``."""
+    time = pd.date_range(start, periods=periods, freq="h")
+    hours = ((time - pd.Timestamp("2020-01-01")) / pd.Timedelta("1h")).to_numpy()
+    values = np.broadcast_to((hours + offset)[:, None, None], (periods, 2, 2)).astype("f4")
+    xr.Dataset({"t2m": (("time", "y", "x"), values)},
+               coords={"time": time, "y": [50.0, 50.25], "x": [6.0, 6.25]}).to_netcdf(path)
+    # Distinct mtime even when a test rewrites a file within the same clock tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + int(1e9) * (1 + int(offset))))
+    return path
+
+
+def read(out):
+    with xr.open_dataset(out) as ds:
+        return ds["t2m"][:, 0, 0].to_series()
+
+
+def test_update_year_appends_replaces_and_grows_last_month(tmp_path):
+    jan = month(tmp_path / "jan.nc", "2020-01-01", 744)
+    feb = month(tmp_path / "feb.nc", "2020-02-01", 696)
+    out = tmp_path / "year.nc"
+
+    update_year([jan, feb], out)
+    manifest = json.loads(manifest_path(out).read_text())["months"]
+    assert {k: (v["start"], v["n_times"]) for k, v in manifest.items()} == {
+        "2020-01": (0, 744), "2020-02": (744, 696)}
+    np.testing.assert_array_equal(read(out).values, np.arange(744 + 696))
+
+    # Changed January values are written in place
+    month(jan, "2020-01-01", 744, offset=0.5)
+    update_year([jan, feb], out)
+    series = read(out)
+    assert len(series) == 744 + 696
+    assert series.iloc[0] == 0.5 and series.iloc[744] == 744
+
+    # A partial March is appended, then completed (the last month may grow)
+    mar = month(tmp_path / "mar.nc", "2020-03-01", 240)
+    update_year([jan, feb, mar], out)
+    assert len(read(out)) == 744 + 696 + 240
+    month(mar, "2020-03-01", 744, offset=1.0)
+    update_year([jan, feb, mar], out)
+    series = read(out)
+    assert len(series) == 744 + 696 + 744
+    assert series.index[-1] == pd.Timestamp("2020-03-31 23:00")
+    np.testing.assert_array_equal(series.iloc[1440:].values, np.arange(1440, 2184) + 1.0)
+    assert json.loads(manifest_path(out).read_text())["months"]["2020-03"]["n_times"] == 744
+
+
+def test_update_year_rejects_a_shorter_month_in_the_middle(tmp_path):
+    jan = month(tmp_path / "jan.nc", "2020-01-01", 744)
+    feb = month(tmp_path / "feb.nc", "2020-02-01", 696)
+    out = tmp_path / "year.nc"
+    update_year([jan, feb], out)
+
+    month(jan, "2020-01-01", 700, offset=2.0)
+    with pytest.raises(ValueError, match="without --incremental"):
+        update_year([jan, feb], out)
@@ -0,0 +1,43 @@
+"""Checks of the lazy network loader against the bundled PyPSA result network."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.postprocess.network_loader import load_network
+
+NETWORK = Path(__file__).parent / "outputfiles-test" / "base_s_6_elec_.nc"
+
+
+def test_snapshots_are_timestamps():
+    with load_network(NETWORK) as n:
+        assert isinstance(n.snapshots, pd.DatetimeIndex)
+        assert n.snapshots[0] == pd.Timestamp("2013-03-01")
+        assert n.investment_periods is None
+
+
+def test_period_slice_reads_the_month():
+    with load_network(NETWORK, static=["buses"], series={"buses": ["marginal_price"]},
+                      start="2013-03", end="2013-03") as n:
+        assert len(n.snapshots) == 7
+        prices = n.buses_t.marginal_price
+        assert prices.index.equals(n.snapshots)
+        assert set(prices.columns) <= set(n.buses.index)
+
+    with load_network(NETWORK, start="2013-04", end="2013-04") as n:
+        assert n.snapshots.empty
+
+
+def test_missing_series_warns():
+    with load_network(NETWORK, series={"stores": ["e"]}) as n:
+        with pytest.warns(UserWarning, match="stores_t_e"):
+            assert n.stores_t.e.empty
+
+
+def test_undeclared_table_raises():
+    with load_network(NETWORK, static=["buses"]) as n:
+        with pytest.raises(AttributeError):
+            n.links
@@ -0,0 +1,59 @@
+"""Checks of the time-axis check and repair on a tiny synthetic cutout."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.data.time_continuity import check_time, repair_time, unfilled_gaps
+
+
+def cutout(times, name="time"):
+    hours = ((pd.DatetimeIndex(times) - pd.Timestamp("2020-01-01")) / pd.Timedelta("1h")).to_numpy()
+    values = np.broadcast_to(hours[:, None, None], (len(hours), 1, 2)).astype("f4")
+    return xr.Dataset({"t2m": ((name, "y", "x"), values)}, coords={name: times, "y": [50.0], "x": [6.0, 6.25]})
+
+
+def test_repair_fills_short_gaps_and_leaves_long_ones():
+    times = pd.date_range("2020-01-01", periods=48, freq="h")
+    # A 2-step gap after hour 5 and a 10-step gap after hour 20
+    kept = times.delete([6, 7, *range(21, 31)])
+    ds = cutout(kept, name="valid_time")
+    before = check_time(ds)
+    assert before["n_gaps"] == 2 and before["missing_steps"] == 12
+
+    repaired = repair_time(ds, max_gap="3h")
+    assert "time" in repaired.dims and check_time(repaired)["ok"]
+    t2m = repaired["t2m"][:, 0, 0].to_series()
+    # Linear interpolation of an hour-of-year field gives the hour back
+    np.testing.assert_allclose(t2m.iloc[6:8].values, [6, 7])
+    assert t2m.iloc[21:31].isnull().all()
+    assert t2m.drop(t2m.index[21:31]).notnull().all()
+
+    unfilled = unfilled_gaps(before, max_gap="3h")
+    assert [(g["after"], g["missing"]) for g in unfilled] == [("2020-01-01T20:00:00", 10)]
+
+
+def test_repair_drops_duplicates_and_sorts():
+    times = pd.date_range("2020-01-01", periods=6, freq="h")
+    shuffled = pd.DatetimeIndex([times[0], times[2], times[1], times[2], *times[3:]])
+    ds = cutout(shuffled)
+    before = check_time(ds)
+    assert before["n_duplicates"] == 1 and before["n_backwards"] == 1
+
+    repaired = repair_time(ds)
+    assert repaired.indexes["time"].equals(times)
+    np.testing.assert_array_equal(repaired["t2m"][:, 0, 0].values, np.arange(6))
+    assert unfilled_gaps(before) == []
+
+
+def test_gap_exactly_at_max_gap_is_filled():
+    times = pd.date_range("2020-01-01", periods=12, freq="h").delete([4, 5])
+    before = check_time(cutout(times))
+    # Two missing steps span 3 hours between the valid neighbours
+    assert unfilled_gaps(before, max_gap="3h") == []
+    assert len(unfilled_gaps(before, max_gap="2h")) == 1
+    assert repair_time(cutout(times), max_gap="2h")["t2m"][4:6].isnull().all()
@@ -0,0 +1,63 @@
+"""Checks of the segmentation error report on synthetic capacity-factor profiles."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from src.h2impact.data.time_segments import cf_error, report_path, segmentation_report
+
+
+def profiles(hours=24 * 28):
+    index = pd.date_range("2020-03-01", periods=hours, freq="h", name="time")
+    h = np.arange(hours)
+    return pd.DataFrame({
+        "wind": 0.4 + 0.3 * np.sin(h / 40),
+        "solar": np.clip(np.sin((h % 24 - 6) / 12 * np.pi), 0, None) * 0.6,
+    }, index=index)
+
+
+def test_cf_error_of_identical_series_is_zero():
+    p = profiles()
+    errors = cf_error(p, p)
+    for stats in errors.values():
+        assert stats["mean_error_pct"] == stats["var_error_pct"] == stats["duration_curve_rmse"] == 0
+
+
+def test_cf_error_against_hand_computed_values():
+    full = pd.DataFrame({"wind": [0.0, 1.0, 0.5, 0.5]})
+    flat = pd.DataFrame({"wind": [0.5, 0.5, 0.5, 0.5]})
+    stats = cf_error(full, flat)["wind"]
+    assert stats["mean_error_pct"] == 0
+    assert stats["var_full"] == pytest.approx(0.125)
+    assert stats["var_error_pct"] == -100
+    # Sorted: [1, .5, .5, 0] against [.5, .5, .5, .5]
+    assert stats["duration_curve_rmse"] == pytest.approx(np.sqrt(0.125), abs=1e-4)
+
+
+def test_segmentation_report_keeps_mean_and_flags_lost_variance():
+    pytest.importorskip("tsam")
+    p = profiles()
+    report = segmentation_report(p, 7, start="2020-03-01", end="2020-03-15")
+    assert report["time_steps"] == 24 * 14
+    assert report["segments"] == 7
+    for stats in report["cf_error"].values():
+        assert stats["mean_error_pct"] == pytest.approx(0, abs=0.01)
+    # Seven segments over two weeks cannot follow the daily solar cycle
+    assert report["cf_error"]["solar"]["var_error_pct"] < -10
+    assert any(w.startswith("solar:") for w in report["warnings"])
+
+    fine = segmentation_report(p, 24 * 14, end="2020-03-15")
+    assert not fine["warnings"]
+
+
+def test_segmentation_report_rejects_empty_range():
+    with pytest.raises(ValueError, match="no time steps"):
+        segmentation_report(profiles(), 10, start="2021-01-01")
+
+
+def test_report_path_sits_next_to_config():
+    assert report_path("yaml_files/config_H2_de-2020.yaml") == Path("yaml_files/config_H2_de-2020.segments.json")